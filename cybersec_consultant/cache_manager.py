@@ -8,6 +8,7 @@ import time
 import json
 import hashlib
 import os
+import sqlite3
 from typing import Dict, Any, Optional, List, Tuple, Callable, TypeVar, Union
 from collections import OrderedDict
 from functools import wraps
@@ -196,6 +197,121 @@ class TimedCache(LRUCache):
             return len(expired_keys)
 
 
+class CacheBackend:
+    """
+    Кэш ключ-значение в одной базе SQLite
+
+    Заменяет тысячи мелких JSON-файлов: поиск записи - один запрос по
+    первичному ключу, а устаревшие записи удаляются одним DELETE.
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Инициализация кэша
+        
+        Args:
+            db_path: Путь к файлу базы SQLite
+        """
+        self.db_path = db_path
+        
+        # Соединение общее для потоков сервиса, доступ к нему сериализуется
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, inserted_at INTEGER NOT NULL, payload BLOB NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_inserted_at ON cache (inserted_at)"
+        )
+    
+    def get(self, key: str, ttl_hours: float) -> Optional[bytes]:
+        """
+        Получает актуальную запись кэша
+        
+        Args:
+            key: Ключ записи
+            ttl_hours: Время жизни записи в часах
+            
+        Returns:
+            Optional[bytes]: Данные записи или None, если ее нет или она устарела
+        """
+        min_inserted_at = int(time.time() - ttl_hours * 3600)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM cache WHERE key = ? AND inserted_at > ?",
+                (key, min_inserted_at)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def set(self, key: str, payload: bytes):
+        """
+        Сохраняет запись кэша
+        
+        Args:
+            key: Ключ записи
+            payload: Данные записи
+        """
+        self.set_many([(key, payload)])
+    
+    def set_many(self, items: List[Tuple[str, bytes]]):
+        """
+        Сохраняет несколько записей кэша в одной транзакции
+        
+        Args:
+            items: Пары (ключ, данные)
+        """
+        inserted_at = int(time.time())
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, inserted_at, payload) VALUES (?, ?, ?)",
+                    [(key, inserted_at, payload) for key, payload in items]
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+    
+    def purge_expired(self, ttl_hours: float) -> int:
+        """
+        Удаляет устаревшие записи
+        
+        Args:
+            ttl_hours: Время жизни записи в часах
+            
+        Returns:
+            int: Количество удаленных записей
+        """
+        min_inserted_at = int(time.time() - ttl_hours * 3600)
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE inserted_at <= ?", (min_inserted_at,)
+            )
+        return cursor.rowcount
+    
+    def trim(self, max_entries: int) -> int:
+        """
+        Удаляет самые старые записи сверх заданного числа
+        
+        Args:
+            max_entries: Максимальное число записей
+            
+        Returns:
+            int: Количество удаленных записей
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY inserted_at DESC LIMIT -1 OFFSET ?)",
+                (max_entries,)
+            )
+        return cursor.rowcount
+
+
 class CacheManager:
     """
     Менеджер кэшей для различных типов данных консультанта.
@@ -6,6 +6,7 @@
 import os
 import json
 import getpass
+from functools import lru_cache
 from pathlib import Path
 
 # Определение путей для хранения данных
@@ -26,16 +27,46 @@ os.makedirs(PROMPTS_DIR, exist_ok=True)
 os.makedirs(INDICES_DIR, exist_ok=True)
 os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
 
+# API ключ, введенный пользователем (запоминается до конца процесса)
+_api_key = None
+
+# Функции, вызываемые при сбросе API ключа (например, очистка кэшированных клиентов)
+_api_key_reset_callbacks = []
+
 def get_api_key():
     """
-    Получает API ключ OpenAI от пользователя
+    Получает API ключ OpenAI от пользователя (запрашивается один раз за процесс)
+
+    Пустой ключ не запоминается, поэтому при следующем вызове его можно
+    ввести снова; неверный ключ сбрасывается функцией reset_api_key.
 
     Returns:
         str: API ключ
     """
-    api_key = getpass.getpass("Введите ваш API ключ OpenAI: ")
+    global _api_key
+    if _api_key:
+        return _api_key
+    api_key = getpass.getpass("Введите ваш API ключ OpenAI: ").strip()
+    if api_key:
+        _api_key = api_key
     return api_key
 
+def reset_api_key():
+    """Забывает запомненный API ключ (например, после ошибки аутентификации)"""
+    global _api_key
+    _api_key = None
+    for callback in _api_key_reset_callbacks:
+        callback()
+
+def on_api_key_reset(callback):
+    """
+    Регистрирует функцию, вызываемую при сбросе API ключа
+
+    Args:
+        callback (callable): Функция без аргументов
+    """
+    _api_key_reset_callbacks.append(callback)
+
 
 class ConfigManager:
     """Класс для управления настройками консультанта"""
@@ -49,11 +80,19 @@ class ConfigManager:
             "settings": {
                 "chunk_size": 1024,
                 "chunk_overlap": 200,
+                "chunk_by_tokens": False,
                 "temperature": 0.7,
                 "max_tokens": 2000,
                 "cache_size": 100,
                 "use_hybrid_search": True,
-                "hybrid_weight": 0.5
+                "hybrid_weight": 0.5,
+                "faiss_index_type": "flat",
+                "faiss_nprobe": 16,
+                "faiss_ef_search": 64,
+                "faiss_quantization": "QT_8bit",
+                "faiss_threads": 0,
+                "embedding_backend": "openai",
+                "embedding_model_st": "BAAI/bge-base-en-v1.5"
             }
         }
 
@@ -116,3 +155,14 @@ class ConfigManager:
         self.config[section][key] = value
         self.save_config()
         return True
+
+
+@lru_cache(maxsize=1)
+def get_config_manager():
+    """
+    Возвращает общий экземпляр менеджера конфигурации
+
+    Returns:
+        ConfigManager: Менеджер конфигурации
+    """
+    return ConfigManager()
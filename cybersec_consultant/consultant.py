@@ -7,7 +7,7 @@ import os
 import time
 from datetime import datetime
 
-from cybersec_consultant.config import ConfigManager
+from cybersec_consultant.config import get_config_manager
 from cybersec_consultant.knowledge_base import KnowledgeBaseManager
 from cybersec_consultant.embeddings import VectorSearchManager
 from cybersec_consultant.hybrid_search import HybridSearchManager
@@ -26,7 +26,7 @@ class CybersecurityConsultant:
     def __init__(self):
         """Инициализация консультанта"""
         # Инициализация компонентов
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         self.kb_manager = KnowledgeBaseManager()
         self.vector_search = VectorSearchManager()
         self.hybrid_search = HybridSearchManager()
@@ -755,6 +755,11 @@ class CybersecurityConsultant:
                 print(response)
                 continue
 
+            # Запрашиваем ключ заново, если предыдущий был отклонен API
+            if self.llm_interface.ensure_api_key():
+                self.vector_search._init_embeddings()
+                self.hybrid_search.vector_search._init_embeddings()
+
             # Обрабатываем обычный запрос
             response = self.process_user_query(user_query, context)
             
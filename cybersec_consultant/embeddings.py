@@ -3,48 +3,519 @@
 Модуль для работы с векторными эмбеддингами и поиском
 """
 
+import io
 import os
+import sys
+import math
 import time
 import json
-import pickle
 import hashlib
+import threading
 from datetime import datetime
 from tqdm.auto import tqdm
 
+import numpy as np
+import faiss
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain.schema import Document
 
-from cybersec_consultant.config import ConfigManager, INDICES_DIR, get_api_key
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+from cybersec_consultant.config import get_config_manager, INDICES_DIR, CACHE_DIR, get_api_key, on_api_key_reset
 from cybersec_consultant.state_management import STATE
+from cybersec_consultant.cache_manager import LRUCache, CacheBackend
+
+# Размер пакета текстов для одного запроса эмбеддингов
+EMBEDDING_BATCH_SIZE = 256
+
+# Минимальное число векторов для обучения IVF-индекса
+IVF_MIN_VECTORS = 1024
+
+# Число субквантователей для IVF-PQ
+IVF_PQ_M = 64
+
+# HNSW окупается только на больших корпусах; параметры графа
+HNSW_MIN_VECTORS = 20_000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+
+# Корпуса меньше этого размера ищутся прямым перебором плотной матрицы float16
+SMALL_CORPUS_MAX = 10_000
+
+# Размер блока измерений при расчете L2 с ранним отсечением
+L2_BLOCK = 64
+
+# Имена файлов сохраненного индекса
+INDEX_FILE = "index.faiss"
+DOCUMENTS_FILE = "documents.jsonl"
+DOCUMENTS_ZST_FILE = "documents.jsonl.zst"
+VECTORS_FILE = "vectors.f16.npy"
+
+# Кэш эмбеддингов запросов: в памяти процесса и на диске между перезапусками.
+# На диске - SQLite в режиме WAL (безопасен для нескольких процессов),
+# с ограничением времени жизни (в часах) и числа записей
+QUERY_EMBEDDINGS_FILE = os.path.join(CACHE_DIR, "query_embeddings.sqlite")
+QUERY_EMBEDDINGS_TTL = 30 * 24
+QUERY_EMBEDDINGS_MAX = 100_000
+_query_embeddings = LRUCache(maxsize=4096)
+_query_embeddings_db = None
+_query_embeddings_lock = threading.Lock()
+
+# Модели эмбеддингов, общие для всех менеджеров поиска процесса
+_embedding_models = {}
+
+# Модель OpenAI создается с отклоненным ключом, поэтому при его сбросе она удаляется
+on_api_key_reset(lambda: _embedding_models.pop(("openai", None), None))
+
+
+def _cos_batch(X, y):
+    """
+    Косинусное сходство вектора со всеми строками матрицы за один проход
+
+    Args:
+        X (np.ndarray): Матрица векторов формы (n, d)
+        y (np.ndarray): Вектор формы (d,)
+
+    Returns:
+        np.ndarray: Сходства формы (n,)
+    """
+    return (X @ y) / np.sqrt(np.einsum("ij,ij->i", X, X, dtype=np.float32) * np.vdot(y, y))
+
+
+def _faiss_similarities(index, D):
+    """
+    Приводит результаты поиска FAISS к косинусному сходству
+
+    Индексы по скалярному произведению нормализованных векторов уже возвращают
+    косинус. Старые индексы по L2 возвращают квадрат расстояния; для единичных
+    векторов косинус равен 1 - d / 2.
+
+    Args:
+        index (faiss.Index): Индекс, выполнивший поиск
+        D (np.ndarray): Оценки, возвращенные index.search
+
+    Returns:
+        np.ndarray: Косинусное сходство
+    """
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        return D
+    return 1.0 - D / 2.0
+
+
+def _l2_early(a, B, k):
+    """
+    Находит k строк матрицы, ближайших к вектору по L2, с ранним отсечением
+
+    Расстояния накапливаются блоками по L2_BLOCK измерений. Граница берется
+    как наибольшее точное расстояние среди k строк, лучших по первому блоку;
+    строки, частичная сумма которых уже превысила границу, дальше не считаются.
+    Результат точный, так как частичная сумма квадратов только растет.
+
+    Args:
+        a (np.ndarray): Вектор запроса формы (d,)
+        B (np.ndarray): Матрица векторов формы (n, d)
+        k (int): Количество результатов
+
+    Returns:
+        tuple: (индексы строк, квадраты расстояний), отсортированные по возрастанию
+    """
+    n, d = B.shape
+    k = min(k, n)
+    a = np.asarray(a, dtype=np.float32)
+
+    block = B[:, :L2_BLOCK].astype(np.float32) - a[:L2_BLOCK]
+    partial = np.einsum("ij,ij->i", block, block)
+    rows = np.arange(n)
+
+    seed = np.argpartition(partial, k - 1)[:k]
+    diff = B[seed].astype(np.float32) - a
+    bound = np.einsum("ij,ij->i", diff, diff).max()
+
+    for start in range(L2_BLOCK, d, L2_BLOCK):
+        keep = partial <= bound
+        rows, partial = rows[keep], partial[keep]
+        block = B[rows, start:start + L2_BLOCK].astype(np.float32) - a[start:start + L2_BLOCK]
+        partial += np.einsum("ij,ij->i", block, block)
+
+    top = np.argpartition(partial, k - 1)[:k]
+    top = top[np.argsort(partial[top])]
+    return rows[top], partial[top]
+
+
+def _get_query_embeddings_db():
+    """
+    Открывает дисковый кэш эмбеддингов запросов при первом обращении
+    и удаляет из него устаревшие и лишние записи
+
+    Returns:
+        CacheBackend or None: Хранилище или None, если его не удалось открыть
+    """
+    global _query_embeddings_db
+    with _query_embeddings_lock:
+        if _query_embeddings_db is None:
+            try:
+                db = CacheBackend(QUERY_EMBEDDINGS_FILE)
+                db.purge_expired(QUERY_EMBEDDINGS_TTL)
+                db.trim(QUERY_EMBEDDINGS_MAX)
+                _query_embeddings_db = db
+            except Exception as e:
+                print(f"⚠️ Дисковый кэш эмбеддингов недоступен: {str(e)}")
+                _query_embeddings_db = False
+    return _query_embeddings_db or None
+
 
 class VectorSearchManager:
     """Класс для управления векторным поиском"""
 
     def __init__(self):
         """Инициализация менеджера векторного поиска"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         self.embeddings = None
         
+        # Бэкенд эмбеддингов: openai (API) или st (локальная модель sentence-transformers)
+        self.embedding_backend = self.config_manager.get_setting("settings", "embedding_backend", "openai")
+
         # Инициализация API ключа из централизованного состояния
-        if not STATE.api_key:
+        if self.embedding_backend == "openai" and not STATE.api_key:
             STATE.api_key = get_api_key()
 
         # Создаем директорию для индексов, если она не существует
         os.makedirs(INDICES_DIR, exist_ok=True)
 
+        # Ограничиваем число потоков OpenMP, используемых FAISS
+        self._init_faiss_threads()
+
         # Инициализируем модель эмбеддингов
         self._init_embeddings()
 
+    def _init_faiss_threads(self):
+        """
+        Задает число потоков FAISS
+
+        Значение берется из переменной окружения CYBERSEC_FAISS_THREADS или
+        настройки settings.faiss_threads. По умолчанию ядра делятся поровну
+        между рабочими процессами сервера (WEB_CONCURRENCY), чтобы процессы
+        не конкурировали за одни и те же ядра.
+        """
+        threads = os.environ.get("CYBERSEC_FAISS_THREADS") or self.config_manager.get_setting("settings", "faiss_threads", 0)
+        try:
+            threads = int(threads)
+        except (TypeError, ValueError):
+            threads = 0
+
+        if threads <= 0:
+            try:
+                workers = max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+            except ValueError:
+                workers = 1
+            threads = max(1, (os.cpu_count() or 1) // workers)
+
+        faiss.omp_set_num_threads(threads)
+
     def _init_embeddings(self):
-        """Инициализирует модель эмбеддингов"""
+        """Инициализирует модель эмбеддингов или берет уже созданную в процессе"""
+        if self.embedding_backend == "st":
+            key = ("st", self.config_manager.get_setting("settings", "embedding_model_st", "BAAI/bge-base-en-v1.5"))
+        else:
+            key = ("openai", None)
+
+        if key in _embedding_models:
+            self.embeddings = _embedding_models[key]
+            return
+
         try:
-            self.embeddings = OpenAIEmbeddings()
+            if self.embedding_backend == "st":
+                self.embeddings = self._create_local_embeddings()
+            else:
+                self.embeddings = OpenAIEmbeddings()
+            _embedding_models[key] = self.embeddings
             print("✅ Модель эмбеддингов успешно инициализирована")
         except Exception as e:
             print(f"❌ Ошибка при инициализации модели эмбеддингов: {str(e)}")
             self.embeddings = None
 
+    def _create_local_embeddings(self):
+        """
+        Создает локальную модель эмбеддингов sentence-transformers
+
+        Модель выполняется на GPU, если он доступен, и сразу возвращает
+        нормализованные векторы.
+
+        Returns:
+            HuggingFaceEmbeddings: Модель эмбеддингов
+        """
+        try:
+            from langchain_huggingface import HuggingFaceEmbeddings
+        except ImportError:
+            try:
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                import sentence_transformers  # noqa: F401
+            except ImportError:
+                raise ImportError("Для локальных эмбеддингов требуется установить пакет: pip install sentence-transformers")
+
+        try:
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        except ImportError:
+            device = "cpu"
+
+        model_name = self.config_manager.get_setting("settings", "embedding_model_st", "BAAI/bge-base-en-v1.5")
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"device": device},
+            encode_kwargs={"batch_size": 256, "normalize_embeddings": True}
+        )
+
+    def _embed_documents(self, texts):
+        """
+        Вычисляет эмбеддинги текстов пакетами и нормализует их
+
+        Args:
+            texts (list): Список текстов
+
+        Returns:
+            np.ndarray: Матрица нормализованных векторов (float32)
+        """
+        batches = range(0, len(texts), EMBEDDING_BATCH_SIZE)
+
+        # Редкое обновление прогресса; вне терминала и ноутбука прогресс не выводится
+        progress = tqdm(
+            batches,
+            desc="Эмбеддинги",
+            mininterval=2.0,
+            miniters=max(1, len(batches) // 100),
+            smoothing=0,
+            disable=not sys.stderr.isatty() and "ipykernel" not in sys.modules
+        )
+
+        vectors = []
+        for start in progress:
+            vectors.extend(self.embeddings.embed_documents(texts[start:start + EMBEDDING_BATCH_SIZE]))
+
+        # Нормализуем векторы один раз: косинусное сходство сводится к скалярному произведению
+        xb = np.asarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(xb)
+        return xb
+
+    def _embed_query(self, query):
+        """
+        Вычисляет нормализованный эмбеддинг запроса с кэшированием
+
+        Ключ кэша - SHA-256 от имени модели и текста запроса с нормализованными
+        пробелами, поэтому повторный запрос с другим k не обращается к API
+        эмбеддингов. Регистр сохраняется: эмбеддинг вычисляется для того же
+        текста, что и ключ, а регистр важен для терминов вроде "WannaCry".
+
+        Args:
+            query (str): Поисковый запрос
+
+        Returns:
+            np.ndarray: Вектор запроса формы (1, d)
+        """
+        model = getattr(self.embeddings, "model", None) or getattr(self.embeddings, "model_name", type(self.embeddings).__name__)
+        normalized_query = " ".join(query.split())
+        key = hashlib.sha256(f"{model}:{normalized_query}".encode()).hexdigest()
+
+        vec = _query_embeddings.get(key)
+        if vec is not None:
+            return vec
+
+        db = _get_query_embeddings_db()
+        payload = db.get(key, QUERY_EMBEDDINGS_TTL) if db is not None else None
+
+        if payload is not None:
+            vec = np.frombuffer(payload, dtype=np.float32).reshape(1, -1)
+        else:
+            vec = np.asarray(self.embeddings.embed_query(normalized_query), dtype=np.float32).reshape(1, -1)
+            faiss.normalize_L2(vec)
+            if db is not None:
+                db.set(key, vec.tobytes())
+
+        _query_embeddings[key] = vec
+        return vec
+
+    def _build_index(self, xb):
+        """
+        Строит индекс FAISS выбранного в настройках типа
+
+        Поддерживаемые типы (settings.faiss_index_type):
+            flat  - полный перебор (IndexFlatIP / IndexScalarQuantizer)
+            ivf   - инвертированные списки (IndexIVFFlat / IndexIVFScalarQuantizer)
+            ivfpq - инвертированные списки с продуктовым квантованием (IndexIVFPQ)
+            hnsw  - граф HNSW для онлайн-запросов с низкой задержкой (IndexHNSWFlat)
+
+        Для flat и ivf векторы хранятся со скалярным квантованием
+        settings.faiss_quantization (QT_8bit, QT_fp16 или none).
+
+        Args:
+            xb (np.ndarray): Матрица нормализованных векторов (float32)
+
+        Returns:
+            faiss.Index: Заполненный индекс
+        """
+        n, d = xb.shape
+        index_type = self.config_manager.get_setting("settings", "faiss_index_type", "flat")
+
+        if index_type in ("ivf", "ivfpq") and n < IVF_MIN_VECTORS:
+            print(f"⚠️ Слишком мало векторов для индекса '{index_type}' ({n}), используем точный поиск")
+            index_type = "flat"
+
+        if index_type == "hnsw" and n <= HNSW_MIN_VECTORS:
+            print(f"⚠️ Индекс HNSW не нужен для {n} векторов, используем точный поиск")
+            index_type = "flat"
+
+        qtype = self._get_quantizer_type()
+
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(d, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        elif index_type in ("ivf", "ivfpq"):
+            nlist = int(4 * math.sqrt(n))
+            quantizer = faiss.IndexFlatIP(d)
+            if index_type == "ivfpq" and d % IVF_PQ_M == 0:
+                index = faiss.IndexIVFPQ(quantizer, d, nlist, IVF_PQ_M, 8, faiss.METRIC_INNER_PRODUCT)
+            elif qtype is not None:
+                index = faiss.IndexIVFScalarQuantizer(quantizer, d, nlist, qtype, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexIVFFlat(quantizer, d, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(xb)
+        elif qtype is not None:
+            index = faiss.IndexScalarQuantizer(d, qtype, faiss.METRIC_INNER_PRODUCT)
+            index.train(xb)
+        else:
+            index = faiss.IndexFlatIP(d)
+
+        index.add(xb)
+        self._apply_search_params(index)
+        return index
+
+    def _get_quantizer_type(self):
+        """
+        Возвращает тип скалярного квантования из настроек
+
+        Returns:
+            int or None: Константа faiss.ScalarQuantizer или None без квантования
+        """
+        name = self.config_manager.get_setting("settings", "faiss_quantization", "QT_8bit")
+        if not name or name == "none":
+            return None
+        qtype = getattr(faiss.ScalarQuantizer, name, None)
+        if qtype is None:
+            print(f"⚠️ Неизвестный тип квантования '{name}', векторы хранятся без квантования")
+        return qtype
+
+    def _apply_search_params(self, index):
+        """
+        Применяет параметры поиска из настроек к индексу FAISS
+
+        Args:
+            index (faiss.Index): Индекс FAISS
+        """
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = int(self.config_manager.get_setting("settings", "faiss_ef_search", 64))
+            return
+
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            return
+        ivf.nprobe = int(self.config_manager.get_setting("settings", "faiss_nprobe", 16))
+
+    def _wrap_index(self, index, documents):
+        """
+        Оборачивает индекс FAISS в векторное хранилище LangChain
+
+        Args:
+            index (faiss.Index): Индекс с нормализованными векторами
+            documents (list): Документы в порядке добавления в индекс
+
+        Returns:
+            FAISS: Векторное хранилище
+        """
+        docstore = InMemoryDocstore({str(i): doc for i, doc in enumerate(documents)})
+        index_to_docstore_id = {i: str(i) for i in range(len(documents))}
+        return FAISS(
+            self.embeddings,
+            index,
+            docstore,
+            index_to_docstore_id,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+
+    def _save_documents(self, documents, index_path):
+        """
+        Сохраняет документы индекса в формате JSONL
+
+        При наличии zstandard файл сжимается (уровень 3), иначе сохраняется
+        без сжатия.
+
+        Args:
+            documents (list): Документы в порядке добавления в индекс
+            index_path (str): Директория индекса
+        """
+        zst_path = os.path.join(index_path, DOCUMENTS_ZST_FILE)
+        plain_path = os.path.join(index_path, DOCUMENTS_FILE)
+
+        if ZSTD_AVAILABLE:
+            cctx = zstd.ZstdCompressor(level=3)
+            with open(zst_path, 'wb') as fh, cctx.stream_writer(fh) as writer:
+                for doc in documents:
+                    writer.write((json.dumps({"text": doc.page_content, "meta": doc.metadata}, ensure_ascii=False) + "\n").encode("utf-8"))
+            stale_path = plain_path
+        else:
+            with open(plain_path, 'w', encoding='utf-8') as f:
+                for doc in documents:
+                    f.write(json.dumps({"text": doc.page_content, "meta": doc.metadata}, ensure_ascii=False) + "\n")
+            stale_path = zst_path
+
+        # Удаляем файл документов в другом формате от предыдущей сборки
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    def _load_documents(self, index_path):
+        """
+        Загружает документы индекса из файла JSONL (сжатого или обычного)
+
+        Args:
+            index_path (str): Директория индекса
+
+        Returns:
+            list or None: Документы в порядке добавления в индекс или None, если файла нет
+        """
+        zst_path = os.path.join(index_path, DOCUMENTS_ZST_FILE)
+        plain_path = os.path.join(index_path, DOCUMENTS_FILE)
+
+        documents = []
+        if os.path.exists(zst_path):
+            if not ZSTD_AVAILABLE:
+                raise ImportError("Для чтения сжатого индекса требуется установить пакет: pip install zstandard")
+            dctx = zstd.ZstdDecompressor()
+            with open(zst_path, 'rb') as fh, dctx.stream_reader(fh) as reader:
+                for line in io.TextIOWrapper(reader, encoding='utf-8'):
+                    record = json.loads(line)
+                    documents.append(Document(page_content=record["text"], metadata=record["meta"]))
+        elif os.path.exists(plain_path):
+            with open(plain_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    documents.append(Document(page_content=record["text"], metadata=record["meta"]))
+        else:
+            return None
+        return documents
+
     def create_index(self, documents, index_name="cybersec_index"):
         """
         Создает векторный индекс FAISS из документов
@@ -70,30 +541,62 @@ class VectorSearchManager:
             # Замеряем время создания индекса
             start_time = time.time()
 
-            # Создаем индекс FAISS
-            db = FAISS.from_documents(documents, self.embeddings)
+            # Вычисляем нормализованные эмбеддинги
+            xb = self._embed_documents([doc.page_content for doc in documents])
 
-            # Сохраняем индекс
+            # Создаем индекс FAISS по скалярному произведению (косинусное сходство)
+            index = self._build_index(xb)
+            db = self._wrap_index(index, documents)
+
+            # Сохраняем индекс нативным сериализатором FAISS, документы - в JSONL
             index_path = os.path.join(INDICES_DIR, index_name)
             os.makedirs(index_path, exist_ok=True)
-            db.save_local(index_path)
-
-            # Сохраняем документы отдельно для удобства
-            docs_path = os.path.join(index_path, "documents.pkl")
-            with open(docs_path, 'wb') as f:
-                pickle.dump(documents, f)
+            faiss.write_index(index, os.path.join(index_path, INDEX_FILE))
+            self._save_documents(documents, index_path)
+
+            # Для небольших корпусов дополнительно храним плотную матрицу векторов
+            vectors_path = os.path.join(index_path, VECTORS_FILE)
+            if len(documents) < SMALL_CORPUS_MAX:
+                np.save(vectors_path, np.ascontiguousarray(xb, dtype=np.float16))
+                # Работаем с отображением файла, чтобы страницы разделялись между процессами
+                vector_table = np.load(vectors_path, mmap_mode="r")
+            else:
+                vector_table = None
+                if os.path.exists(vectors_path):
+                    os.remove(vectors_path)
 
             elapsed_time = time.time() - start_time
             print(f"✅ Индекс '{index_name}' успешно создан за {elapsed_time:.2f} секунд.")
 
             # Сохраняем индекс в состояние
             STATE.vector_db = db
+            STATE.vector_documents = documents
+            STATE.vector_table = vector_table
 
             return db
         except Exception as e:
             print(f"❌ Ошибка при создании индекса: {str(e)}")
             return None
 
+    def _read_index(self, path):
+        """
+        Читает индекс FAISS, отображая его в память
+
+        Векторы подгружаются ОС по требованию, а страницы файла разделяются
+        между процессами. Если тип индекса не поддерживает отображение,
+        индекс читается целиком.
+
+        Args:
+            path (str): Путь к файлу индекса
+
+        Returns:
+            faiss.Index: Загруженный индекс
+        """
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            return faiss.read_index(path)
+
     def load_index(self, index_name="cybersec_index"):
         """
         Загружает векторный индекс
@@ -109,7 +612,7 @@ class VectorSearchManager:
             return None
 
         index_path = os.path.join(INDICES_DIR, index_name)
-        if not os.path.exists(index_path) or not os.path.exists(os.path.join(index_path, "index.faiss")):
+        if not os.path.exists(index_path) or not os.path.exists(os.path.join(index_path, INDEX_FILE)):
             print(f"❌ Индекс '{index_name}' не найден.")
             return None
 
@@ -117,20 +620,144 @@ class VectorSearchManager:
             print(f"🔄 Загружаем индекс '{index_name}'...")
             start_time = time.time()
 
-            # Загружаем индекс
-            db = FAISS.load_local(index_path, self.embeddings, allow_dangerous_deserialization=True)
+            documents = self._load_documents(index_path)
+            if documents is not None:
+                # Загружаем индекс и документы без pickle
+                index = self._read_index(os.path.join(index_path, INDEX_FILE))
+                db = self._wrap_index(index, documents)
+
+                vectors_path = os.path.join(index_path, VECTORS_FILE)
+                vector_table = np.load(vectors_path, mmap_mode="r") if os.path.exists(vectors_path) else None
+            else:
+                # Индекс в старом формате LangChain (index.pkl)
+                db = FAISS.load_local(
+                    index_path,
+                    self.embeddings,
+                    distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+                    allow_dangerous_deserialization=True
+                )
+                documents = [db.docstore.search(db.index_to_docstore_id[i]) for i in range(len(db.index_to_docstore_id))]
+                vector_table = None
+
+            if db.index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                print(f"⚠️ Индекс '{index_name}' построен по L2-расстоянию (расстояния пересчитываются в сходство). Рекомендуется пересоздать индекс.")
+            self._apply_search_params(db.index)
 
             elapsed_time = time.time() - start_time
             print(f"✅ Индекс '{index_name}' успешно загружен за {elapsed_time:.2f} секунд.")
 
             # Сохраняем индекс в состояние
             STATE.vector_db = db
+            STATE.vector_documents = documents
+            STATE.vector_table = vector_table
 
             return db
         except Exception as e:
             print(f"❌ Ошибка при загрузке индекса: {str(e)}")
             return None
 
+    def search_vectors(self, query, k=3):
+        """
+        Выполняет векторный поиск без кэширования и вывода сообщений
+
+        Args:
+            query (str): Поисковый запрос
+            k (int): Количество результатов
+
+        Returns:
+            list: Список кортежей (документ, косинусное сходство)
+        """
+        documents = STATE.vector_documents
+        return [(documents[i], score) for i, score in self.search_vector_ids(query, k)]
+
+    def search_vector_ids(self, query, k=3):
+        """
+        Выполняет векторный поиск и возвращает номера документов корпуса
+
+        Args:
+            query (str): Поисковый запрос
+            k (int): Количество результатов
+
+        Returns:
+            list: Список кортежей (номер документа в STATE.vector_documents, косинусное сходство)
+        """
+        vec = self._embed_query(query)
+
+        # Небольшой корпус: прямой перебор плотной матрицы без FAISS
+        if STATE.vector_table is not None:
+            return self._search_vector_table(vec, k)
+
+        # Обращаемся к индексу FAISS напрямую, минуя обертку LangChain
+        D, I = STATE.vector_db.index.search(vec, k)
+        D = _faiss_similarities(STATE.vector_db.index, D)
+
+        return [(int(i), float(d)) for d, i in zip(D[0], I[0]) if i >= 0]
+
+    def _search_vector_table(self, vec, k):
+        """
+        Ищет ближайшие документы перебором матрицы векторов float16
+
+        Args:
+            vec (np.ndarray): Нормализованный вектор запроса формы (1, d)
+            k (int): Количество результатов
+
+        Returns:
+            list: Список кортежей (номер документа, косинусное сходство)
+        """
+        table = STATE.vector_table
+
+        if not SIMSIMD_AVAILABLE:
+            # Отбираем k ближайших по L2 с отсечением, затем считаем точный косинус:
+            # после округления до float16 нормы строк немного отличаются от 1
+            top, _ = _l2_early(vec[0], table, k)
+            sims = _cos_batch(table[top], vec[0])
+            return [(int(i), float(sim)) for i, sim in zip(top, sims)]
+
+        # Ядра SimSIMD (AVX-512 FP16 / NEON) возвращают косинусное расстояние
+        sims = 1.0 - np.asarray(simsimd.cdist(vec.astype(np.float16), table, metric="cosine"))[0]
+
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+
+        return [(int(i), float(sims[i])) for i in top]
+
+    def batch_search(self, queries, k=3):
+        """
+        Выполняет векторный поиск сразу по нескольким запросам
+
+        Все запросы векторизуются одним вызовом и передаются в FAISS одной
+        матрицей, что позволяет FAISS использовать BLAS для расчета сходства.
+
+        Args:
+            queries (list): Список поисковых запросов
+            k (int): Количество результатов на запрос
+
+        Returns:
+            list: Для каждого запроса список кортежей (документ, косинусное сходство)
+        """
+        if STATE.vector_db is None:
+            print("❌ Векторный индекс не загружен. Сначала загрузите или создайте индекс.")
+            return []
+
+        if not queries:
+            return []
+
+        try:
+            Q = np.asarray(self.embeddings.embed_documents(list(queries)), dtype=np.float32)
+            faiss.normalize_L2(Q)
+            D, I = STATE.vector_db.index.search(Q, k)
+            D = _faiss_similarities(STATE.vector_db.index, D)
+
+            documents = STATE.vector_documents
+            return [
+                [(documents[i], float(d)) for d, i in zip(row_d, row_i) if i >= 0]
+                for row_d, row_i in zip(D, I)
+            ]
+        except Exception as e:
+            print(f"❌ Ошибка при выполнении пакетного запроса: {str(e)}")
+            return []
+
     def search_documents_with_score(self, query, k=3, use_cache=True):
         """
         Выполняет поиск документов по запросу и возвращает список кортежей (документ, оценка).
@@ -159,7 +786,7 @@ class VectorSearchManager:
             start_time = time.time()
 
             # Выполняем поиск с оценкой сходства
-            results_with_scores = STATE.vector_db.similarity_search_with_score(query, k=k)
+            results_with_scores = self.search_vectors(query, k)
 
             # Измеряем время выполнения
             execution_time = time.time() - start_time
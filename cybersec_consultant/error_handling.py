@@ -3,20 +3,34 @@
 Модуль для централизованной обработки ошибок в консультанте по кибербезопасности.
 """
 
+import atexit
 import logging
-import traceback
+import logging.handlers
+import queue
 import time
 from typing import Dict, Any, Callable, Optional, TypeVar, Union
 from functools import wraps
 
-# Настройка логгера
+# Настройка логгера: запись в консоль и файл выполняется фоновым потоком,
+# а вызовы логгера только помещают записи в очередь
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.StreamHandler(),
+    logging.FileHandler('cybersec_consultant.log')
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# Итоговое форматирование выполняют обработчики слушателя
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('cybersec_consultant.log')
-    ]
+    format='%(message)s',
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 
 logger = logging.getLogger('cybersec_consultant')
@@ -70,12 +84,19 @@ def retry(max_retries: int = 3, initial_delay: float = 1.0,
         allowed_exceptions: Типы исключений, при которых будут выполняться повторные попытки
     """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        # Разрешаем ссылки один раз при применении декоратора, а не на каждый вызов
+        func_name = func.__name__
+        total_attempts = max_retries + 1
+        log_warning = logger.warning
+        log_error = logger.error
+        sleep = time.sleep
+
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
             delay = initial_delay
             last_exception = None
             
-            for attempt in range(max_retries + 1):
+            for attempt in range(total_attempts):
                 try:
                     return func(*args, **kwargs)
                 except allowed_exceptions as e:
@@ -83,18 +104,18 @@ def retry(max_retries: int = 3, initial_delay: float = 1.0,
                     
                     if attempt < max_retries:
                         # Логируем попытку
-                        logger.warning(
-                            f"Attempt {attempt + 1}/{max_retries + 1} for {func.__name__} failed: {str(e)}. "
-                            f"Retrying in {delay:.2f} seconds..."
+                        log_warning(
+                            "Attempt %d/%d for %s failed: %s. Retrying in %.2f seconds...",
+                            attempt + 1, total_attempts, func_name, e, delay
                         )
-                        time.sleep(delay)
+                        sleep(delay)
                         # Увеличиваем задержку для следующей попытки
                         delay *= backoff_factor
                     else:
                         # Последняя попытка не удалась
-                        logger.error(
-                            f"All {max_retries + 1} attempts for {func.__name__} failed. "
-                            f"Last error: {str(last_exception)}"
+                        log_error(
+                            "All %d attempts for %s failed. Last error: %s",
+                            total_attempts, func_name, last_exception
                         )
                         raise
             
@@ -116,17 +137,28 @@ def safe_execute(default_return: Optional[Any] = None,
         log_exception: Флаг, указывающий нужно ли логировать исключение
     """
     def decorator(func: Callable) -> Callable:
+        if not log_exception:
+            # Без логирования обходимся минимальной оберткой
+            @wraps(func)
+            def silent_wrapper(*args, **kwargs):
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    return default_return
+            
+            return silent_wrapper
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
-                if log_exception:
-                    logger.error(
-                        f"Error in {func.__name__}: {str(e)}\n"
-                        f"Args: {args}, Kwargs: {kwargs}\n"
-                        f"Traceback: {traceback.format_exc()}"
-                    )
+                # Сообщение и трассировка форматируются только если запись будет выведена
+                logger.error(
+                    "Error in %s: %s\nArgs: %s, Kwargs: %s",
+                    func.__name__, e, args, kwargs,
+                    exc_info=True
+                )
                 return default_return
         
         return wrapper
@@ -142,13 +174,16 @@ def handle_api_errors(api_name: str) -> Callable:
         api_name: Название API для включения в сообщение об ошибке
     """
     def decorator(func: Callable) -> Callable:
+        # Префикс сообщения вычисляется один раз при применении декоратора
+        error_prefix = f"Ошибка при обращении к {api_name}: "
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
                 # Определяем тип ошибки и преобразуем её
-                error_msg = f"Ошибка при обращении к {api_name}: {str(e)}"
+                error_msg = error_prefix + str(e)
                 
                 # Извлекаем дополнительную информацию, если возможно
                 status_code = getattr(e, 'status_code', None) 
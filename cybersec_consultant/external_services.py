@@ -5,23 +5,629 @@ MITRE ATT&CK, CVE базы данных и другие ресурсы
 """
 
 import os
+import re
 import time
 import json
+import mmap
+import socket
+import sqlite3
+import functools
 import hashlib
 import logging
+import ssl
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple, Union
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterator
 import concurrent.futures
-from tqdm.auto import tqdm
 
-from cybersec_consultant.config import ConfigManager, DATA_DIR
+# Необязательный HTTP-кэш с поддержкой ETag/Cache-Control
+try:
+    import requests_cache
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
+
+# Необязательный потоковый парсер JSON для больших наборов данных
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Необязательный быстрый сериализатор JSON
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Необязательное сжатие файлов кэша
+try:
+    import zstandard as zstd
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Необязательный бинарный формат для кэша MITRE ATT&CK
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+# Необязательная быстрая некриптографическая хэш-функция для имен файлов кэша
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Необязательный движок регулярных выражений без возвратов (DFA)
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+from cybersec_consultant.config import get_config_manager, DATA_DIR
 from cybersec_consultant.state_management import STATE
-from cybersec_consultant.error_handling import handle_api_errors, retry
+from cybersec_consultant.error_handling import handle_api_errors
+from cybersec_consultant.cache_manager import TimedCache, CacheBackend
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Таймауты HTTP-запросов: (подключение, чтение) в секундах
+HTTP_TIMEOUT = (5, 30)
+
+# Повторы запросов при ограничении частоты и сбоях шлюза
+HTTP_RETRY_STATUSES = (429, 502, 503, 504)
+
+# Пауза (в секундах) после ответа 429, если сервис не прислал Retry-After
+RATE_LIMIT_BACKOFF = 60
+
+# Файл HTTP-кэша (используется при наличии requests-cache)
+HTTP_CACHE_FILE = "http_cache.sqlite"
+
+# Версия формата объединенного кэша MITRE ATT&CK
+MITRE_CACHE_VERSION = 2
+
+# TAXII 2.1 сервер MITRE ATT&CK и коллекция Enterprise ATT&CK
+MITRE_TAXII_URL = "https://attack-taxii.mitre.org/api/v21"
+MITRE_ENTERPRISE_COLLECTION = "x-mitre-collection--1f5f1533-f617-4ca8-9ab4-6a02367fa019"
+TAXII_MEDIA_TYPE = "application/taxii+json;version=2.1"
+
+# Максимальный размер страницы NVD API 2.0 и число параллельных запросов
+# (публичный лимит NVD - 5 запросов за 30 секунд)
+NVD_PAGE_SIZE = 2000
+NVD_MAX_WORKERS = 5
+
+# Страница уязвимости на сайте NVD (к базе дописывается идентификатор CVE)
+_NVD_DETAIL_URL = "https://nvd.nist.gov/vuln/detail/"
+
+# Шаблон запроса геолокации IP-адреса
+_IPAPI_URL_TEMPLATE = "https://ipapi.co/{}/json/"
+
+# Время жизни (в секундах) результатов обогащения IP/доменов/хэшей в памяти
+OSINT_ENRICHMENT_TTL = 300
+
+# Таймаут подключения и TLS-рукопожатия при проверке сертификата (секунды)
+SSL_CHECK_TIMEOUT = 5
+
+# Пул для фоновой записи кэшей, чтобы не задерживать ответ; общий для всех
+# экземпляров сервисов, потоки создаются по мере надобности
+_CACHE_WRITE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="cache-write"
+)
+
+# TLS-контекст для проверки сертификатов создается один раз
+_SSL_CTX = ssl.create_default_context()
+
+# Запрос-идентификатор MITRE ATT&CK (T1234, G0001, S0001)
+_ID_RE = re.compile(r"^[tgs]\d+$", re.IGNORECASE)
+
+# Слова запроса для полнотекстового поиска
+_FTS_TOKEN_RE = re.compile(r"\w+")
+
+# Символы, недопустимые в имени файла кэша CVE
+_CVE_UNSAFE_RE = re.compile(r"[^A-Z0-9-]")
+
+# Идентификаторы CVE в запросе (CVE-2021-44228 или CVE:2021-44228)
+_CVE_ID_RE = re.compile(r"\bCVE[-:]\d{4}-\d{4,}\b")
+
+# Метрики CVSS в ответе NVD в порядке предпочтения (v3.1 -> v3.0 -> v2)
+_CVSS_VERSIONS = ("cvssMetricV31", "cvssMetricV30", "cvssMetricV2")
+
+# Шаблоны индикаторов угроз (IPv4-адрес и доменное имя)
+_IPV4_PATTERN = r"(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)"
+_DOMAIN_PATTERN = r"(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}"
+
+_IP_RE = re.compile(_IPV4_PATTERN)
+_DOMAIN_RE = re.compile(_DOMAIN_PATTERN)
+
+# Проверка типа адреса по порядку: первое совпадение определяет тип
+_QUERY_TYPE_PATTERNS = (
+    ("ip", _IP_RE),
+    ("domain", _DOMAIN_RE),
+)
+
+# Хэши различаются только длиной, поэтому состав символов
+# проверяется лишь для строк подходящей длины
+_HEX_DIGITS = b"0123456789abcdefABCDEF"
+_HASH_TYPES_BY_LENGTH = MappingProxyType({
+    32: "hash_md5",
+    40: "hash_sha1",
+    64: "hash_sha256",
+})
+
+# Типы индикаторов угроз в тексте (в порядке вывода)
+_TEXT_INDICATOR_TYPES = ("ips", "domains", "md5", "sha1", "sha256", "urls")
+
+# Индикаторы, которые могут входить в доменное имя отдельной меткой
+# (1.2.3.4.example.com, <md5>.example.com); метка домена короче SHA-256
+_DOMAIN_PART_PATTERNS = (
+    ("ips", re.compile(rf"\b{_IPV4_PATTERN}\b")),
+    ("md5", re.compile(r"\b[a-fA-F0-9]{32}\b")),
+    ("sha1", re.compile(r"\b[a-fA-F0-9]{40}\b")),
+)
+
+# Все индикаторы угроз ищутся за один проход; тип определяется по имени
+# сработавшей группы. При наличии re2 поиск выполняется за линейное время.
+# Хост URL задается явным классом символов, а не \w: в re2 \w и \b понимают
+# только ASCII, и URL с кириллическим доменом терялся бы. Домены проверяются
+# раньше IP-адресов и хэшей, чтобы имя вида 10.0.0.1.example.com не разбивалось
+# на IP-адрес и домен example.com; индикаторы внутри имени добавляются отдельно.
+_TEXT_INDICATORS_RE = (re2 if RE2_AVAILABLE else re).compile(
+    r"(?P<urls>https?://[^\s/?#:@,;<>()\[\]{}\"'«»]+)"
+    rf"|(?P<domains>\b{_DOMAIN_PATTERN}\b)"
+    rf"|(?P<ips>\b{_IPV4_PATTERN}\b)"
+    r"|(?P<sha256>\b[a-fA-F0-9]{64}\b)"
+    r"|(?P<sha1>\b[a-fA-F0-9]{40}\b)"
+    r"|(?P<md5>\b[a-fA-F0-9]{32}\b)"
+)
+
+
+def _create_session(cache_dir: Optional[str] = None, cache_ttl: Optional[int] = None) -> requests.Session:
+    """
+    Создает HTTP-сессию с keep-alive и пулом соединений
+
+    Если установлен requests-cache и указана директория кэша, ответы
+    сохраняются в SQLite и в пределах cache_ttl возвращаются без запроса.
+    Такая сессия подходит только для точечных запросов; принудительные
+    обновления кэшей и потоковые загрузки выполняются сессией без кэша.
+
+    Args:
+        cache_dir: Директория для HTTP-кэша
+        cache_ttl: Время жизни HTTP-кэша в часах
+
+    Returns:
+        requests.Session: Сессия для запросов к внешним сервисам
+    """
+    if REQUESTS_CACHE_AVAILABLE and cache_dir:
+        session = requests_cache.CachedSession(
+            os.path.join(cache_dir, HTTP_CACHE_FILE),
+            backend="sqlite",
+            expire_after=cache_ttl * 3600 if cache_ttl else -1,
+            cache_control=True
+        )
+    else:
+        session = requests.Session()
+    # Ошибки соединения, таймауты и ответы 429/5xx повторяются с экспоненциальной
+    # паузой и учетом Retry-After; после исчерпания попыток возвращается последний
+    # ответ. Это единственный уровень повторов: методы сервисов сами не повторяют запросы
+    retries = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": "cybersec-consultant/1.0",
+        "Accept-Encoding": "gzip"
+    })
+    return session
+
+
+# Перевод названий базовых тактик MITRE ATT&CK на русский
+_TACTIC_TRANSLATIONS_RU = MappingProxyType({
+    "Reconnaissance": "Разведка",
+    "Resource Development": "Разработка ресурсов",
+    "Initial Access": "Первоначальный доступ",
+    "Execution": "Выполнение",
+    "Persistence": "Закрепление",
+    "Privilege Escalation": "Повышение привилегий",
+    "Defense Evasion": "Обход защиты",
+    "Credential Access": "Доступ к учетным данным",
+    "Discovery": "Исследование",
+    "Lateral Movement": "Горизонтальное перемещение",
+    "Collection": "Сбор данных",
+    "Command and Control": "Управление и контроль",
+    "Exfiltration": "Эксфильтрация",
+    "Impact": "Воздействие",
+})
+
+
+def _parse_tactic(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Преобразует STIX-объект x-mitre-tactic в запись кэша"""
+    name = obj.get("name", "")
+    return {
+        "id": obj["id"],
+        "name": name,
+        "name_ru": _TACTIC_TRANSLATIONS_RU.get(name),
+        # Короткое имя тактики используется в kill_chain_phases техник
+        "shortname": obj.get("x_mitre_shortname", ""),
+        "description": obj.get("description", ""),
+        "external_references": obj.get("external_references", [])
+    }
+
+
+def _parse_technique(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Преобразует STIX-объект attack-pattern в запись кэша"""
+    # Извлекаем связанные тактики
+    tactics_ids = [
+        phase.get("phase_name")
+        for phase in obj.get("kill_chain_phases", [])
+        if phase.get("kill_chain_name") == "mitre-attack"
+    ]
+    
+    return {
+        "id": obj["id"],
+        "name": obj.get("name", ""),
+        "description": obj.get("description", ""),
+        "external_references": obj.get("external_references", []),
+        "tactics": tactics_ids,
+        "detection": obj.get("x_mitre_detection", ""),
+        "platforms": obj.get("x_mitre_platforms", [])
+    }
+
+
+def _parse_group(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Преобразует STIX-объект intrusion-set в запись кэша"""
+    return {
+        "id": obj["id"],
+        "name": obj.get("name", ""),
+        "description": obj.get("description", ""),
+        "external_references": obj.get("external_references", []),
+        "aliases": obj.get("aliases", []),
+        "first_seen": obj.get("first_seen", ""),
+        "last_seen": obj.get("last_seen", "")
+    }
+
+
+def _parse_software(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Преобразует STIX-объект malware или tool в запись кэша"""
+    return {
+        "id": obj["id"],
+        "name": obj.get("name", ""),
+        "type": obj.get("type"),
+        "description": obj.get("description", ""),
+        "external_references": obj.get("external_references", []),
+        "platforms": obj.get("x_mitre_platforms", []),
+        "aliases": obj.get("aliases", [])
+    }
+
+
+# Тип STIX-объекта -> (категория кэша, функция разбора)
+_MITRE_PARSERS = MappingProxyType({
+    "x-mitre-tactic": ("tactics", _parse_tactic),
+    "attack-pattern": ("techniques", _parse_technique),
+    "intrusion-set": ("groups", _parse_group),
+    "malware": ("software", _parse_software),
+    "tool": ("software", _parse_software),
+})
+
+
+# Категория кэша -> (типы STIX-объектов для фильтра TAXII, функция разбора)
+_MITRE_TAXII_QUERIES = MappingProxyType({
+    "tactics": ("x-mitre-tactic", _parse_tactic),
+    "techniques": ("attack-pattern", _parse_technique),
+    "groups": ("intrusion-set", _parse_group),
+    "software": ("malware,tool", _parse_software),
+})
+
+
+@functools.lru_cache(maxsize=256)
+def _normalize_query(query: str) -> str:
+    """Приводит поисковый запрос к нижнему регистру без пробелов по краям"""
+    return query.lower().strip()
+
+
+# Ответы DNS в памяти; ограниченный срок жизни, чтобы не держать устаревшие адреса
+_DNS_CACHE = TimedCache(maxsize=2048, ttl=OSINT_ENRICHMENT_TTL)
+
+
+def _resolve(domain: str) -> str:
+    """
+    Определяет IPv4-адрес домена, повторные запросы в течение
+    OSINT_ENRICHMENT_TTL секунд не идут в DNS
+
+    Args:
+        domain: Домен
+
+    Returns:
+        str: IPv4-адрес
+    """
+    address = _DNS_CACHE.get(domain)
+    if address is None:
+        address = socket.getaddrinfo(domain, None, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+        _DNS_CACHE[domain] = address
+    return address
+
+
+def _retry_after_deadline(response: requests.Response) -> float:
+    """
+    Вычисляет момент, до которого сервис просит не присылать запросы
+
+    Args:
+        response: Ответ со статусом 429
+
+    Returns:
+        float: Время (timestamp), до которого запросы не отправляются
+    """
+    retry_after = response.headers.get("Retry-After", "")
+    delay = int(retry_after) if retry_after.isdigit() else RATE_LIMIT_BACKOFF
+    return time.time() + delay
+
+
+def _is_hex(value: str) -> bool:
+    """
+    Проверяет, что строка состоит только из шестнадцатеричных цифр
+
+    Вместо регулярного выражения из байтов строки удаляются hex-цифры
+    (bytes.translate); строка шестнадцатеричная, если ничего не осталось.
+
+    Args:
+        value: Проверяемая строка
+
+    Returns:
+        bool: True, если все символы - шестнадцатеричные цифры
+    """
+    return value.isascii() and not value.encode("ascii").translate(None, _HEX_DIGITS)
+
+
+def _load_json(data: bytes) -> Any:
+    """
+    Разбирает JSON из байтов кэш-файла или тела HTTP-ответа
+
+    В отличие от response.json(), тело не декодируется в str заранее.
+
+    Args:
+        data: JSON в кодировке UTF-8
+
+    Returns:
+        Any: Разобранный объект
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_json(obj: Any) -> bytes:
+    """
+    Сериализует объект в JSON (UTF-8) для записи в кэш
+
+    Кэш читается только программно, поэтому JSON пишется без отступов.
+
+    Args:
+        obj: Объект для сериализации
+
+    Returns:
+        bytes: JSON в кодировке UTF-8
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
+
+def _compress(data: bytes) -> bytes:
+    """
+    Сжимает данные кэша zstd (без zstandard возвращает их как есть)
+
+    Args:
+        data: Исходные данные
+
+    Returns:
+        bytes: Сжатые данные
+    """
+    if ZSTD_AVAILABLE:
+        return zstd.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def _decompress(data: bytes) -> bytes:
+    """
+    Распаковывает данные кэша, сжатые _compress
+
+    Args:
+        data: Сжатые данные (bytes или memoryview)
+
+    Returns:
+        bytes: Исходные данные
+    """
+    if ZSTD_AVAILABLE:
+        return zstd.ZstdDecompressor().decompress(data)
+    return data
+
+
+# Суффикс имен сжимаемых файлов кэша
+_CACHE_SUFFIX = ".zst" if ZSTD_AVAILABLE else ""
+
+
+def _cache_key_digest(key: str) -> str:
+    """
+    Вычисляет короткий хэш ключа для имени файла кэша
+
+    Криптографическая стойкость здесь не нужна, поэтому вместо MD5
+    используется xxh3 (при наличии xxhash) или BLAKE2b.
+
+    Args:
+        key: Ключ кэша
+
+    Returns:
+        str: Шестнадцатеричный хэш ключа
+    """
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128_hexdigest(key)
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _extract_cvss(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Извлекает данные CVSS самой новой доступной версии
+
+    Args:
+        metrics: Поле metrics записи CVE из ответа NVD
+
+    Returns:
+        Dict[str, Any]: Поле cvssData (пустой словарь, если метрик нет)
+    """
+    for version in _CVSS_VERSIONS:
+        entries = metrics.get(version)
+        if entries and entries[0]:
+            return entries[0].get("cvssData") or {}
+    return {}
+
+
+def _extract_description(descriptions: List[Dict[str, Any]]) -> str:
+    """
+    Извлекает описание CVE, предпочитая русский язык английскому
+
+    Args:
+        descriptions: Поле descriptions записи CVE из ответа NVD
+
+    Returns:
+        str: Описание уязвимости
+    """
+    description_en = None
+    description_ru = None
+    
+    for desc in descriptions:
+        lang = desc.get("lang")
+        if lang == "en":
+            description_en = desc.get("value", "")
+        elif lang == "ru":
+            description_ru = desc.get("value", "")
+            
+    return description_ru or description_en or "Нет описания"
+
+
+def _log_write_error(future: concurrent.futures.Future):
+    """
+    Логирует ошибку фоновой записи кэша
+
+    Args:
+        future: Завершившаяся задача записи
+    """
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Error writing cache file: {str(error)}")
+
+
+def _is_cache_fresh(cache_file: str, ttl_hours: float) -> bool:
+    """
+    Проверяет, что файл кэша существует и моложе TTL
+
+    Существование и время изменения проверяются одним вызовом stat.
+
+    Args:
+        cache_file: Путь к файлу кэша
+        ttl_hours: Время жизни кэша в часах
+
+    Returns:
+        bool: True, если кэш актуален
+    """
+    try:
+        mtime = os.stat(cache_file).st_mtime
+    except OSError:
+        return False
+    return mtime > time.time() - ttl_hours * 3600
+
+
+def _read_cache(cache_file: str, ttl_hours: float) -> Optional[bytes]:
+    """
+    Читает файл кэша, если он существует и моложе TTL
+
+    Файл открывается один раз: время изменения берется из fstat уже
+    открытого дескриптора, содержимое читается одним read без буферизации.
+
+    Args:
+        cache_file: Путь к файлу кэша
+        ttl_hours: Время жизни кэша в часах
+
+    Returns:
+        Optional[bytes]: Содержимое файла или None, если кэш отсутствует или устарел
+    """
+    try:
+        fd = os.open(cache_file, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        st = os.fstat(fd)
+        if st.st_mtime <= time.time() - ttl_hours * 3600:
+            return None
+        chunks = []
+        remaining = st.st_size
+        while remaining > 0:
+            chunk = os.read(fd, remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: str, data: bytes):
+    """
+    Атомарно записывает байты в файл
+
+    Данные пишутся во временный файл, сбрасываются на диск и подменяют
+    целевой файл, поэтому прерванная запись не оставляет поврежденный кэш.
+
+    Args:
+        path: Путь к файлу
+        data: Данные для записи
+    """
+    # Временный файл уникален для потока: одну запись могут делать параллельно
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _open_cache_backend(db_path: str) -> Optional[CacheBackend]:
+    """
+    Открывает кэш SQLite, при ошибке возвращает None
+
+    Args:
+        db_path: Путь к файлу базы SQLite
+
+    Returns:
+        Optional[CacheBackend]: Кэш или None (тогда используются файлы)
+    """
+    try:
+        return CacheBackend(db_path)
+    except sqlite3.Error as e:
+        logger.error(f"Error opening cache database {db_path}: {str(e)}")
+        return None
+
+
 class ExternalServicesManager:
     """
     Класс для интеграции с внешними сервисами и базами данных по кибербезопасности
@@ -29,7 +635,7 @@ class ExternalServicesManager:
     
     def __init__(self):
         """Инициализация менеджера внешних сервисов"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         
         # Директория для кэширования данных от внешних сервисов
         self.cache_dir = os.path.join(DATA_DIR, "external_services_cache")
@@ -40,10 +646,15 @@ class ExternalServicesManager:
             "external_services", "cache_ttl_hours", 24
         )  # Время жизни кэша в часах
         
+        # Кэш CVE и OSINT в SQLite вместо отдельных JSON-файлов
+        use_sqlite_cache = self.config_manager.get_setting(
+            "external_services", "sqlite_cache", True
+        )
+        
         # Инициализация сервисов
         self.mitre_service = MitreAttackService(self.cache_dir, self.cache_ttl)
-        self.cve_service = CVEService(self.cache_dir, self.cache_ttl)
-        self.osint_service = OSINTService(self.cache_dir, self.cache_ttl)
+        self.cve_service = CVEService(self.cache_dir, self.cache_ttl, use_sqlite_cache)
+        self.osint_service = OSINTService(self.cache_dir, self.cache_ttl, use_sqlite_cache)
 
     def refresh_all_caches(self):
         """
@@ -54,41 +665,36 @@ class ExternalServicesManager:
         """
         results = {}
         
-        # Обновляем кэши каждого сервиса
+        # Обновляем кэши всех сервисов параллельно: каждое обновление
+        # упирается в сетевой ввод-вывод, поэтому потоков достаточно
         print("🔄 Обновление кэша внешних сервисов...")
         
-        # MITRE ATT&CK
-        print("🔄 Обновление MITRE ATT&CK...")
-        try:
-            success = self.mitre_service.refresh_cache()
-            results["mitre_attack"] = success
-            status = "✅ Успешно" if success else "❌ Ошибка"
-            print(f"{status} обновления MITRE ATT&CK")
-        except Exception as e:
-            results["mitre_attack"] = False
-            print(f"❌ Ошибка обновления MITRE ATT&CK: {str(e)}")
-            
-        # CVE
-        print("🔄 Обновление базы CVE...")
-        try:
-            success = self.cve_service.refresh_cache()
-            results["cve"] = success
-            status = "✅ Успешно" if success else "❌ Ошибка"
-            print(f"{status} обновления базы CVE")
-        except Exception as e:
-            results["cve"] = False
-            print(f"❌ Ошибка обновления базы CVE: {str(e)}")
+        services = {
+            "mitre_attack": ("MITRE ATT&CK", self.mitre_service.refresh_cache),
+            "cve": ("базы CVE", self.cve_service.refresh_cache),
+            "osint": ("данных OSINT", self.osint_service.refresh_cache),
+        }
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(services)) as executor:
+            futures = {
+                executor.submit(refresh): (key, title)
+                for key, (title, refresh) in services.items()
+            }
             
-        # OSINT
-        print("🔄 Обновление данных OSINT...")
-        try:
-            success = self.osint_service.refresh_cache()
-            results["osint"] = success
-            status = "✅ Успешно" if success else "❌ Ошибка"
-            print(f"{status} обновления данных OSINT")
-        except Exception as e:
-            results["osint"] = False
-            print(f"❌ Ошибка обновления данных OSINT: {str(e)}")
+            # Статусы собираются и выводятся одним сообщением
+            status_lines = []
+            for future in concurrent.futures.as_completed(futures):
+                key, title = futures[future]
+                try:
+                    success = future.result()
+                    results[key] = success
+                    status = "✅ Успешно" if success else "❌ Ошибка"
+                    status_lines.append(f"{status} обновления {title}")
+                except Exception as e:
+                    results[key] = False
+                    status_lines.append(f"❌ Ошибка обновления {title}: {str(e)}")
+                    
+        print("\n".join(status_lines))
             
         return results
         
@@ -159,220 +765,425 @@ class MitreAttackService:
         self.cache_dir = cache_dir
         self.cache_ttl = cache_ttl
         
-        # Файлы кэша для различных типов данных
-        self.tactics_cache_file = os.path.join(cache_dir, "mitre_tactics.json")
-        self.techniques_cache_file = os.path.join(cache_dir, "mitre_techniques.json")
-        self.groups_cache_file = os.path.join(cache_dir, "mitre_groups.json")
-        self.software_cache_file = os.path.join(cache_dir, "mitre_software.json")
+        # Все типы данных хранятся в одном файле кэша
+        cache_name = "mitre_attack.msgpack" if MSGPACK_AVAILABLE else "mitre_attack.json"
+        self.cache_file = os.path.join(cache_dir, cache_name + _CACHE_SUFFIX)
+        
+        # ETag/Last-Modified ответов, из которых собран текущий кэш
+        self.etag_file = os.path.join(cache_dir, "mitre_attack.etag")
         
-        # STIX/TAXII API MITRE ATT&CK
+        # Полнотекстовый индекс SQLite FTS5 по названиям и описаниям
+        self.fts_db_file = os.path.join(cache_dir, "mitre.db")
+        
+        # TAXII API MITRE ATT&CK: сервер сам фильтрует объекты по типу
+        self.taxii_objects_url = (
+            f"{MITRE_TAXII_URL}/collections/{MITRE_ENTERPRISE_COLLECTION}/objects/"
+        )
+        
+        # Полные STIX-наборы (резервный источник, если TAXII недоступен)
         self.base_url = "https://raw.githubusercontent.com/mitre/cti/master"
         
-        # Проверяем и загружаем кэш при необходимости
-        self._load_cache()
+        # HTTP-сессия переиспользует TLS-соединения между запросами. HTTP-кэш
+        # не используется: условные запросы (ETag/Last-Modified) выполняются
+        # вручную, а набор STIX разбирается потоком, не читая тело целиком
+        self.session = _create_session()
+        
+        # Кэш загружается лениво, при первом обращении к данным
+        self._tactics = {}
+        self._techniques = {}
+        self._groups = {}
+        self._software = {}
+        self._build_indices()
+        self._loaded = False
+        self._load_lock = threading.RLock()
+    
+    def _ensure_loaded(self):
+        """Загружает кэш (или скачивает данные) при первом обращении"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load_cache()
+                self._loaded = True
+    
+    @property
+    def tactics(self) -> Dict[str, Any]:
+        """Тактики MITRE ATT&CK по ID"""
+        self._ensure_loaded()
+        return self._tactics
+    
+    @property
+    def techniques(self) -> Dict[str, Any]:
+        """Техники MITRE ATT&CK по ID"""
+        self._ensure_loaded()
+        return self._techniques
+    
+    @property
+    def groups(self) -> Dict[str, Any]:
+        """Группы угроз MITRE ATT&CK по ID"""
+        self._ensure_loaded()
+        return self._groups
+    
+    @property
+    def software(self) -> Dict[str, Any]:
+        """Вредоносное ПО и инструменты MITRE ATT&CK по ID"""
+        self._ensure_loaded()
+        return self._software
     
     def _load_cache(self):
         """Загружает кэшированные данные или скачивает их, если нужно"""
         # Словари для хранения данных
-        self.tactics = {}
-        self.techniques = {}
-        self.groups = {}
-        self.software = {}
-        
-        # Функция для проверки актуальности кэша
-        def is_cache_valid(cache_file):
-            if not os.path.exists(cache_file):
-                return False
-                
-            # Проверяем время создания файла
-            file_time = os.path.getmtime(cache_file)
-            current_time = time.time()
-            
-            # Сравниваем с TTL
-            return (current_time - file_time) / 3600 < self.cache_ttl
-            
-        # Функция для загрузки кэша
-        def load_cached_data(cache_file, default_value=None):
-            try:
-                if os.path.exists(cache_file):
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        return json.load(f)
-                return default_value or {}
-            except Exception as e:
-                logger.error(f"Error loading cache from {cache_file}: {str(e)}")
-                return default_value or {}
-                
-        # Загружаем или обновляем кэши по необходимости
-        cache_files = [
-            (self.tactics_cache_file, "tactics"),
-            (self.techniques_cache_file, "techniques"),
-            (self.groups_cache_file, "groups"),
-            (self.software_cache_file, "software")
-        ]
-        
-        # Проверяем актуальность кэшей
-        all_valid = True
-        for cache_file, _ in cache_files:
-            if not is_cache_valid(cache_file):
-                all_valid = False
-                break
-                
-        # Если хотя бы один кэш устарел, обновляем все
-        if not all_valid:
+        self._tactics = {}
+        self._techniques = {}
+        self._groups = {}
+        self._software = {}
+        self._build_indices()
+        
+        # Если кэш устарел или отсутствует, обновляем его
+        if not _is_cache_fresh(self.cache_file, self.cache_ttl):
             logger.info("MITRE ATT&CK cache is outdated, refreshing...")
             self.refresh_cache()
+            return
+            
+        # Загружаем данные из кэша
+        try:
+            data = self._read_cache_file()
+        except Exception as e:
+            logger.error(f"Error loading cache from {self.cache_file}: {str(e)}")
+            return
+            
+        if data.get("version") != MITRE_CACHE_VERSION:
+            logger.info("MITRE ATT&CK cache format has changed, refreshing...")
+            # Старые валидаторы относятся к кэшу в другом формате
+            if os.path.exists(self.etag_file):
+                os.remove(self.etag_file)
+            self.refresh_cache()
+            return
+            
+        self._tactics = data.get("tactics", {})
+        self._techniques = data.get("techniques", {})
+        self._groups = data.get("groups", {})
+        self._software = data.get("software", {})
+        self._build_indices()
+        if not os.path.exists(self.fts_db_file):
+            self._build_fts_index()
+        
+        logger.info(f"Loaded MITRE ATT&CK cache: {len(self._tactics)} tactics, {len(self._techniques)} techniques, {len(self._groups)} groups, {len(self._software)} software")
+    
+    def _read_cache_file(self) -> Dict[str, Any]:
+        """
+        Читает объединенный файл кэша MITRE ATT&CK
+        
+        Файл msgpack отображается в память и разбирается (или распаковывается)
+        без промежуточного копирования; без msgpack используется JSON.
+        
+        Returns:
+            Dict[str, Any]: Данные кэша
+        """
+        with open(self.cache_file, 'rb') as f:
+            if MSGPACK_AVAILABLE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        return msgpack.unpackb(_decompress(view), raw=False)
+            return _load_json(_decompress(f.read()))
+    
+    def _write_cache_file(self, data: Dict[str, Any]):
+        """
+        Атомарно записывает объединенный файл кэша MITRE ATT&CK
+        
+        Args:
+            data: Данные кэша
+        """
+        if MSGPACK_AVAILABLE:
+            payload = msgpack.packb(data, use_bin_type=True)
         else:
-            # Загружаем данные из кэша
-            self.tactics = load_cached_data(self.tactics_cache_file)
-            self.techniques = load_cached_data(self.techniques_cache_file)
-            self.groups = load_cached_data(self.groups_cache_file)
-            self.software = load_cached_data(self.software_cache_file)
+            payload = _dump_json(data)
+            
+        _atomic_write(self.cache_file, _compress(payload))
+    
+    def _load_validators(self) -> Dict[str, Dict[str, str]]:
+        """
+        Загружает сохраненные ETag/Last-Modified ответов MITRE ATT&CK
+        
+        Returns:
+            Dict[str, Dict[str, str]]: Валидаторы по ключу запроса
+        """
+        # Без кэша условный запрос бессмыслен: ответ 304 нечем заменить
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.etag_file, 'rb') as f:
+                return _load_json(f.read())
+        except (OSError, ValueError):
+            return {}
+    
+    @staticmethod
+    def _conditional_headers(validator: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Формирует заголовки условного запроса
+        
+        Args:
+            validator: Сохраненные ETag/Last-Modified
             
-            logger.info(f"Loaded MITRE ATT&CK cache: {len(self.tactics)} tactics, {len(self.techniques)} techniques, {len(self.groups)} groups, {len(self.software)} software")
+        Returns:
+            Dict[str, str]: Заголовки If-None-Match/If-Modified-Since
+        """
+        headers = {}
+        if validator:
+            if validator.get("etag"):
+                headers["If-None-Match"] = validator["etag"]
+            if validator.get("last_modified"):
+                headers["If-Modified-Since"] = validator["last_modified"]
+        return headers
     
-    @retry(max_retries=3, initial_delay=2)
-    def _fetch_mitre_data(self, data_type: str) -> Dict[str, Any]:
+    @staticmethod
+    def _response_validator(response: requests.Response) -> Dict[str, str]:
         """
-        Получает данные MITRE ATT&CK по типу
+        Извлекает ETag/Last-Modified из ответа
+        
+        Args:
+            response: HTTP-ответ
+            
+        Returns:
+            Dict[str, str]: Валидаторы ответа
+        """
+        return {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+    
+    def _fetch_mitre_data(self, data_type: str, headers: Optional[Dict[str, str]] = None) -> Optional[requests.Response]:
+        """
+        Открывает потоковый ответ с данными MITRE ATT&CK по типу
         
         Args:
             data_type: Тип данных (enterprise-attack, mobile-attack, ics-attack)
+            headers: Заголовки условного запроса
             
         Returns:
-            Dict[str, Any]: Данные MITRE ATT&CK
+            Optional[requests.Response]: Ответ с непрочитанным телом или None,
+                если данные не изменились (304)
         """
         url = f"{self.base_url}/{data_type}/{data_type}.json"
         
         logger.info(f"Fetching MITRE ATT&CK data from {url}")
-        response = requests.get(url)
+        response = self.session.get(url, headers=headers, timeout=HTTP_TIMEOUT, stream=True)
+        if response.status_code == 304:
+            response.close()
+            return None
         response.raise_for_status()
         
-        return response.json()
+        return response
     
-    def refresh_cache(self) -> bool:
+    def _iter_mitre_objects(self, response: requests.Response) -> Iterator[Dict[str, Any]]:
         """
-        Обновляет кэш данных MITRE ATT&CK
+        Перебирает STIX-объекты набора данных MITRE ATT&CK
+        
+        При наличии ijson объекты разбираются по мере загрузки, без
+        построения всего многомегабайтного документа в памяти.
         
+        Args:
+            response: Потоковый ответ с набором данных
+            
+        Yields:
+            Dict[str, Any]: STIX-объект
+        """
+        with response:
+            if IJSON_AVAILABLE:
+                # Тело может прийти сжатым gzip
+                response.raw.decode_content = True
+                yield from ijson.items(response.raw, "objects.item", use_float=True)
+            else:
+                yield from _load_json(response.content).get("objects", [])
+    
+    def _fetch_taxii_page(self, stix_types: str, next_token: Optional[str] = None,
+                          headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        Получает одну страницу объектов коллекции с TAXII-сервера
+        
+        Args:
+            stix_types: Типы STIX-объектов через запятую
+            next_token: Маркер следующей страницы из предыдущего ответа
+            headers: Заголовки условного запроса
+            
         Returns:
-            bool: Успешность обновления
+            requests.Response: Ответ с TAXII-конвертом (или 304)
         """
-        try:
-            # Получаем данные для различных платформ
-            enterprise_data = self._fetch_mitre_data("enterprise-attack")
-            # mobile_data = self._fetch_mitre_data("mobile-attack")  # Опционально
-            # ics_data = self._fetch_mitre_data("ics-attack")  # Опционально
-            
-            # Объединяем объекты из разных источников (сейчас только enterprise)
-            all_objects = enterprise_data.get("objects", [])
-            
-            # Парсим данные по типам
-            tactics = {}
-            techniques = {}
-            groups = {}
-            software = {}
-            
-            for obj in all_objects:
-                obj_type = obj.get("type")
-                obj_id = obj.get("id")
-                
-                if not obj_id:
-                    continue
-                    
-                # Преобразуем название на русский (для некоторых базовых тактик)
-                name_ru = None
-                name = obj.get("name", "")
-                
-                # Словарь для базового перевода некоторых тактик
-                translations = {
-                    "Reconnaissance": "Разведка",
-                    "Resource Development": "Разработка ресурсов",
-                    "Initial Access": "Первоначальный доступ",
-                    "Execution": "Выполнение",
-                    "Persistence": "Закрепление",
-                    "Privilege Escalation": "Повышение привилегий",
-                    "Defense Evasion": "Обход защиты",
-                    "Credential Access": "Доступ к учетным данным",
-                    "Discovery": "Исследование",
-                    "Lateral Movement": "Горизонтальное перемещение",
-                    "Collection": "Сбор данных",
-                    "Command and Control": "Управление и контроль",
-                    "Exfiltration": "Эксфильтрация",
-                    "Impact": "Воздействие",
-                }
-                
-                if name in translations:
-                    name_ru = translations[name]
-                
-                # В зависимости от типа объекта
-                if obj_type == "x-mitre-tactic":
-                    # Это тактика
-                    tactics[obj_id] = {
-                        "id": obj_id,
-                        "name": name,
-                        "name_ru": name_ru,
-                        "description": obj.get("description", ""),
-                        "external_references": obj.get("external_references", [])
-                    }
-                elif obj_type == "attack-pattern":
-                    # Это техника
-                    kill_chain_phases = obj.get("kill_chain_phases", [])
-                    tactics_ids = []
-                    
-                    # Извлекаем связанные тактики
-                    for phase in kill_chain_phases:
-                        if phase.get("kill_chain_name") == "mitre-attack":
-                            tactics_ids.append(phase.get("phase_name"))
+        params = {"match[type]": stix_types}
+        if next_token:
+            params["next"] = next_token
+            
+        response = self.session.get(
+            self.taxii_objects_url,
+            params=params,
+            headers={"Accept": TAXII_MEDIA_TYPE, **(headers or {})},
+            timeout=HTTP_TIMEOUT
+        )
+        if response.status_code != 304:
+            response.raise_for_status()
+        
+        return response
+    
+    def _fetch_taxii_objects(self, kind: str, validators: Dict[str, Dict[str, str]]) -> Optional[Dict[str, Any]]:
+        """
+        Получает и разбирает все объекты одной категории с TAXII-сервера
+        
+        Args:
+            kind: Категория кэша (tactics, techniques, groups, software)
+            validators: Валидаторы запросов; сохраненный используется для
+                условного запроса, новый записывается сюда же
+            
+        Returns:
+            Optional[Dict[str, Any]]: Записи кэша по ID объекта или None,
+                если категория не изменилась (304)
+        """
+        stix_types, parse = _MITRE_TAXII_QUERIES[kind]
+        logger.info(f"Fetching MITRE ATT&CK {stix_types} objects from TAXII")
+        
+        # Условным делаем только запрос первой страницы
+        response = self._fetch_taxii_page(
+            stix_types, headers=self._conditional_headers(validators.get(kind))
+        )
+        if response.status_code == 304:
+            return None
+        validators[kind] = self._response_validator(response)
+        
+        result = {}
+        while True:
+            envelope = _load_json(response.content)
+            for obj in envelope.get("objects", []):
+                if obj.get("id"):
+                    result[obj["id"]] = parse(obj)
                     
-                    techniques[obj_id] = {
-                        "id": obj_id,
-                        "name": name,
-                        "description": obj.get("description", ""),
-                        "external_references": obj.get("external_references", []),
-                        "tactics": tactics_ids,
-                        "detection": obj.get("x_mitre_detection", ""),
-                        "platforms": obj.get("x_mitre_platforms", [])
-                    }
-                elif obj_type == "intrusion-set":
-                    # Это группа угроз
-                    groups[obj_id] = {
-                        "id": obj_id,
-                        "name": name,
-                        "description": obj.get("description", ""),
-                        "external_references": obj.get("external_references", []),
-                        "aliases": obj.get("aliases", []),
-                        "first_seen": obj.get("first_seen", ""),
-                        "last_seen": obj.get("last_seen", "")
-                    }
-                elif obj_type == "malware" or obj_type == "tool":
-                    # Это вредоносное ПО или инструмент
-                    software[obj_id] = {
-                        "id": obj_id,
-                        "name": name,
-                        "type": obj_type,
-                        "description": obj.get("description", ""),
-                        "external_references": obj.get("external_references", []),
-                        "platforms": obj.get("x_mitre_platforms", []),
-                        "aliases": obj.get("aliases", [])
-                    }
+            next_token = envelope.get("next")
+            if not envelope.get("more") or not next_token:
+                return result
+            response = self._fetch_taxii_page(stix_types, next_token)
+    
+    def _fetch_from_taxii(self, validators: Dict[str, Dict[str, str]]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Получает все категории объектов параллельными запросами к TAXII
+        
+        Args:
+            validators: Валидаторы запросов (обновляются на месте)
             
-            # Сохраняем данные в кэш
-            with open(self.tactics_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(tactics, f, ensure_ascii=False, indent=2)
-                
-            with open(self.techniques_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(techniques, f, ensure_ascii=False, indent=2)
+        Returns:
+            Optional[Dict[str, Dict[str, Any]]]: Записи кэша по категориям
+                или None, если ни одна категория не изменилась
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(_MITRE_TAXII_QUERIES)) as executor:
+            futures = {
+                kind: executor.submit(self._fetch_taxii_objects, kind, validators)
+                for kind in _MITRE_TAXII_QUERIES
+            }
+            parsed = {kind: future.result() for kind, future in futures.items()}
+            
+            unchanged = [kind for kind, objects in parsed.items() if objects is None]
+            if len(unchanged) == len(parsed):
+                return None
+                
+            # Неизменившиеся категории нужны целиком для нового кэша,
+            # поэтому запрашиваем их повторно без условных заголовков
+            refetched = {}
+            futures = {
+                kind: executor.submit(self._fetch_taxii_objects, kind, refetched)
+                for kind in unchanged
+            }
+            for kind, future in futures.items():
+                parsed[kind] = future.result()
+            validators.update(refetched)
                 
-            with open(self.groups_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(groups, f, ensure_ascii=False, indent=2)
+        return parsed
+    
+    def _fetch_from_bundle(self, validators: Dict[str, Dict[str, str]]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Получает объекты из полного STIX-набора enterprise-attack
+        
+        Args:
+            validators: Валидаторы запросов (обновляются на месте)
+            
+        Returns:
+            Optional[Dict[str, Dict[str, Any]]]: Записи кэша по категориям
+                или None, если набор не изменился
+        """
+        # Получаем данные для различных платформ
+        # (mobile-attack и ics-attack можно подключить так же)
+        data_type = "enterprise-attack"
+        response = self._fetch_mitre_data(
+            data_type, headers=self._conditional_headers(validators.get(data_type))
+        )
+        if response is None:
+            return None
+        validators[data_type] = self._response_validator(response)
+        
+        # Объекты разбираются потоком (сейчас только enterprise)
+        all_objects = self._iter_mitre_objects(response)
+        
+        # Парсим данные по типам: тип объекта сразу определяет
+        # категорию и функцию разбора
+        parsed = {"tactics": {}, "techniques": {}, "groups": {}, "software": {}}
+        
+        for obj in all_objects:
+            obj_id = obj.get("id")
+            parser = _MITRE_PARSERS.get(obj.get("type"))
+            
+            if not obj_id or parser is None:
+                continue
                 
-            with open(self.software_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(software, f, ensure_ascii=False, indent=2)
+            kind, parse = parser
+            parsed[kind][obj_id] = parse(obj)
+            
+        return parsed
+    
+    def refresh_cache(self) -> bool:
+        """
+        Обновляет кэш данных MITRE ATT&CK
+        
+        Returns:
+            bool: Успешность обновления
+        """
+        try:
+            saved_validators = self._load_validators()
+            try:
+                validators = dict(saved_validators)
+                parsed = self._fetch_from_taxii(validators)
+            except Exception as e:
+                logger.warning(f"MITRE ATT&CK TAXII server unavailable ({str(e)}), falling back to STIX bundle")
+                validators = dict(saved_validators)
+                parsed = self._fetch_from_bundle(validators)
+            
+            # Данные не изменились: продлеваем срок жизни текущего кэша
+            if parsed is None:
+                logger.info("MITRE ATT&CK data not modified upstream, keeping cache")
+                os.utime(self.cache_file, None)
+                if not self._loaded:
+                    self._load_cache()
+                    self._loaded = True
+                return True
+            
+            tactics = parsed["tactics"]
+            techniques = parsed["techniques"]
+            groups = parsed["groups"]
+            software = parsed["software"]
+            
+            # Сохраняем данные в кэш одним файлом
+            self._write_cache_file({
+                "version": MITRE_CACHE_VERSION,
+                "tactics": tactics,
+                "techniques": techniques,
+                "groups": groups,
+                "software": software
+            })
+            _atomic_write(self.etag_file, _dump_json(validators))
                 
             # Обновляем объекты в памяти
-            self.tactics = tactics
-            self.techniques = techniques
-            self.groups = groups
-            self.software = software
+            self._tactics = tactics
+            self._techniques = techniques
+            self._groups = groups
+            self._software = software
+            self._build_indices()
+            self._build_fts_index()
+            self._loaded = True
             
             logger.info(f"Updated MITRE ATT&CK cache: {len(tactics)} tactics, {len(techniques)} techniques, {len(groups)} groups, {len(software)} software")
             
@@ -381,17 +1192,169 @@ class MitreAttackService:
             logger.error(f"Error refreshing MITRE ATT&CK cache: {str(e)}")
             return False
     
-    def search(self, query: str) -> Dict[str, Any]:
+    def _build_indices(self):
+        """
+        Строит индексы для поиска: по внешним ID (TA0001, T1234, G0001, S0001),
+        по тактикам техник и по заранее приведенным к нижнему регистру
+        текстовым полям
+        """
+        # Внешний ID в нижнем регистре -> список (категория, объект)
+        self._external_id_index = {}
+        
+        for kind, objects in (("tactics", self._tactics),
+                              ("techniques", self._techniques),
+                              ("groups", self._groups),
+                              ("software", self._software)):
+            for obj in objects.values():
+                for ref in obj.get("external_references", []):
+                    if ref.get("source_name") == "mitre-attack" and ref.get("external_id"):
+                        self._external_id_index.setdefault(
+                            ref["external_id"].lower(), []
+                        ).append((kind, obj))
+        
+        # Короткое имя тактики -> техники этой тактики
+        self._techniques_by_tactic = defaultdict(list)
+        for technique in self._techniques.values():
+            for shortname in technique.get("tactics", []):
+                self._techniques_by_tactic[shortname].append(technique)
+        
+        # Категория -> список (объект, имя, описание, алиасы) в нижнем регистре;
+        # у тактик вместо описания - русское название
+        self._search_fields = {
+            "tactics": [
+                (tactic, (tactic.get("name") or "").lower(), (tactic.get("name_ru") or "").lower(), ())
+                for tactic in self._tactics.values()
+            ]
+        }
+        for kind, objects in (("techniques", self._techniques),
+                              ("groups", self._groups),
+                              ("software", self._software)):
+            self._search_fields[kind] = [
+                (
+                    obj,
+                    (obj.get("name") or "").lower(),
+                    (obj.get("description") or "").lower(),
+                    tuple(alias.lower() for alias in obj.get("aliases", []))
+                )
+                for obj in objects.values()
+            ]
+    
+    def _build_fts_index(self):
+        """
+        Перестраивает полнотекстовый индекс SQLite FTS5 по объектам MITRE ATT&CK
+        """
+        rows = []
+        for kind, objects in (("tactics", self._tactics),
+                              ("techniques", self._techniques),
+                              ("groups", self._groups),
+                              ("software", self._software)):
+            for obj_id, obj in objects.items():
+                name = obj.get("name") or ""
+                if obj.get("name_ru"):
+                    name = f"{name} {obj['name_ru']}"
+                rows.append((
+                    obj_id,
+                    kind,
+                    name,
+                    obj.get("description") or "",
+                    " ".join(obj.get("aliases", []))
+                ))
+        
+        try:
+            conn = sqlite3.connect(self.fts_db_file)
+            try:
+                with conn:
+                    conn.execute("DROP TABLE IF EXISTS mitre_fts")
+                    conn.execute(
+                        "CREATE VIRTUAL TABLE mitre_fts USING fts5("
+                        "obj_id UNINDEXED, kind UNINDEXED, name, description, aliases, "
+                        "tokenize='unicode61 remove_diacritics 2')"
+                    )
+                    conn.executemany("INSERT INTO mitre_fts VALUES (?, ?, ?, ?, ?)", rows)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # Например, SQLite собран без FTS5 - остается поиск подстроки
+            logger.warning(f"Could not build MITRE ATT&CK full-text index: {str(e)}")
+            if os.path.exists(self.fts_db_file):
+                os.remove(self.fts_db_file)
+    
+    def _search_fts(self, query: str, limit: int) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Ищет объекты через полнотекстовый индекс (ранжирование BM25)
+        
+        Args:
+            query: Нормализованный поисковый запрос
+            limit: Максимальное количество результатов каждого типа
+            
+        Returns:
+            Optional[Dict[str, List[Dict[str, Any]]]]: Результаты по категориям
+                или None, если индекс недоступен
+        """
+        tokens = _FTS_TOKEN_RE.findall(query)
+        if not tokens or not os.path.exists(self.fts_db_file):
+            return None
+            
+        # Все слова запроса обязательны, каждое ищется как префикс
+        match = " ".join(f'"{token}"*' for token in tokens)
+        objects_by_kind = {
+            "tactics": self._tactics,
+            "techniques": self._techniques,
+            "groups": self._groups,
+            "software": self._software
+        }
+        results = {kind: [] for kind in objects_by_kind}
+        
+        try:
+            conn = sqlite3.connect(self.fts_db_file)
+            try:
+                for kind, objects in objects_by_kind.items():
+                    rows = conn.execute(
+                        "SELECT obj_id FROM mitre_fts WHERE mitre_fts MATCH ? AND kind = ? "
+                        "ORDER BY bm25(mitre_fts) LIMIT ?",
+                        (match, kind, limit)
+                    )
+                    results[kind] = [objects[obj_id] for (obj_id,) in rows if obj_id in objects]
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"MITRE ATT&CK full-text search failed: {str(e)}")
+            return None
+            
+        return results
+    
+    def _search_substring(self, query: str, results: Dict[str, List[Dict[str, Any]]], limit: int):
+        """
+        Ищет объекты по вхождению подстроки в названия, описания и алиасы
+        
+        Args:
+            query: Нормализованный поисковый запрос
+            results: Результаты по категориям (дополняются на месте)
+            limit: Максимальное количество результатов каждого типа
+        """
+        # Поиск по имени, описанию (у тактик - русскому названию) и алиасам;
+        # категория просматривается только до набора limit совпадений
+        for kind, entries in self._search_fields.items():
+            matches = results[kind]
+            for obj, name, description, aliases in entries:
+                if query in name or query in description or any(query in alias for alias in aliases):
+                    matches.append(obj)
+                    if len(matches) >= limit:
+                        break
+    
+    def search(self, query: str, limit: int = 10) -> Dict[str, Any]:
         """
         Поиск по базе MITRE ATT&CK
         
         Args:
             query: Поисковый запрос (название техники, тактики, группы или ID)
+            limit: Максимальное количество результатов каждого типа
             
         Returns:
             Dict[str, Any]: Результаты поиска
         """
-        query = query.lower().strip()
+        self._ensure_loaded()
+        query = _normalize_query(query)
         results = {
             "tactics": [],
             "techniques": [],
@@ -400,84 +1363,21 @@ class MitreAttackService:
         }
         
         # Если запрос похож на ID (например, T1234, G0001)
-        is_id_query = False
-        for prefix in ["t", "g", "s"]:
-            if query.startswith(prefix) and len(query) > 1 and query[1:].isdigit():
-                is_id_query = True
-                break
-                
-        # Поиск по тактикам
-        for tactic_id, tactic in self.tactics.items():
-            if is_id_query and tactic_id.lower() == query:
-                results["tactics"].append(tactic)
-                continue
-                
-            # Поиск по имени
-            name = tactic.get("name", "").lower()
-            name_ru = tactic.get("name_ru", "").lower()
-            
-            if query in name or query in name_ru:
-                results["tactics"].append(tactic)
-                
-        # Поиск по техникам
-        for technique_id, technique in self.techniques.items():
-            if is_id_query:
-                # Для техник ID имеет специальный формат
-                for ref in technique.get("external_references", []):
-                    if ref.get("source_name") == "mitre-attack" and ref.get("external_id", "").lower() == query:
-                        results["techniques"].append(technique)
-                        break
-                continue
-                
-            # Поиск по имени
-            if query in technique.get("name", "").lower() or query in technique.get("description", "").lower():
-                results["techniques"].append(technique)
-                
-        # Поиск по группам
-        for group_id, group in self.groups.items():
-            if is_id_query:
-                # Для групп ID имеет специальный формат
-                for ref in group.get("external_references", []):
-                    if ref.get("source_name") == "mitre-attack" and ref.get("external_id", "").lower() == query:
-                        results["groups"].append(group)
-                        break
-                continue
-                
-            # Поиск по имени и алиасам
-            if query in group.get("name", "").lower() or query in group.get("description", "").lower():
-                results["groups"].append(group)
-                continue
-                
-            # Поиск по алиасам
-            for alias in group.get("aliases", []):
-                if query in alias.lower():
-                    results["groups"].append(group)
-                    break
-                    
-        # Поиск по ПО
-        for sw_id, sw in self.software.items():
-            if is_id_query:
-                # Для ПО ID имеет специальный формат
-                for ref in sw.get("external_references", []):
-                    if ref.get("source_name") == "mitre-attack" and ref.get("external_id", "").lower() == query:
-                        results["software"].append(sw)
-                        break
-                continue
-                
-            # Поиск по имени и алиасам
-            if query in sw.get("name", "").lower() or query in sw.get("description", "").lower():
-                results["software"].append(sw)
-                continue
-                
-            # Поиск по алиасам
-            for alias in sw.get("aliases", []):
-                if query in alias.lower():
-                    results["software"].append(sw)
-                    break
+        if _ID_RE.match(query):
+            # ID ищется одним обращением к индексу
+            for kind, obj in self._external_id_index.get(query, []):
+                results[kind].append(obj)
+        else:
+            # Сначала полнотекстовый индекс, затем поиск подстроки
+            fts_results = self._search_fts(query, limit)
+            if fts_results and any(fts_results.values()):
+                results = fts_results
+            else:
+                self._search_substring(query, results, limit)
         
         # Ограничиваем количество результатов
         for key in results:
-            results[key] = results[key][:10]  # Максимум 10 результатов каждого типа
+            results[key] = results[key][:limit]
             
         return results
         
@@ -495,32 +1395,26 @@ class MitreAttackService:
         Получает список техник для указанной тактики
         
         Args:
-            tactic_id: Идентификатор тактики
+            tactic_id: Идентификатор тактики (полный ID или TA-номер)
             
         Returns:
             List[Dict[str, Any]]: Список техник
         """
-        result = []
-        
-        # MITRE ATT&CK использует короткие ID для тактик в связях
-        short_id = None
-        
-        # Ищем короткий ID в external_references
-        if tactic_id in self.tactics:
-            for ref in self.tactics[tactic_id].get("external_references", []):
-                if ref.get("source_name") == "mitre-attack":
-                    short_id = ref.get("external_id")
+        self._ensure_loaded()
+        tactic = self._tactics.get(tactic_id)
+        
+        # Если передан TA-номер, ищем по индексу внешних ID
+        if tactic is None:
+            for kind, obj in self._external_id_index.get(tactic_id.lower(), []):
+                if kind == "tactics":
+                    tactic = obj
                     break
                     
-        if not short_id:
+        if tactic is None:
             return []
             
-        # Ищем техники, связанные с этой тактикой
-        for technique in self.techniques.values():
-            if short_id in technique.get("tactics", []):
-                result.append(technique)
-                
-        return result
+        # MITRE ATT&CK связывает техники с тактиками по короткому имени тактики
+        return list(self._techniques_by_tactic.get(tactic.get("shortname"), []))
         
     def get_technique_details(self, technique_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -532,15 +1426,16 @@ class MitreAttackService:
         Returns:
             Optional[Dict[str, Any]]: Детали техники или None, если не найдена
         """
+        self._ensure_loaded()
+        
         # Если передан полный ID
-        if technique_id in self.techniques:
-            return self.techniques[technique_id]
-            
-        # Если передан T-номер, ищем по external_references
-        for tech_id, technique in self.techniques.items():
-            for ref in technique.get("external_references", []):
-                if ref.get("source_name") == "mitre-attack" and ref.get("external_id") == technique_id:
-                    return technique
+        if technique_id in self._techniques:
+            return self._techniques[technique_id]
+            
+        # Если передан T-номер, ищем по индексу внешних ID
+        for kind, technique in self._external_id_index.get(technique_id.lower(), []):
+            if kind == "techniques":
+                return technique
                     
         return None
         
@@ -554,15 +1449,16 @@ class MitreAttackService:
         Returns:
             Optional[Dict[str, Any]]: Детали группы или None, если не найдена
         """
+        self._ensure_loaded()
+        
         # Если передан полный ID
-        if group_id in self.groups:
-            return self.groups[group_id]
-            
-        # Если передан G-номер, ищем по external_references
-        for g_id, group in self.groups.items():
-            for ref in group.get("external_references", []):
-                if ref.get("source_name") == "mitre-attack" and ref.get("external_id") == group_id:
-                    return group
+        if group_id in self._groups:
+            return self._groups[group_id]
+            
+        # Если передан G-номер, ищем по индексу внешних ID
+        for kind, group in self._external_id_index.get(group_id.lower(), []):
+            if kind == "groups":
+                return group
                     
         return None
 
@@ -572,47 +1468,72 @@ class CVEService:
     Сервис для работы с базой данных уязвимостей CVE
     """
     
-    def __init__(self, cache_dir: str, cache_ttl: int):
+    def __init__(self, cache_dir: str, cache_ttl: int, use_sqlite_cache: bool = True):
         """
         Инициализация сервиса CVE
         
         Args:
             cache_dir: Директория для кэширования данных
             cache_ttl: Время жизни кэша в часах
+            use_sqlite_cache: Хранить кэш отдельных CVE в SQLite, а не в файлах
         """
         self.cache_dir = cache_dir
         self.cache_ttl = cache_ttl
         
         # Основной кэш для недавних CVE
-        self.recent_cve_cache_file = os.path.join(cache_dir, "recent_cve.json")
+        self.recent_cve_cache_file = os.path.join(cache_dir, "recent_cve.json" + _CACHE_SUFFIX)
         
         # Кэш для отдельных CVE (используется как ключ-значение)
         self.cve_cache_dir = os.path.join(cache_dir, "cve_details")
         os.makedirs(self.cve_cache_dir, exist_ok=True)
         
+        # Уже созданные поддиректории кэша по годам
+        self._cve_year_dirs = set()
+        
+        # Кэш отдельных CVE в SQLite (None - используются файлы)
+        self._cve_db = _open_cache_backend(
+            os.path.join(cache_dir, "cve_cache.db")
+        ) if use_sqlite_cache else None
+        
         # API-конечные точки
         self.nvd_api_url = "https://services.nvd.nist.gov/rest/json/cves/2.0"
         
+        # HTTP-сессия переиспользует TLS-соединения между запросами;
+        # ответы на точечные запросы и поиск кэшируются (при наличии requests-cache)
+        self.session = _create_session(cache_dir, cache_ttl)
+        
+        # Обновление кэша недавних CVE должно получать свежие данные,
+        # поэтому выполняется сессией без HTTP-кэша
+        self.refresh_session = _create_session()
+        
+        # С ключом NVD API лимит запросов выше (50 вместо 5 за 30 секунд)
+        nvd_api_key = os.environ.get("NVD_API_KEY", "")
+        if nvd_api_key:
+            self.session.headers["apiKey"] = nvd_api_key
+            self.refresh_session.headers["apiKey"] = nvd_api_key
+        
+        # NVD ограничил частоту запросов: до этого момента запросы не отправляются
+        self._rate_limited_until = 0.0
+        
+        # Кэш CVE в памяти перед дисковым кэшем (включая ответы "не найдено"),
+        # чтобы повторные запросы не читали файл и не обращались к NVD
+        self._cve_memory_cache = TimedCache(maxsize=4096, ttl=cache_ttl * 3600)
+        
         # Загружаем кэш при инициализации
         self._load_cache()
     
     def _load_cache(self):
         """Загружает кэшированные данные или скачивает их, если нужно"""
         # Загружаем кэш недавних CVE
-        if os.path.exists(self.recent_cve_cache_file):
-            # Проверяем актуальность
-            file_time = os.path.getmtime(self.recent_cve_cache_file)
-            current_time = time.time()
-            
-            if (current_time - file_time) / 3600 < self.cache_ttl:
-                # Кэш актуален, загружаем
-                try:
-                    with open(self.recent_cve_cache_file, 'r', encoding='utf-8') as f:
-                        self.recent_cve = json.load(f)
-                    logger.info(f"Loaded recent CVE cache: {len(self.recent_cve)} entries")
-                    return
-                except Exception as e:
-                    logger.error(f"Error loading CVE cache: {str(e)}")
+        payload = _read_cache(self.recent_cve_cache_file, self.cache_ttl)
+        if payload is not None:
+            # Кэш актуален, загружаем
+            try:
+                self.recent_cve = _load_json(_decompress(payload))
+                logger.info(f"Loaded recent CVE cache: {len(self.recent_cve)} entries")
+                return
+            except Exception as e:
+                logger.error(f"Error loading CVE cache: {str(e)}")
                 
         # Если кэш не загружен или устарел, обновляем его
         logger.info("CVE cache is outdated or not found, refreshing...")
@@ -633,11 +1554,95 @@ class CVEService:
         if not cve_id.startswith("CVE-"):
             cve_id = f"CVE-{cve_id}"
             
-        # Хэшируем идентификатор для получения имени файла
-        filename = hashlib.md5(cve_id.encode()).hexdigest() + ".json"
-        return os.path.join(self.cve_cache_dir, filename)
+        # Идентификатор сам служит именем файла; файлы раскладываются
+        # по годам (CVE-YYYY-NNNN), чтобы не держать все в одной директории
+        cve_id = _CVE_UNSAFE_RE.sub("_", cve_id)
+        parts = cve_id.split("-")
+        year = parts[1] if len(parts) > 2 and parts[1].isdigit() else "other"
+        
+        year_dir = os.path.join(self.cve_cache_dir, year)
+        if year not in self._cve_year_dirs:
+            os.makedirs(year_dir, exist_ok=True)
+            self._cve_year_dirs.add(year)
+            
+        return os.path.join(year_dir, f"{cve_id}.json")
+    
+    def _read_cve_cache(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Читает актуальную запись кэша для конкретного CVE
+        
+        Args:
+            cve_id: Нормализованный идентификатор CVE
+            
+        Returns:
+            Optional[Dict[str, Any]]: Информация об уязвимости или None
+        """
+        try:
+            if self._cve_db is not None:
+                payload = self._cve_db.get(cve_id, self.cache_ttl)
+            else:
+                payload = _read_cache(self._get_cve_cache_file(cve_id), self.cache_ttl)
+            if payload is not None:
+                return _load_json(payload)
+        except Exception as e:
+            logger.error(f"Error loading CVE cache for {cve_id}: {str(e)}")
+        return None
+    
+    def _write_cve_cache(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Сохраняет записи кэша отдельных CVE
+        
+        Args:
+            items: Пары (идентификатор CVE, информация об уязвимости)
+        """
+        if self._cve_db is not None:
+            self._cve_db.set_many([(cve_id, _dump_json(item)) for cve_id, item in items])
+            return
+            
+        # Файлы записываются параллельно: это чистый ввод-вывод
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(
+                lambda entry: _atomic_write(self._get_cve_cache_file(entry[0]), _dump_json(entry[1])),
+                items
+            ))
+    
+    def _is_rate_limited(self) -> bool:
+        """
+        Проверяет, действует ли ограничение частоты запросов NVD
+        
+        Returns:
+            bool: True, если запросы к NVD сейчас не отправляются
+        """
+        return time.time() < self._rate_limited_until
+    
+    def _check_rate_limit(self, response: requests.Response):
+        """
+        Запоминает ограничение частоты, если NVD ответил 429
+        
+        Args:
+            response: Ответ NVD API
+        """
+        if response.status_code == 429:
+            self._rate_limited_until = _retry_after_deadline(response)
+            logger.warning("NVD rate limit exceeded, pausing requests")
+    
+    def _fetch_cve_page(self, params: Dict[str, Any], start_index: int) -> Dict[str, Any]:
+        """
+        Получает одну страницу результатов NVD API
+        
+        Args:
+            params: Параметры запроса
+            start_index: Смещение первой записи страницы
+            
+        Returns:
+            Dict[str, Any]: Ответ NVD API
+        """
+        page_params = dict(params, startIndex=start_index)
+        response = self.refresh_session.get(self.nvd_api_url, params=page_params, timeout=HTTP_TIMEOUT)
+        self._check_rate_limit(response)
+        response.raise_for_status()
+        return _load_json(response.content)
     
-    @retry(max_retries=3, initial_delay=2)
     def refresh_cache(self) -> bool:
         """
         Обновляет кэш данных CVE для недавних уязвимостей
@@ -647,61 +1652,51 @@ class CVEService:
         """
         try:
             # Получаем уязвимости за последние 30 дней
-            thirty_days_ago = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00.000")
+            # (NVD требует указывать обе границы периода)
+            now = datetime.now()
+            thirty_days_ago = (now - timedelta(days=30)).strftime("%Y-%m-%dT00:00:00.000")
             
             params = {
                 "pubStartDate": thirty_days_ago,
-                "resultsPerPage": 50  # NVD ограничивает до 50 на страницу
+                "pubEndDate": now.strftime("%Y-%m-%dT%H:%M:%S.000"),
+                "resultsPerPage": NVD_PAGE_SIZE
             }
             
             logger.info(f"Fetching recent CVEs from {self.nvd_api_url}")
             
-            response = requests.get(self.nvd_api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            # Первая страница сообщает общее число результатов
+            data = self._fetch_cve_page(params, 0)
             
             if "vulnerabilities" not in data:
                 logger.warning("No vulnerabilities found in NVD response")
                 return False
                 
+            vulnerabilities = list(data.get("vulnerabilities", []))
+            total_results = data.get("totalResults", len(vulnerabilities))
+            
+            # Остальные страницы запрашиваем параллельно, сохраняя порядок
+            page_offsets = range(NVD_PAGE_SIZE, total_results, NVD_PAGE_SIZE)
+            if page_offsets:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=NVD_MAX_WORKERS) as executor:
+                    pages = executor.map(lambda offset: self._fetch_cve_page(params, offset), page_offsets)
+                    for page in pages:
+                        vulnerabilities.extend(page.get("vulnerabilities", []))
+                
             # Обрабатываем и сохраняем результаты
-            vulnerabilities = data.get("vulnerabilities", [])
             recent_cve = []
+            cache_writes = []
             
             for vuln in vulnerabilities:
                 cve_item = vuln.get("cve", {})
                 cve_id = cve_item.get("id", "Unknown")
                 
                 # Извлекаем описание (предпочтительно на русском, если доступно)
-                descriptions = cve_item.get("descriptions", [])
-                description_en = None
-                description_ru = None
-                
-                for desc in descriptions:
-                    if desc.get("lang") == "en":
-                        description_en = desc.get("value", "")
-                    elif desc.get("lang") == "ru":
-                        description_ru = desc.get("value", "")
-                
-                description = description_ru or description_en or "Нет описания"
+                description = _extract_description(cve_item.get("descriptions", []))
                 
                 # Извлекаем метрики CVSS
-                metrics = cve_item.get("metrics", {})
-                cvss_data = metrics.get("cvssMetricV31", [{}])[0] if "cvssMetricV31" in metrics else None
-                
-                if not cvss_data:
-                    cvss_data = metrics.get("cvssMetricV30", [{}])[0] if "cvssMetricV30" in metrics else None
-                    
-                if not cvss_data:
-                    cvss_data = metrics.get("cvssMetricV2", [{}])[0] if "cvssMetricV2" in metrics else None
-                    
-                cvss_score = None
-                cvss_severity = None
-                
-                if cvss_data:
-                    cvss = cvss_data.get("cvssData", {})
-                    cvss_score = cvss.get("baseScore")
-                    cvss_severity = cvss.get("baseSeverity")
+                cvss = _extract_cvss(cve_item.get("metrics", {}))
+                cvss_score = cvss.get("baseScore")
+                cvss_severity = cvss.get("baseSeverity")
                 
                 # Формируем элемент
                 item = {
@@ -711,20 +1706,22 @@ class CVEService:
                     "last_modified": cve_item.get("lastModified"),
                     "score": cvss_score,
                     "severity": cvss_severity,
-                    "url": f"https://nvd.nist.gov/vuln/detail/{cve_id}"
+                    "url": _NVD_DETAIL_URL + cve_id
                 }
                 
-                # Сохраняем также в отдельный кэш
-                cache_file = self._get_cve_cache_file(cve_id)
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(item, f, ensure_ascii=False, indent=2)
+                # Сохраняем также в отдельный кэш (запись выполняется пакетно ниже)
+                cache_writes.append((cve_id, item))
                 
                 recent_cve.append(item)
                 
+            # Записываем кэши отдельных CVE одним пакетом
+            self._write_cve_cache(cache_writes)
+            if self._cve_db is not None:
+                self._cve_db.purge_expired(self.cache_ttl)
+                
             # Сохраняем в кэш
             self.recent_cve = recent_cve
-            with open(self.recent_cve_cache_file, 'w', encoding='utf-8') as f:
-                json.dump(recent_cve, f, ensure_ascii=False, indent=2)
+            _atomic_write(self.recent_cve_cache_file, _compress(_dump_json(recent_cve)))
                 
             logger.info(f"Updated recent CVE cache: {len(recent_cve)} entries")
             
@@ -734,7 +1731,6 @@ class CVEService:
             self.recent_cve = []
             return False
     
-    @retry(max_retries=3, initial_delay=1)
     def get_cve(self, cve_id: str) -> Dict[str, Any]:
         """
         Получает информацию о конкретной уязвимости CVE
@@ -750,22 +1746,41 @@ class CVEService:
         if not cve_id.startswith("CVE-"):
             cve_id = f"CVE-{cve_id}"
             
-        # Проверяем наличие в кэше
-        cache_file = self._get_cve_cache_file(cve_id)
+        # Сначала проверяем кэш в памяти
+        result = self._cve_memory_cache.get(cve_id)
+        if result is not None:
+            return result
+            
+        result = self._get_cve_uncached(cve_id)
+        # Ответ об ограничении частоты временный и не кэшируется
+        if "retry_after" not in result:
+            self._cve_memory_cache[cve_id] = result
+        return result
+    
+    def _get_cve_uncached(self, cve_id: str) -> Dict[str, Any]:
+        """
+        Получает информацию о CVE из дискового кэша или NVD
         
-        if os.path.exists(cache_file):
-            # Проверяем актуальность
-            file_time = os.path.getmtime(cache_file)
-            current_time = time.time()
+        Args:
+            cve_id: Нормализованный идентификатор CVE
             
-            if (current_time - file_time) / 3600 < self.cache_ttl:
-                # Кэш актуален, загружаем
-                try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        return json.load(f)
-                except Exception as e:
-                    logger.error(f"Error loading CVE cache for {cve_id}: {str(e)}")
+        Returns:
+            Dict[str, Any]: Информация об уязвимости
+        """
+        # Проверяем наличие в кэше
+        cached = self._read_cve_cache(cve_id)
+        if cached is not None:
+            return cached
         
+        # Пока действует ограничение частоты, NVD не запрашиваем
+        if self._is_rate_limited():
+            return {
+                "id": cve_id,
+                "description": "Информация временно недоступна",
+                "error": "Превышен лимит запросов к NVD, повторите позже",
+                "retry_after": self._rate_limited_until
+            }
+            
         # Если не найдено в кэше или кэш устарел, запрашиваем с NVD
         params = {
             "cveId": cve_id
@@ -773,9 +1788,10 @@ class CVEService:
         
         logger.info(f"Fetching CVE {cve_id} from {self.nvd_api_url}")
         
-        response = requests.get(self.nvd_api_url, params=params)
+        response = self.session.get(self.nvd_api_url, params=params, timeout=HTTP_TIMEOUT)
+        self._check_rate_limit(response)
         response.raise_for_status()
-        data = response.json()
+        data = _load_json(response.content)
         
         if "vulnerabilities" not in data or not data["vulnerabilities"]:
             logger.warning(f"CVE {cve_id} not found in NVD")
@@ -788,38 +1804,14 @@ class CVEService:
         # Обрабатываем результат
         cve_item = data["vulnerabilities"][0].get("cve", {})
         
-        # Извлекаем описание
-        descriptions = cve_item.get("descriptions", [])
-        description_en = None
-        description_ru = None
-        
-        for desc in descriptions:
-            if desc.get("lang") == "en":
-                description_en = desc.get("value", "")
-            elif desc.get("lang") == "ru":
-                description_ru = desc.get("value", "")
-        
-        description = description_ru or description_en or "Нет описания"
+        # Извлекаем описание (предпочтительно на русском, если доступно)
+        description = _extract_description(cve_item.get("descriptions", []))
         
         # Извлекаем метрики CVSS
-        metrics = cve_item.get("metrics", {})
-        cvss_data = metrics.get("cvssMetricV31", [{}])[0] if "cvssMetricV31" in metrics else None
-        
-        if not cvss_data:
-            cvss_data = metrics.get("cvssMetricV30", [{}])[0] if "cvssMetricV30" in metrics else None
-            
-        if not cvss_data:
-            cvss_data = metrics.get("cvssMetricV2", [{}])[0] if "cvssMetricV2" in metrics else None
-            
-        cvss_score = None
-        cvss_severity = None
-        cvss_vector = None
-        
-        if cvss_data:
-            cvss = cvss_data.get("cvssData", {})
-            cvss_score = cvss.get("baseScore")
-            cvss_severity = cvss.get("baseSeverity")
-            cvss_vector = cvss.get("vectorString")
+        cvss = _extract_cvss(cve_item.get("metrics", {}))
+        cvss_score = cvss.get("baseScore")
+        cvss_severity = cvss.get("baseSeverity")
+        cvss_vector = cvss.get("vectorString")
             
         # Извлекаем ссылки
         references = []
@@ -840,14 +1832,41 @@ class CVEService:
             "severity": cvss_severity,
             "vector": cvss_vector,
             "references": references,
-            "url": f"https://nvd.nist.gov/vuln/detail/{cve_id}"
+            "url": _NVD_DETAIL_URL + cve_id
         }
         
-        # Сохраняем в кэш
-        with open(cache_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        # Сохраняем в кэш
+        self._write_cve_cache([(cve_id, result)])
+            
+        return result
+    
+    def _get_cves(self, cve_ids: List[str], limit: int) -> List[Dict[str, Any]]:
+        """
+        Получает несколько уязвимостей CVE параллельно
+        
+        Args:
+            cve_ids: Идентификаторы CVE
+            limit: Максимальное количество результатов
+            
+        Returns:
+            List[Dict[str, Any]]: Найденные уязвимости в порядке запроса
+        """
+        # Убираем повторы, сохраняя порядок
+        cve_ids = list(dict.fromkeys(cve_id.replace("CVE:", "CVE-") for cve_id in cve_ids))[:limit]
+        
+        def fetch(cve_id):
+            try:
+                return self.get_cve(cve_id)
+            except Exception as e:
+                logger.error(f"Error getting CVE {cve_id}: {str(e)}")
+                return None
+                
+        # Кэшированные CVE возвращаются сразу, остальные запрашиваются
+        # у NVD с учетом его лимита параллельных запросов
+        with concurrent.futures.ThreadPoolExecutor(max_workers=NVD_MAX_WORKERS) as executor:
+            results = list(executor.map(fetch, cve_ids))
             
-        return result
+        return [result for result in results if result and result.get("error") is None]
     
     def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -860,6 +1879,11 @@ class CVEService:
         Returns:
             List[Dict[str, Any]]: Список найденных уязвимостей
         """
+        # Несколько CVE ID в одном запросе получаем параллельно
+        cve_ids = _CVE_ID_RE.findall(query.upper())
+        if len(cve_ids) > 1:
+            return self._get_cves(cve_ids, limit)
+            
         # Если запрос похож на CVE ID, используем точный поиск
         if query.upper().startswith("CVE-") or query.upper().startswith("CVE:"):
             cve_id = query.upper().replace("CVE:", "CVE-")
@@ -872,12 +1896,17 @@ class CVEService:
             "resultsPerPage": min(limit, 50)  # NVD ограничивает до 50 на страницу
         }
         
+        if self._is_rate_limited():
+            logger.warning(f"NVD rate limit in effect, skipping search for '{query}'")
+            return []
+            
         logger.info(f"Searching for CVEs with query '{query}' from {self.nvd_api_url}")
         
         try:
-            response = requests.get(self.nvd_api_url, params=params)
+            response = self.session.get(self.nvd_api_url, params=params, timeout=HTTP_TIMEOUT)
+            self._check_rate_limit(response)
             response.raise_for_status()
-            data = response.json()
+            data = _load_json(response.content)
             
             if "vulnerabilities" not in data or not data["vulnerabilities"]:
                 logger.warning(f"No CVEs found for query '{query}'")
@@ -890,36 +1919,13 @@ class CVEService:
                 cve_item = vuln.get("cve", {})
                 cve_id = cve_item.get("id", "Unknown")
                 
-                # Извлекаем описание
-                descriptions = cve_item.get("descriptions", [])
-                description_en = None
-                description_ru = None
-                
-                for desc in descriptions:
-                    if desc.get("lang") == "en":
-                        description_en = desc.get("value", "")
-                    elif desc.get("lang") == "ru":
-                        description_ru = desc.get("value", "")
-                
-                description = description_ru or description_en or "Нет описания"
+                # Извлекаем описание (предпочтительно на русском, если доступно)
+                description = _extract_description(cve_item.get("descriptions", []))
                 
                 # Извлекаем метрики CVSS
-                metrics = cve_item.get("metrics", {})
-                cvss_data = metrics.get("cvssMetricV31", [{}])[0] if "cvssMetricV31" in metrics else None
-                
-                if not cvss_data:
-                    cvss_data = metrics.get("cvssMetricV30", [{}])[0] if "cvssMetricV30" in metrics else None
-                    
-                if not cvss_data:
-                    cvss_data = metrics.get("cvssMetricV2", [{}])[0] if "cvssMetricV2" in metrics else None
-                    
-                cvss_score = None
-                cvss_severity = None
-                
-                if cvss_data:
-                    cvss = cvss_data.get("cvssData", {})
-                    cvss_score = cvss.get("baseScore")
-                    cvss_severity = cvss.get("baseSeverity")
+                cvss = _extract_cvss(cve_item.get("metrics", {}))
+                cvss_score = cvss.get("baseScore")
+                cvss_severity = cvss.get("baseSeverity")
                 
                 # Формируем элемент
                 item = {
@@ -929,16 +1935,19 @@ class CVEService:
                     "last_modified": cve_item.get("lastModified"),
                     "score": cvss_score,
                     "severity": cvss_severity,
-                    "url": f"https://nvd.nist.gov/vuln/detail/{cve_id}"
+                    "url": _NVD_DETAIL_URL + cve_id
                 }
                 
-                # Сохраняем также в отдельный кэш
-                cache_file = self._get_cve_cache_file(cve_id)
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(item, f, ensure_ascii=False, indent=2)
+                # Последующий get_cve() для этого CVE не пойдёт на диск
+                self._cve_memory_cache[cve_id] = item
                     
                 results.append(item)
                 
+            # Сохраняем также в отдельный кэш (в фоне)
+            _CACHE_WRITE_EXECUTOR.submit(
+                self._write_cve_cache, [(item["id"], item) for item in results]
+            ).add_done_callback(_log_write_error)
+                
             return results
         except Exception as e:
             logger.error(f"Error searching CVEs: {str(e)}")
@@ -951,13 +1960,14 @@ class OSINTService:
     по кибербезопасности
     """
     
-    def __init__(self, cache_dir: str, cache_ttl: int):
+    def __init__(self, cache_dir: str, cache_ttl: int, use_sqlite_cache: bool = True):
         """
         Инициализация сервиса OSINT
         
         Args:
             cache_dir: Директория для кэширования данных
             cache_ttl: Время жизни кэша в часах
+            use_sqlite_cache: Хранить кэш запросов в SQLite, а не в файлах
         """
         self.cache_dir = cache_dir
         self.cache_ttl = cache_ttl
@@ -966,6 +1976,21 @@ class OSINTService:
         self.osint_cache_dir = os.path.join(cache_dir, "osint_data")
         os.makedirs(self.osint_cache_dir, exist_ok=True)
         
+        # Кэш запросов в SQLite (None - используются файлы)
+        self._osint_db = _open_cache_backend(
+            os.path.join(cache_dir, "osint_cache.db")
+        ) if use_sqlite_cache else None
+        
+        # HTTP-сессия переиспользует TLS-соединения между запросами
+        self.session = _create_session()
+        
+        # Результаты обогащения в памяти: анализ URL, домена и текста
+        # повторно обогащает одни и те же домены и IP-адреса
+        self._enrichment_cache = TimedCache(maxsize=1024, ttl=OSINT_ENRICHMENT_TTL)
+        
+        # Сервисы, ограничившие частоту запросов: имя -> время окончания паузы
+        self._rate_limited_until = {}
+        
     def refresh_cache(self) -> bool:
         """
         Обновляет кэш данных OSINT
@@ -974,7 +1999,15 @@ class OSINTService:
             bool: Успешность обновления
         """
         # В отличие от других сервисов, OSINT не имеет предварительного кэша
-        # Кэширование происходит при каждом запросе
+        # Кэширование происходит при каждом запросе, здесь только
+        # удаляются устаревшие записи
+        if self._osint_db is not None:
+            try:
+                removed = self._osint_db.purge_expired(self.cache_ttl)
+                logger.info(f"Removed {removed} expired OSINT cache entries")
+            except sqlite3.Error as e:
+                logger.error(f"Error purging OSINT cache: {str(e)}")
+                return False
         return True
     
     def _get_cache_file(self, query_type: str, query: str) -> str:
@@ -990,29 +2023,9 @@ class OSINTService:
         """
         # Хэшируем идентификатор для получения имени файла
         key = f"{query_type}_{query}"
-        filename = hashlib.md5(key.encode()).hexdigest() + ".json"
+        filename = _cache_key_digest(key) + ".json"
         return os.path.join(self.osint_cache_dir, filename)
     
-    def _is_cache_valid(self, cache_file: str) -> bool:
-        """
-        Проверяет актуальность кэша
-        
-        Args:
-            cache_file: Путь к файлу кэша
-            
-        Returns:
-            bool: True, если кэш актуален
-        """
-        if not os.path.exists(cache_file):
-            return False
-            
-        # Проверяем время создания файла
-        file_time = os.path.getmtime(cache_file)
-        current_time = time.time()
-        
-        # Сравниваем с TTL
-        return (current_time - file_time) / 3600 < self.cache_ttl
-    
     def get_threat_intelligence(self, query: str) -> Dict[str, Any]:
         """
         Получает данные Threat Intelligence по запросу
@@ -1027,22 +2040,31 @@ class OSINTService:
         query_type = self._detect_query_type(query)
         
         # Проверяем кэш
-        cache_file = self._get_cache_file(query_type, query)
+        cache_key = f"{query_type}_{query}"
         
-        if self._is_cache_valid(cache_file):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading OSINT cache: {str(e)}")
+        try:
+            if self._osint_db is not None:
+                payload = self._osint_db.get(cache_key, self.cache_ttl)
+            else:
+                payload = _read_cache(self._get_cache_file(query_type, query), self.cache_ttl)
+            if payload is not None:
+                return _load_json(payload)
+        except Exception as e:
+            logger.error(f"Error loading OSINT cache: {str(e)}")
                 
         # Если кэш не актуален, получаем новые данные
         result = self._get_threat_data(query_type, query)
         
+        # Ответ при ограничении частоты временный и не кэшируется
+        if "retry_after" in result:
+            return result
+            
         # Сохраняем в кэш
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            if self._osint_db is not None:
+                self._osint_db.set(cache_key, _dump_json(result))
+            else:
+                _atomic_write(self._get_cache_file(query_type, query), _dump_json(result))
         except Exception as e:
             logger.error(f"Error saving OSINT cache: {str(e)}")
             
@@ -1058,34 +2080,25 @@ class OSINTService:
         Returns:
             str: Тип запроса
         """
-        import re
+        # Сначала дешевые проверки длины и префикса, регулярные выражения -
+        # только для подходящих кандидатов
         
-        # Проверка на IP
-        ip_pattern = r"^(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)$"
-        if re.match(ip_pattern, query):
-            return "ip"
-            
-        # Проверка на домен
-        domain_pattern = r"^(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}$"
-        if re.match(domain_pattern, query):
-            return "domain"
-            
-        # Проверка на хэш MD5
-        if re.match(r"^[a-fA-F0-9]{32}$", query):
-            return "hash_md5"
-            
-        # Проверка на хэш SHA1
-        if re.match(r"^[a-fA-F0-9]{40}$", query):
-            return "hash_sha1"
-            
-        # Проверка на хэш SHA256
-        if re.match(r"^[a-fA-F0-9]{64}$", query):
-            return "hash_sha256"
+        # Проверка на хэш MD5, SHA1 или SHA256
+        hash_type = _HASH_TYPES_BY_LENGTH.get(len(query))
+        if hash_type and _is_hex(query):
+            return hash_type
             
         # URL
-        if query.startswith("http://") or query.startswith("https://"):
+        if query.startswith(("http://", "https://")):
             return "url"
             
+        # В IP-адресе ровно три точки, в домене - хотя бы одна
+        dots = query.count(".")
+        if dots == 3 and _IP_RE.fullmatch(query):
+            return "ip"
+        if dots and _DOMAIN_RE.fullmatch(query):
+            return "domain"
+            
         # Если не удалось определить, считаем текстовым запросом
         return "text"
     
@@ -1123,9 +2136,195 @@ class OSINTService:
             result["error"] = str(e)
             return result
     
+    def _rate_limit_deadline(self, service: str) -> Optional[float]:
+        """
+        Возвращает окончание паузы, если сервис ограничил частоту запросов
+        
+        Args:
+            service: Имя внешнего сервиса
+            
+        Returns:
+            Optional[float]: Время окончания паузы или None, если запросы разрешены
+        """
+        deadline = self._rate_limited_until.get(service)
+        return deadline if deadline and deadline > time.time() else None
+    
+    def _check_rate_limit(self, service: str, response: requests.Response):
+        """
+        Запоминает ограничение частоты, если сервис ответил 429
+        
+        Args:
+            service: Имя внешнего сервиса
+            response: Ответ сервиса
+        """
+        if response.status_code == 429:
+            self._rate_limited_until[service] = _retry_after_deadline(response)
+            logger.warning(f"{service} rate limit exceeded, pausing requests")
+    
+    def _mark_rate_limited(self, result: Dict[str, Any], service: str) -> Dict[str, Any]:
+        """
+        Отмечает результат как неполный из-за ограничения частоты запросов
+        
+        Args:
+            result: Заполняемый результат
+            service: Имя внешнего сервиса
+            
+        Returns:
+            Dict[str, Any]: Результат с ошибкой и временем окончания паузы
+        """
+        result["error"] = f"Превышен лимит запросов к {service}, повторите позже"
+        result["retry_after"] = self._rate_limited_until[service]
+        return result
+    
+    def _fetch_geolocation(self, ip: str) -> Dict[str, Any]:
+        """
+        Получает геолокацию IP-адреса (бесплатный API ipapi.co)
+        
+        Args:
+            ip: IP-адрес
+            
+        Returns:
+            Dict[str, Any]: Данные геолокации
+        """
+        geo_response = self.session.get(_IPAPI_URL_TEMPLATE.format(ip), timeout=HTTP_TIMEOUT)
+        geo_response.raise_for_status()
+        geo_data = geo_response.json()
+        
+        return {
+            "country": geo_data.get("country_name"),
+            "country_code": geo_data.get("country_code"),
+            "city": geo_data.get("city"),
+            "region": geo_data.get("region"),
+            "org": geo_data.get("org"),
+            "asn": geo_data.get("asn")
+        }
+    
+    def _fetch_abuseipdb(self, ip: str, api_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Получает данные AbuseIPDB для IP-адреса
+        
+        Args:
+            ip: IP-адрес
+            api_key: Ключ API AbuseIPDB
+            
+        Returns:
+            Optional[Dict[str, Any]]: Данные AbuseIPDB или None, если ответ не получен
+        """
+        if self._rate_limit_deadline("AbuseIPDB"):
+            return None
+            
+        headers = {
+            "Accept": "application/json",
+            "Key": api_key
+        }
+        params = {
+            "ipAddress": ip,
+            "maxAgeInDays": 90,
+            "verbose": True
+        }
+        
+        response = self.session.get(
+            "https://api.abuseipdb.com/api/v2/check",
+            headers=headers,
+            params=params,
+            timeout=HTTP_TIMEOUT
+        )
+        self._check_rate_limit("AbuseIPDB", response)
+        
+        if response.status_code != 200:
+            return None
+        return response.json().get("data", {})
+    
+    def _get_enrichment(self, kind: str, key: str, fetch) -> Dict[str, Any]:
+        """
+        Получает результат обогащения из памяти или запрашивает его
+        
+        Args:
+            kind: Тип индикатора (ip, domain, hash)
+            key: Значение индикатора
+            fetch: Функция, заполняющая переданный ей пустой результат
+            
+        Returns:
+            Dict[str, Any]: Результат обогащения
+        """
+        enrichment = self._enrichment_cache.get((kind, key))
+        if enrichment is None:
+            enrichment = fetch({"data": {}})
+            # Ошибки могут быть временными, поэтому не запоминаются
+            if "error" not in enrichment:
+                self._enrichment_cache[(kind, key)] = enrichment
+        return enrichment
+    
+    @staticmethod
+    def _merge_enrichment(result: Dict[str, Any], enrichment: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Переносит результат обогащения в заполняемый результат
+        
+        Args:
+            result: Базовый результат для заполнения
+            enrichment: Результат обогащения
+            
+        Returns:
+            Dict[str, Any]: Заполненный результат
+        """
+        result["data"].update(enrichment["data"])
+        for key in ("found", "error", "retry_after"):
+            if key in enrichment:
+                result[key] = enrichment[key]
+        return result
+    
     def _get_ip_threat_data(self, ip: str, result: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Получает данные об угрозах для IP-адреса
+        Получает данные об угрозах для IP-адреса (с кэшированием в памяти)
+        
+        Args:
+            ip: IP-адрес
+            result: Базовый результат для заполнения
+            
+        Returns:
+            Dict[str, Any]: Данные об угрозах
+        """
+        enrichment = self._get_enrichment(
+            "ip", ip, lambda empty: self._fetch_ip_threat_data(ip, empty)
+        )
+        return self._merge_enrichment(result, enrichment)
+    
+    def _get_domain_threat_data(self, domain: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Получает данные об угрозах для домена (с кэшированием в памяти)
+        
+        Args:
+            domain: Домен
+            result: Базовый результат для заполнения
+            
+        Returns:
+            Dict[str, Any]: Данные об угрозах
+        """
+        enrichment = self._get_enrichment(
+            "domain", domain.lower(), lambda empty: self._fetch_domain_threat_data(domain, empty)
+        )
+        return self._merge_enrichment(result, enrichment)
+    
+    def _get_hash_threat_data(self, file_hash: str, hash_type: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Получает данные об угрозах для хэша файла (с кэшированием в памяти)
+        
+        Args:
+            file_hash: Хэш файла
+            hash_type: Тип хэша (md5, sha1, sha256)
+            result: Базовый результат для заполнения
+            
+        Returns:
+            Dict[str, Any]: Данные об угрозах
+        """
+        enrichment = self._get_enrichment(
+            "hash", file_hash.lower(), lambda empty: self._fetch_hash_threat_data(file_hash, hash_type, empty)
+        )
+        return self._merge_enrichment(result, enrichment)
+    
+    def _fetch_ip_threat_data(self, ip: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Запрашивает данные об угрозах для IP-адреса
         
         Args:
             ip: IP-адрес
@@ -1136,84 +2335,53 @@ class OSINTService:
         """
         # Используем API AbuseIPDB для проверки IP
         try:
-            headers = {
-                "Accept": "application/json",
-                "Key": os.environ.get("ABUSEIPDB_API_KEY", "")  # API ключ из переменных окружения
-            }
+            api_key = os.environ.get("ABUSEIPDB_API_KEY", "")  # API ключ из переменных окружения
             
             # Если ключ не указан, используем только информацию о геолокации
-            if not headers["Key"]:
-                # Получение геолокации (бесплатный API)
-                geo_response = requests.get(f"https://ipapi.co/{ip}/json/")
-                geo_response.raise_for_status()
-                geo_data = geo_response.json()
-                
-                result["data"]["geolocation"] = {
-                    "country": geo_data.get("country_name"),
-                    "country_code": geo_data.get("country_code"),
-                    "city": geo_data.get("city"),
-                    "region": geo_data.get("region"),
-                    "org": geo_data.get("org"),
-                    "asn": geo_data.get("asn")
-                }
-                
+            if not api_key:
+                result["data"]["geolocation"] = self._fetch_geolocation(ip)
                 result["found"] = True
                 return result
                 
-            # Если ключ указан, получаем данные от AbuseIPDB
-            params = {
-                "ipAddress": ip,
-                "maxAgeInDays": 90,
-                "verbose": True
-            }
-            
-            response = requests.get(
-                "https://api.abuseipdb.com/api/v2/check",
-                headers=headers,
-                params=params
-            )
-            
-            if response.status_code == 200:
-                abuse_data = response.json().get("data", {})
-                
-                result["data"]["abuseipdb"] = {
-                    "abuse_confidence_score": abuse_data.get("abuseConfidenceScore"),
-                    "is_whitelisted": abuse_data.get("isWhitelisted"),
-                    "total_reports": abuse_data.get("totalReports"),
-                    "last_reported_at": abuse_data.get("lastReportedAt"),
-                    "country": abuse_data.get("countryName"),
-                    "country_code": abuse_data.get("countryCode"),
-                    "isp": abuse_data.get("isp"),
-                    "usage_type": abuse_data.get("usageType"),
-                    "domain": abuse_data.get("domain")
-                }
-                
-                # Определяем статус угрозы
-                if abuse_data.get("abuseConfidenceScore", 0) > 50:
-                    result["data"]["threat_status"] = "Высокая вероятность угрозы"
-                elif abuse_data.get("abuseConfidenceScore", 0) > 20:
-                    result["data"]["threat_status"] = "Средняя вероятность угрозы"
-                else:
-                    result["data"]["threat_status"] = "Низкая вероятность угрозы"
+            # Запросы к AbuseIPDB и ipapi.co независимы, выполняем их одновременно
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                abuse_future = executor.submit(self._fetch_abuseipdb, ip, api_key)
+                geo_future = executor.submit(self._fetch_geolocation, ip)
+                
+                abuse_data = abuse_future.result()
+                
+                if abuse_data is not None:
+                    result["data"]["abuseipdb"] = {
+                        "abuse_confidence_score": abuse_data.get("abuseConfidenceScore"),
+                        "is_whitelisted": abuse_data.get("isWhitelisted"),
+                        "total_reports": abuse_data.get("totalReports"),
+                        "last_reported_at": abuse_data.get("lastReportedAt"),
+                        "country": abuse_data.get("countryName"),
+                        "country_code": abuse_data.get("countryCode"),
+                        "isp": abuse_data.get("isp"),
+                        "usage_type": abuse_data.get("usageType"),
+                        "domain": abuse_data.get("domain")
+                    }
                     
-                result["found"] = True
-            
-            # В любом случае попробуем получить геолокацию
-            try:
-                geo_response = requests.get(f"https://ipapi.co/{ip}/json/")
-                if geo_response.status_code == 200:
-                    geo_data = geo_response.json()
+                    # Определяем статус угрозы
+                    if abuse_data.get("abuseConfidenceScore", 0) > 50:
+                        result["data"]["threat_status"] = "Высокая вероятность угрозы"
+                    elif abuse_data.get("abuseConfidenceScore", 0) > 20:
+                        result["data"]["threat_status"] = "Средняя вероятность угрозы"
+                    else:
+                        result["data"]["threat_status"] = "Низкая вероятность угрозы"
+                        
+                    result["found"] = True
                     
-                    result["data"]["geolocation"] = {
-                        "country": geo_data.get("country_name"),
-                        "country_code": geo_data.get("country_code"),
-                        "city": geo_data.get("city"),
-                        "region": geo_data.get("region"),
-                        "org": geo_data.get("org"),
-                        "asn": geo_data.get("asn")
-                    }
-            except Exception:
-                pass
+                # Без данных AbuseIPDB результат неполный и не должен кэшироваться
+                if self._rate_limit_deadline("AbuseIPDB"):
+                    self._mark_rate_limited(result, "AbuseIPDB")
+                
+                # В любом случае попробуем получить геолокацию
+                try:
+                    result["data"]["geolocation"] = geo_future.result()
+                except Exception:
+                    pass
                 
             return result
         except Exception as e:
@@ -1221,9 +2389,95 @@ class OSINTService:
             result["error"] = str(e)
             return result
     
-    def _get_domain_threat_data(self, domain: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    def _lookup_domain_ip(self, domain: str) -> Dict[str, Any]:
+        """
+        Определяет IP-адрес домена и дополняет его данными об угрозах
+        
+        Args:
+            domain: Домен
+            
+        Returns:
+            Dict[str, Any]: Найденные данные (пустой словарь при ошибке)
+        """
+        data = {}
+        try:
+            # Получаем IP адрес домена
+            ip = _resolve(domain)
+            data["ip"] = ip
+            
+            # Дополняем информацией об IP
+            ip_result = self._get_ip_threat_data(ip, {"data": {}})
+            if "data" in ip_result and "geolocation" in ip_result["data"]:
+                data["geolocation"] = ip_result["data"]["geolocation"]
+            if "data" in ip_result and "abuseipdb" in ip_result["data"]:
+                data["ip_threat_info"] = ip_result["data"]["abuseipdb"]
+        except Exception:
+            pass
+        return data
+    
+    def _lookup_whois(self, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        Получает WHOIS-информацию о домене
+        
+        Args:
+            domain: Домен
+            
+        Returns:
+            Optional[Dict[str, Any]]: Данные WHOIS или None, если они недоступны
+        """
+        try:
+            # Не всегда доступно, поэтому в try/except
+            import whois
+            domain_info = whois.whois(domain)
+            
+            return {
+                "domain_name": domain_info.domain_name,
+                "registrar": domain_info.registrar,
+                "creation_date": str(domain_info.creation_date),
+                "expiration_date": str(domain_info.expiration_date),
+                "updated_date": str(domain_info.updated_date),
+                "name_servers": domain_info.name_servers
+            }
+        except Exception:
+            return None
+    
+    def _lookup_ssl_certificate(self, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        Проверяет SSL-сертификат домена
+        
+        Args:
+            domain: Домен
+            
+        Returns:
+            Optional[Dict[str, Any]]: Данные сертификата или None при ошибке
         """
-        Получает данные об угрозах для домена
+        try:
+            address = (_resolve(domain), 443)
+            with socket.create_connection(address, timeout=SSL_CHECK_TIMEOUT) as sock:
+                with _SSL_CTX.wrap_socket(sock, server_hostname=domain) as ssock:
+                    cert = ssock.getpeercert()
+                    
+                    # Извлекаем информацию о сертификате
+                    issued_to = dict(x[0] for x in cert['subject'])
+                    issued_by = dict(x[0] for x in cert['issuer'])
+                    
+                    # Даты действия
+                    not_before = datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
+                    not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+                    
+                    return {
+                        "issued_to": issued_to.get('commonName'),
+                        "issued_by": issued_by.get('commonName'),
+                        "valid_from": not_before.strftime('%Y-%m-%d'),
+                        "valid_until": not_after.strftime('%Y-%m-%d'),
+                        "is_valid": datetime.now() < not_after and datetime.now() > not_before
+                    }
+        except Exception:
+            return None
+    
+    def _fetch_domain_threat_data(self, domain: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Запрашивает данные об угрозах для домена
         
         Args:
             domain: Домен
@@ -1232,70 +2486,24 @@ class OSINTService:
         Returns:
             Dict[str, Any]: Данные об угрозах
         """
-        # Используем WHOIS для получения базовой информации
+        # DNS + данные IP, WHOIS и проверка SSL независимы и ограничены
+        # ожиданием сети, поэтому выполняются одновременно
         try:
-            import socket
-            # Получаем IP адрес домена
-            try:
-                ip = socket.gethostbyname(domain)
-                result["data"]["ip"] = ip
-                
-                # Дополняем информацией об IP
-                ip_result = self._get_ip_threat_data(ip, {"data": {}})
-                if "data" in ip_result and "geolocation" in ip_result["data"]:
-                    result["data"]["geolocation"] = ip_result["data"]["geolocation"]
-                if "data" in ip_result and "abuseipdb" in ip_result["data"]:
-                    result["data"]["ip_threat_info"] = ip_result["data"]["abuseipdb"]
-            except:
-                pass
-                
-            # Получаем WHOIS информацию
-            try:
-                # Не всегда доступно, поэтому в try/except
-                import whois
-                domain_info = whois.whois(domain)
-                
-                result["data"]["whois"] = {
-                    "domain_name": domain_info.domain_name,
-                    "registrar": domain_info.registrar,
-                    "creation_date": str(domain_info.creation_date),
-                    "expiration_date": str(domain_info.expiration_date),
-                    "updated_date": str(domain_info.updated_date),
-                    "name_servers": domain_info.name_servers
-                }
-                
-                result["found"] = True
-            except Exception:
-                pass
+            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+                ip_future = executor.submit(self._lookup_domain_ip, domain)
+                whois_future = executor.submit(self._lookup_whois, domain)
+                ssl_future = executor.submit(self._lookup_ssl_certificate, domain)
                 
-            # Проверяем SSL-сертификат
-            try:
-                import ssl
-                import socket
-                from datetime import datetime
+                result["data"].update(ip_future.result())
                 
-                context = ssl.create_default_context()
-                with socket.create_connection((domain, 443)) as sock:
-                    with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                        cert = ssock.getpeercert()
-                        
-                        # Извлекаем информацию о сертификате
-                        issued_to = dict(x[0] for x in cert['subject'])
-                        issued_by = dict(x[0] for x in cert['issuer'])
-                        
-                        # Даты действия
-                        not_before = datetime.strptime(cert['notBefore'], '%b %d %H:%M:%S %Y %Z')
-                        not_after = datetime.strptime(cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                        
-                        result["data"]["ssl_certificate"] = {
-                            "issued_to": issued_to.get('commonName'),
-                            "issued_by": issued_by.get('commonName'),
-                            "valid_from": not_before.strftime('%Y-%m-%d'),
-                            "valid_until": not_after.strftime('%Y-%m-%d'),
-                            "is_valid": datetime.now() < not_after and datetime.now() > not_before
-                        }
-            except Exception:
-                pass
+                whois_data = whois_future.result()
+                if whois_data is not None:
+                    result["data"]["whois"] = whois_data
+                    result["found"] = True
+                    
+                ssl_data = ssl_future.result()
+                if ssl_data is not None:
+                    result["data"]["ssl_certificate"] = ssl_data
                 
             return result
         except Exception as e:
@@ -1303,9 +2511,9 @@ class OSINTService:
             result["error"] = str(e)
             return result
     
-    def _get_hash_threat_data(self, file_hash: str, hash_type: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    def _fetch_hash_threat_data(self, file_hash: str, hash_type: str, result: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Получает данные об угрозах для хэша файла
+        Запрашивает данные об угрозах для хэша файла
         
         Args:
             file_hash: Хэш файла
@@ -1323,14 +2531,23 @@ class OSINTService:
                 result["error"] = "API ключ VirusTotal не указан"
                 return result
                 
+            # Пока действует ограничение частоты, VirusTotal не запрашиваем
+            if self._rate_limit_deadline("VirusTotal"):
+                return self._mark_rate_limited(result, "VirusTotal")
+                
             headers = {
                 "x-apikey": api_key
             }
             
-            response = requests.get(
+            response = self.session.get(
                 f"https://www.virustotal.com/api/v3/files/{file_hash}",
-                headers=headers
+                headers=headers,
+                timeout=HTTP_TIMEOUT
             )
+            self._check_rate_limit("VirusTotal", response)
+            
+            if response.status_code == 429:
+                return self._mark_rate_limited(result, "VirusTotal")
             
             if response.status_code == 200:
                 vt_data = response.json().get("data", {})
@@ -1365,6 +2582,58 @@ class OSINTService:
             result["error"] = str(e)
             return result
     
+    def _check_safebrowsing(self, url: str, api_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Проверяет URL через API Google Safe Browsing
+        
+        Args:
+            url: URL
+            api_key: Ключ API Safe Browsing
+            
+        Returns:
+            Optional[Dict[str, Any]]: Найденные данные или None, если ответ не получен
+        """
+        # Создаем запрос
+        payload = {
+            "client": {
+                "clientId": "cybersec-consultant",
+                "clientVersion": "1.0"
+            },
+            "threatInfo": {
+                "threatTypes": ["MALWARE", "SOCIAL_ENGINEERING", "UNWANTED_SOFTWARE", "POTENTIALLY_HARMFUL_APPLICATION"],
+                "platformTypes": ["ANY_PLATFORM"],
+                "threatEntryTypes": ["URL"],
+                "threatEntries": [
+                    {"url": url}
+                ]
+            }
+        }
+        
+        response = self.session.post(
+            f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={api_key}",
+            json=payload,
+            timeout=HTTP_TIMEOUT
+        )
+        
+        if response.status_code != 200:
+            return None
+            
+        sb_data = response.json()
+        
+        if "matches" in sb_data and sb_data["matches"]:
+            return {
+                "safebrowsing": {
+                    "threats": sb_data["matches"]
+                },
+                "threat_status": "Обнаружены угрозы в Safe Browsing"
+            }
+        return {
+            "safebrowsing": {
+                "threats": []
+            },
+            "threat_status": "Угроз не обнаружено в Safe Browsing"
+        }
+    
     def _get_url_threat_data(self, url: str, result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Получает данные об угрозах для URL
@@ -1390,51 +2659,29 @@ class OSINTService:
                 "query": parsed_url.query
             }
             
-            # Дополняем информацией о домене
-            if domain:
-                domain_result = self._get_domain_threat_data(domain, {"data": {}})
-                if "data" in domain_result:
-                    for key, value in domain_result["data"].items():
-                        result["data"][key] = value
-                        
             # Используем API SafeBrowsing для проверки URL
             api_key = os.environ.get("SAFEBROWSING_API_KEY", "")
             
-            if api_key:
-                # Создаем запрос
-                payload = {
-                    "client": {
-                        "clientId": "cybersec-consultant",
-                        "clientVersion": "1.0"
-                    },
-                    "threatInfo": {
-                        "threatTypes": ["MALWARE", "SOCIAL_ENGINEERING", "UNWANTED_SOFTWARE", "POTENTIALLY_HARMFUL_APPLICATION"],
-                        "platformTypes": ["ANY_PLATFORM"],
-                        "threatEntryTypes": ["URL"],
-                        "threatEntries": [
-                            {"url": url}
-                        ]
-                    }
-                }
-                
-                response = requests.post(
-                    f"https://safebrowsing.googleapis.com/v4/threatMatches:find?key={api_key}",
-                    json=payload
-                )
-                
-                if response.status_code == 200:
-                    sb_data = response.json()
-                    
-                    if "matches" in sb_data and sb_data["matches"]:
-                        result["data"]["safebrowsing"] = {
-                            "threats": sb_data["matches"]
-                        }
-                        result["data"]["threat_status"] = "Обнаружены угрозы в Safe Browsing"
-                    else:
-                        result["data"]["safebrowsing"] = {
-                            "threats": []
-                        }
-                        result["data"]["threat_status"] = "Угроз не обнаружено в Safe Browsing"
+            # Проверка домена и запрос к SafeBrowsing выполняются одновременно
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                domain_future = executor.submit(
+                    self._get_domain_threat_data, domain, {"data": {}}
+                ) if domain else None
+                sb_future = executor.submit(
+                    self._check_safebrowsing, url, api_key
+                ) if api_key else None
+                
+                # Дополняем информацией о домене
+                if domain_future is not None:
+                    domain_result = domain_future.result()
+                    if "data" in domain_result:
+                        for key, value in domain_result["data"].items():
+                            result["data"][key] = value
+                            
+                if sb_future is not None:
+                    sb_data = sb_future.result()
+                    if sb_data is not None:
+                        result["data"].update(sb_data)
                         
             result["found"] = True
             return result
@@ -1456,57 +2703,69 @@ class OSINTService:
         """
         # Базовый анализ текста
         try:
-            import re
-            
             # Ищем потенциальные индикаторы угроз в тексте
-            indicators = {
-                "ips": re.findall(r"\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\b", text),
-                "domains": re.findall(r"\b(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]{2,}\b", text),
-                "md5": re.findall(r"\b[a-fA-F0-9]{32}\b", text),
-                "sha1": re.findall(r"\b[a-fA-F0-9]{40}\b", text),
-                "sha256": re.findall(r"\b[a-fA-F0-9]{64}\b", text),
-                "urls": re.findall(r"https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+", text)
-            }
-            
-            # Удаляем дубликаты
-            for key in indicators:
-                indicators[key] = list(set(indicators[key]))
+            # Словари служат упорядоченными множествами: повторы отбрасываются
+            # сразу, а индикаторы остаются в порядке появления в тексте
+            found = {indicator_type: {} for indicator_type in _TEXT_INDICATOR_TYPES}
+            
+            for match in _TEXT_INDICATORS_RE.finditer(text):
+                indicator_type = match.lastgroup
+                value = match.group()
+                found[indicator_type][value] = None
+                
+                # IP-адрес или хэш в составе доменного имени тоже считается индикатором
+                if indicator_type == "domains":
+                    for part_type, pattern in _DOMAIN_PART_PATTERNS:
+                        for part in pattern.findall(value):
+                            found[part_type][part] = None
+                
+                # Адрес внутри URL тоже считается отдельным индикатором
+                if indicator_type == "urls":
+                    host = value.split("://", 1)[1]
+                    for query_type, pattern in _QUERY_TYPE_PATTERNS:
+                        if pattern.fullmatch(host):
+                            found["ips" if query_type == "ip" else "domains"][host] = None
+                            break
+            
+            indicators = {key: list(values) for key, values in found.items()}
                 
             result["data"]["indicators"] = indicators
             
-            # Анализируем первые найденные индикаторы
-            for indicator_type, values in indicators.items():
-                if values:
-                    if indicator_type == "ips" and values[0]:
-                        ip_result = self._get_ip_threat_data(values[0], {"data": {}})
-                        if "data" in ip_result:
-                            result["data"]["ip_analysis"] = {
-                                "ip": values[0],
-                                "data": ip_result["data"]
-                            }
-                    elif indicator_type == "domains" and values[0]:
-                        domain_result = self._get_domain_threat_data(values[0], {"data": {}})
-                        if "data" in domain_result:
-                            result["data"]["domain_analysis"] = {
-                                "domain": values[0],
-                                "data": domain_result["data"]
-                            }
-                    elif indicator_type in ["md5", "sha1", "sha256"] and values[0]:
-                        hash_type = indicator_type
-                        hash_result = self._get_hash_threat_data(values[0], hash_type, {"data": {}})
-                        if "data" in hash_result:
-                            result["data"]["hash_analysis"] = {
-                                "hash": values[0],
-                                "type": hash_type,
-                                "data": hash_result["data"]
-                            }
-                    elif indicator_type == "urls" and values[0]:
-                        url_result = self._get_url_threat_data(values[0], {"data": {}})
-                        if "data" in url_result:
-                            result["data"]["url_analysis"] = {
-                                "url": values[0],
-                                "data": url_result["data"]
-                            }
+            # Анализируем первые найденные индикаторы; запросы к внешним
+            # сервисам независимы, поэтому выполняются одновременно
+            lookups = []
+            
+            if indicators["ips"]:
+                ip = indicators["ips"][0]
+                lookups.append(("ip_analysis", {"ip": ip}, self._get_ip_threat_data, (ip,)))
+            if indicators["domains"]:
+                domain = indicators["domains"][0]
+                lookups.append(("domain_analysis", {"domain": domain}, self._get_domain_threat_data, (domain,)))
+                
+            # Из хэшей анализируется самый длинный найденный тип
+            for hash_type in ("sha256", "sha1", "md5"):
+                if indicators[hash_type]:
+                    file_hash = indicators[hash_type][0]
+                    lookups.append((
+                        "hash_analysis", {"hash": file_hash, "type": hash_type},
+                        self._get_hash_threat_data, (file_hash, hash_type)
+                    ))
+                    break
+                    
+            if indicators["urls"]:
+                url = indicators["urls"][0]
+                lookups.append(("url_analysis", {"url": url}, self._get_url_threat_data, (url,)))
+                
+            if lookups:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=len(lookups)) as executor:
+                    futures = [
+                        (key, details, executor.submit(lookup, *args, {"data": {}}))
+                        for key, details, lookup, args in lookups
+                    ]
+                    for key, details, future in futures:
+                        lookup_result = future.result()
+                        if "data" in lookup_result:
+                            result["data"][key] = dict(details, data=lookup_result["data"])
                             
             result["found"] = True
             return result
@@ -4,22 +4,136 @@
 """
 
 import os
-import math
-import pickle
+import json
 import time
 import re
+import hashlib
+import itertools
+import threading
+import multiprocessing
+import concurrent.futures
 import numpy as np
-from collections import Counter
+from functools import lru_cache
 
-from cybersec_consultant.config import ConfigManager, INDICES_DIR
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+from cybersec_consultant.config import get_config_manager, INDICES_DIR
 from cybersec_consultant.state_management import STATE
+from cybersec_consultant.cache_manager import LRUCache
 from cybersec_consultant.embeddings import VectorSearchManager
 from cybersec_consultant.utils.text_processing import TextProcessor
 
+# Сглаживающая константа Reciprocal Rank Fusion
+RRF_K = 60
+
+# Каталог BM25 индекса внутри каталога гибридного индекса и его файлы
+BM25_DIR = "bm25"
+BM25_PARAMS_FILE = "params.json"
+BM25_VOCAB_FILE = "vocab.json"
+BM25_ARRAYS = ("idf_vec", "doc_len", "term_ptr", "term_docs", "term_weights")
+
+# Начиная с этого размера корпуса документы при обучении BM25 токенизируются
+# в нескольких процессах, и размер пакета документов для одного процесса.
+# Дочерние процессы запускаются заново (forkserver/spawn) и импортируют модуль
+# вместе с векторным поиском, поэтому пул окупается только на больших корпусах
+PARALLEL_TOKENIZE_MIN_DOCS = 50000
+TOKENIZE_CHUNKSIZE = 512
+
+# Шаблон слова для токенизации
+_WORD_RE = re.compile(r'\b\w+\b')
+
+_text_processor = TextProcessor()
+
+
+def _tokenize_text(text, stopwords):
+    """
+    Токенизирует текст (функция уровня модуля, чтобы ее можно было
+    передавать в дочерние процессы)
+    
+    Args:
+        text (str): Текст для токенизации
+        stopwords (frozenset): Стоп-слова
+        
+    Returns:
+        tuple: Токены
+    """
+    # Очищаем текст (clean_text уже приводит его к нижнему регистру)
+    text = _text_processor.clean_text(text)
+    # Токенизируем
+    tokens = _WORD_RE.findall(text)
+    # Фильтруем стоп-слова
+    return tuple(token for token in tokens if token not in stopwords)
+
+
+def _corpus_digest(documents):
+    """
+    Вычисляет отпечаток корпуса: по нему сохраненный BM25 индекс
+    сопоставляется с документами векторного индекса
+    
+    Args:
+        documents (list): Документы корпуса
+        
+    Returns:
+        str: Хэш текстов документов в их порядке
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for doc in documents:
+        hasher.update(doc.page_content.encode("utf-8"))
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+@lru_cache(maxsize=8192)
+def _tokenize_cached(text, stopwords):
+    """
+    Токенизирует текст с кэшированием результата
+    
+    Args:
+        text (str): Текст для токенизации
+        stopwords (frozenset): Стоп-слова (frozenset, чтобы аргумент был хешируемым)
+        
+    Returns:
+        tuple: Токены (кортеж, чтобы закэшированный результат нельзя было изменить)
+    """
+    return _tokenize_text(text, stopwords)
+
+
+if NUMBA_AVAILABLE:
+    @numba.njit(fastmath=True, cache=True)
+    def _bm25_scores_numba(query_term_ids, idf_vec, term_ptr, term_docs, term_weights, n_docs):
+        """
+        Компилируемое ядро расчета оценок BM25 по инвертированному индексу
+        
+        Args:
+            query_term_ids (np.ndarray): Номера терминов запроса
+            idf_vec (np.ndarray): IDF терминов
+            term_ptr (np.ndarray): Границы списков документов терминов
+            term_docs (np.ndarray): Номера документов
+            term_weights (np.ndarray): Предрассчитанные веса пар (термин, документ)
+            n_docs (int): Количество документов
+            
+        Returns:
+            np.ndarray: Оценки документов
+        """
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for i in range(query_term_ids.shape[0]):
+            term_id = query_term_ids[i]
+            idf = idf_vec[term_id]
+            for j in range(term_ptr[term_id], term_ptr[term_id + 1]):
+                scores[term_docs[j]] += idf * term_weights[j]
+        return scores
+
 
 class BM25:
     """Класс для реализации алгоритма BM25"""
 
+    # Версия формата сохраненного индекса: индексы других версий пересоздаются при загрузке
+    FORMAT_VERSION = 4
+
     def __init__(self, k1=1.5, b=0.75):
         """
         Инициализация модели BM25
@@ -30,12 +144,22 @@ class BM25:
         """
         self.k1 = k1
         self.b = b
-        self.corpus = []
-        self.doc_freqs = Counter()
-        self.idf = {}
-        self.doc_len = []
+        self.n_docs = 0
+        # Отпечаток корпуса, на котором обучен индекс (номера документов в
+        # индексе - это номера строк именно этого корпуса)
+        self.corpus_digest = None
+        self.doc_len = np.zeros(0, dtype=np.float32)
         self.avgdl = 0
         self.text_processor = TextProcessor()
+        self.stopwords = self.text_processor.stopwords
+        
+        # Инвертированный индекс в виде массивов NumPy: документы и веса
+        # термина с номером t лежат в term_docs/term_weights[term_ptr[t]:term_ptr[t + 1]]
+        self.vocab = {}
+        self.idf_vec = np.zeros(0, dtype=np.float32)
+        self.term_ptr = np.zeros(1, dtype=np.int64)
+        self.term_docs = np.zeros(0, dtype=np.int32)
+        self.term_weights = np.zeros(0, dtype=np.float32)
         
     def _tokenize(self, text):
         """
@@ -45,15 +169,40 @@ class BM25:
             text (str): Текст для токенизации
             
         Returns:
-            list: Список токенов
+            tuple: Токены
+        """
+        return _tokenize_cached(text, self.stopwords)
+        
+    def _tokenize_corpus(self, texts):
+        """
+        Токенизирует тексты корпуса, для больших корпусов - в нескольких процессах
+        
+        Args:
+            texts (list): Тексты документов
+            
+        Returns:
+            list: Токены каждого документа
         """
-        # Очищаем текст
-        text = self.text_processor.clean_text(text)
-        # Токенизируем
-        tokens = re.findall(r'\b\w+\b', text.lower())
-        # Фильтруем стоп-слова
-        tokens = [token for token in tokens if token not in self.text_processor.stopwords]
-        return tokens
+        # Тексты корпуса токенизируются один раз, поэтому кэш запросов не используется.
+        # В фоновом потоке (обучение при загрузке индекса) пул не создается: поток-демон
+        # может быть прерван при выходе из программы посреди работы пула
+        if (len(texts) >= PARALLEL_TOKENIZE_MIN_DOCS and (os.cpu_count() or 1) > 1
+                and threading.current_thread() is threading.main_thread()):
+            try:
+                # fork из процесса с потоками (логирование, поиск) может зависнуть,
+                # поэтому процессы запускаются через forkserver, а где его нет - через spawn
+                start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                with concurrent.futures.ProcessPoolExecutor(
+                    mp_context=multiprocessing.get_context(start_method)
+                ) as executor:
+                    return list(executor.map(
+                        _tokenize_text, texts, itertools.repeat(self.stopwords),
+                        chunksize=TOKENIZE_CHUNKSIZE
+                    ))
+            except (OSError, concurrent.futures.BrokenExecutor) as e:
+                print(f"⚠️ Не удалось токенизировать корпус в нескольких процессах: {str(e)}")
+        
+        return [_tokenize_text(text, self.stopwords) for text in texts]
         
     def fit(self, documents):
         """
@@ -62,105 +211,219 @@ class BM25:
         Args:
             documents (list): Список документов (объектов Document)
         """
-        # Получаем список содержимого документов
-        self.corpus = [doc.page_content for doc in documents]
-        
-        # Токенизируем документы
-        tokenized_corpus = [self._tokenize(doc) for doc in self.corpus]
-        
-        # Вычисляем длины документов
-        self.doc_len = [len(tokens) for tokens in tokenized_corpus]
-        self.avgdl = sum(self.doc_len) / len(self.doc_len) if self.doc_len else 0
-        
-        # Вычисляем частоту терминов в документах
-        for tokens in tokenized_corpus:
-            for token in set(tokens):
-                self.doc_freqs[token] += 1
+        # Токенизируем содержимое документов
+        tokenized_corpus = self._tokenize_corpus([doc.page_content for doc in documents])
+        self.n_docs = len(tokenized_corpus)
+        self.corpus_digest = _corpus_digest(documents)
+        
+        # Вычисляем длины документов: точные целые для подсчета токенов
+        # (сумма float32 теряет точность начиная с 2^24 токенов) и float32 для формулы
+        lengths = np.fromiter((len(tokens) for tokens in tokenized_corpus), dtype=np.int64, count=self.n_docs)
+        self.doc_len = lengths.astype(np.float32)
+        self.avgdl = float(lengths.mean()) if self.n_docs else 0
+        
+        # Номера терминов всех токенов корпуса подряд и номера их документов
+        self.vocab = {}
+        vocab_setdefault = self.vocab.setdefault
+        token_ids = np.fromiter(
+            (vocab_setdefault(token, len(self.vocab)) for tokens in tokenized_corpus for token in tokens),
+            dtype=np.int64, count=int(lengths.sum())
+        )
+        token_docs = np.repeat(np.arange(self.n_docs, dtype=np.int64), lengths)
+        
+        # Одна сортировка пар (термин, документ) дает сразу частоты терминов в
+        # документах (число повторов пары) и группировку по терминам с
+        # документами по возрастанию внутри термина
+        n_docs = max(self.n_docs, 1)
+        pairs, term_tf = np.unique(token_ids * n_docs + token_docs, return_counts=True)
+        term_ids = pairs // n_docs
+        self.term_docs = (pairs % n_docs).astype(np.int32)
+        term_tf = term_tf.astype(np.float32)
+        
+        # Документная частота термина - число его пар
+        self.term_ptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)), out=self.term_ptr[1:])
+        
+        # Часть знаменателя BM25, зависящая только от длины документа
+        avgdl = self.avgdl or 1.0
+        len_norm = (self.k1 * (1 - self.b + self.b * self.doc_len / avgdl)).astype(np.float32)
+        
+        # Вся часть формулы BM25, кроме IDF, от запроса не зависит:
+        # tf * (k1 + 1) / (tf + len_norm) считаем один раз для каждой пары
+        self.term_weights = term_tf * (self.k1 + 1) / (term_tf + len_norm[self.term_docs])
         
         # Вычисляем IDF для каждого термина
         self._compute_idf()
     
     def _compute_idf(self):
         """Вычисляет IDF для всех терминов в корпусе"""
-        N = len(self.corpus)
-        for term, n in self.doc_freqs.items():
-            # BM25 IDF формула
-            self.idf[term] = math.log((N - n + 0.5) / (n + 0.5) + 1)
+        N = self.n_docs
+        # Документная частота термина равна длине его списка документов
+        freqs = np.diff(self.term_ptr)
+        
+        # BM25 IDF формула: log(1 + (N - n + 0.5) / (n + 0.5)) сразу для всех терминов
+        self.idf_vec = np.log1p((N - freqs + 0.5) / (freqs + 0.5)).astype(np.float32)
     
-    def search(self, query, top_k=10):
+    def get_scores(self, query_tokens):
         """
-        Выполняет поиск документов по запросу с использованием BM25
+        Вычисляет оценки BM25 запроса сразу для всех документов
         
         Args:
-            query (str): Поисковый запрос
-            top_k (int): Количество результатов
+            query_tokens (list): Токены запроса
             
         Returns:
-            list: Список кортежей (индекс_документа, оценка)
+            np.ndarray: Оценки документов
         """
-        # Токенизируем запрос
-        query_tokens = self._tokenize(query)
-        
-        # Вычисляем оценки BM25 для всех документов
-        scores = [self._score(query_tokens, i) for i in range(len(self.corpus))]
+        # Повторяющийся в запросе термин учитывается столько раз, сколько встречается;
+        # неизвестные термины получают номер -1 и отбрасываются маской
+        query_term_ids = np.fromiter(
+            (self.vocab.get(token, -1) for token in query_tokens),
+            dtype=np.int64, count=len(query_tokens)
+        )
+        query_term_ids = query_term_ids[query_term_ids >= 0]
+        
+        if NUMBA_AVAILABLE:
+            return _bm25_scores_numba(
+                query_term_ids, self.idf_vec,
+                self.term_ptr, self.term_docs, self.term_weights, self.n_docs
+            )
+        
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term_id in query_term_ids:
+            # Только документы, содержащие термин: у остальных вклад нулевой
+            start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+            docs = self.term_docs[start:end]
+            
+            # BM25 формула: веса документов уже посчитаны в fit
+            scores[docs] += self.idf_vec[term_id] * self.term_weights[start:end]
         
-        # Сортируем результаты по оценке
-        top_docs = sorted(enumerate(scores), key=lambda x: x[1], reverse=True)[:top_k]
+        return scores
+    
+    def save(self, directory):
+        """
+        Сохраняет индекс в виде массивов NumPy и JSON
         
-        return top_docs
+        Args:
+            directory (str): Каталог для файлов индекса
+        """
+        os.makedirs(directory, exist_ok=True)
+        
+        for name in BM25_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        
+        # Термины в порядке их номеров
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(directory, BM25_VOCAB_FILE), 'w', encoding='utf-8') as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        
+        # Параметры пишем последними: по ним определяется, что индекс сохранен целиком
+        params = {
+            "format_version": self.FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "avgdl": self.avgdl,
+            "n_docs": self.n_docs,
+            "corpus_digest": self.corpus_digest,
+        }
+        with open(os.path.join(directory, BM25_PARAMS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(params, f)
     
-    def _score(self, query_tokens, doc_idx):
+    @classmethod
+    def load(cls, directory):
         """
-        Вычисляет оценку BM25 для документа
+        Загружает индекс, сохраненный методом save
         
         Args:
-            query_tokens (list): Токены запроса
-            doc_idx (int): Индекс документа
+            directory (str): Каталог с файлами индекса
             
         Returns:
-            float: Оценка BM25
+            BM25: Загруженная модель или None, если индекс отсутствует или устарел
         """
-        # Если нет токенов в запросе, возвращаем 0
-        if not query_tokens:
-            return 0
+        params_path = os.path.join(directory, BM25_PARAMS_FILE)
+        if not os.path.exists(params_path):
+            return None
+            
+        with open(params_path, 'r', encoding='utf-8') as f:
+            params = json.load(f)
+        if params.get("format_version") != cls.FORMAT_VERSION:
+            return None
+            
+        bm25 = cls(k1=params["k1"], b=params["b"])
+        bm25.avgdl = params["avgdl"]
+        bm25.n_docs = params["n_docs"]
+        bm25.corpus_digest = params.get("corpus_digest")
         
-        # Токенизируем документ
-        doc_tokens = self._tokenize(self.corpus[doc_idx])
+        # Массивы отображаются в память, а не разбираются в объекты Python
+        for name in BM25_ARRAYS:
+            setattr(bm25, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r'))
         
-        # Вычисляем частоту терминов в документе
-        freq = Counter(doc_tokens)
+        with open(os.path.join(directory, BM25_VOCAB_FILE), 'r', encoding='utf-8') as f:
+            bm25.vocab = {term: term_id for term_id, term in enumerate(json.load(f))}
         
-        # Длина документа
-        doc_len = self.doc_len[doc_idx]
+        return bm25
+    
+    def matches(self, documents):
+        """
+        Проверяет, обучен ли индекс на этих документах в этом порядке
         
-        # Вычисляем оценку BM25
-        score = 0.0
-        for token in query_tokens:
-            if token not in self.idf:
-                continue
-                
-            # Получаем IDF для термина
-            idf = self.idf[token]
+        Args:
+            documents (list): Документы корпуса
             
-            # Получаем частоту термина в документе
-            term_freq = freq[token]
+        Returns:
+            bool: True, если номера документов индекса соответствуют корпусу
+        """
+        return self.n_docs == len(documents) and self.corpus_digest == _corpus_digest(documents)
+    
+    def search(self, query, top_k=10):
+        """
+        Выполняет поиск документов по запросу с использованием BM25
+        
+        Args:
+            query (str): Поисковый запрос
+            top_k (int): Количество результатов
             
-            # BM25 формула
-            numerator = idf * term_freq * (self.k1 + 1)
-            denominator = term_freq + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-            score += numerator / denominator
+        Returns:
+            list: Список кортежей (индекс_документа, оценка)
+        """
+        # Токенизируем запрос
+        query_tokens = self._tokenize(query)
+        
+        # Вычисляем оценки BM25 для всех документов
+        scores = self.get_scores(query_tokens)
         
-        return score
+        # Выбираем top-k без полной сортировки всех документов
+        top_k = min(top_k, len(scores))
+        if top_k <= 0:
+            return []
+        top_idx = np.argpartition(-scores, top_k - 1)[:top_k]
+        top_idx = top_idx[np.lexsort((top_idx, -scores[top_idx]))]
+        
+        return [(int(idx), float(scores[idx])) for idx in top_idx]
 
 
 class HybridSearchManager:
     """Класс для управления гибридным поиском (BM25 + векторный)"""
     
+    # Загруженные BM25 индексы, общие для всех экземпляров:
+    # (имя индекса, время изменения файлов индекса) -> BM25
+    _BM25_CACHE = LRUCache(maxsize=3)
+    
+    # Пул для одновременного выполнения векторного и BM25 поиска, общий для всех
+    # экземпляров: потоки создаются по мере надобности и не накапливаются при
+    # повторном создании менеджера
+    _SEARCH_EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+        max_workers=4, thread_name_prefix="hybrid-search"
+    )
+    
     def __init__(self):
         """Инициализация менеджера гибридного поиска"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         self.vector_search = VectorSearchManager()
         self.bm25 = BM25()
+        # Поток фонового обучения BM25 (пока он работает, self.bm25 равен None)
+        self._bm25_thread = None
+        # Ошибка фонового обучения BM25 (индекс будет обучен заново при следующей загрузке)
+        self._bm25_error = None
         self.documents = []
         
         # Вес для смешивания результатов (0 = только BM25, 1 = только векторный поиск)
@@ -183,7 +446,7 @@ class HybridSearchManager:
             
         print(f"🔄 Создаем гибридный индекс из {len(documents)} документов...")
         
-        # Сохраняем документы
+        # Сохраняем документы (номера документов совпадают с номерами строк векторного индекса)
         self.documents = documents
         
         try:
@@ -197,12 +460,15 @@ class HybridSearchManager:
                 
             # 2. Создаем BM25 индекс
             print("🔄 Создаем BM25 индекс...")
+            self._bm25_thread = None
+            self._bm25_error = None
+            self.bm25 = BM25()
             self.bm25.fit(documents)
             
             # 3. Сохраняем BM25 индекс
-            bm25_path = os.path.join(INDICES_DIR, index_name, "bm25.pkl")
-            with open(bm25_path, 'wb') as f:
-                pickle.dump(self.bm25, f)
+            bm25_dir = os.path.join(INDICES_DIR, index_name, BM25_DIR)
+            self.bm25.save(bm25_dir)
+            self._BM25_CACHE[(index_name, self._get_bm25_mtime(bm25_dir))] = self.bm25
             
             elapsed_time = time.time() - start_time
             print(f"✅ Гибридный индекс '{index_name}' успешно создан за {elapsed_time:.2f} секунд.")
@@ -233,24 +499,40 @@ class HybridSearchManager:
                 print("❌ Не удалось загрузить векторный индекс")
                 return False
             
-            # 2. Загружаем документы
-            docs_path = os.path.join(INDICES_DIR, index_name, "documents.pkl")
-            with open(docs_path, 'rb') as f:
-                self.documents = pickle.load(f)
+            # 2. Получаем документы векторного индекса
+            self.documents = STATE.vector_documents
             
             # 3. Загружаем BM25 индекс
-            bm25_path = os.path.join(INDICES_DIR, index_name, "bm25.pkl")
-            if os.path.exists(bm25_path):
-                with open(bm25_path, 'rb') as f:
-                    self.bm25 = pickle.load(f)
+            bm25_dir = os.path.join(INDICES_DIR, index_name, BM25_DIR)
+            cache_key = (index_name, self._get_bm25_mtime(bm25_dir))
+            bm25 = self._BM25_CACHE.get(cache_key)
+            if bm25 is None:
+                bm25 = BM25.load(bm25_dir)
+                if bm25 is not None:
+                    self._BM25_CACHE[cache_key] = bm25
+            
+            # Векторный индекс мог быть пересоздан без BM25 (например, после
+            # обогащения базы знаний): номера документов BM25 тогда ссылаются
+            # на другие документы, и индекс нужно обучить заново
+            if bm25 is not None and not bm25.matches(self.documents):
+                print("⚠️ BM25 индекс построен для другого набора документов")
+                self._BM25_CACHE.pop(cache_key, None)
+                bm25 = None
+            
+            self._bm25_error = None
+            if bm25 is not None:
+                self._bm25_thread = None
+                self.bm25 = bm25
             else:
-                # Если BM25 индекс не существует, создаем его
-                print("⚠️ BM25 индекс не найден. Создаем новый...")
-                self.bm25.fit(self.documents)
-                
-                # Сохраняем BM25 индекс
-                with open(bm25_path, 'wb') as f:
-                    pickle.dump(self.bm25, f)
+                # Если BM25 индекс не существует или устарел, создаем его в фоне,
+                # а до готовности поиск выполняется только по векторному индексу
+                print("⚠️ BM25 индекс не найден или устарел. Создаем новый в фоновом режиме...")
+                self.bm25 = None
+                self._bm25_thread = threading.Thread(
+                    target=self._fit_and_save_bm25, args=(index_name, self.documents),
+                    name="bm25-fit", daemon=True
+                )
+                self._bm25_thread.start()
             
             elapsed_time = time.time() - start_time
             print(f"✅ Гибридный индекс '{index_name}' успешно загружен за {elapsed_time:.2f} секунд.")
@@ -260,6 +542,48 @@ class HybridSearchManager:
             print(f"❌ Ошибка при загрузке гибридного индекса: {str(e)}")
             return False
     
+    def _fit_and_save_bm25(self, index_name, documents):
+        """
+        Обучает и сохраняет BM25 индекс (выполняется в фоновом потоке)
+        
+        Args:
+            index_name (str): Имя индекса
+            documents (list): Документы для индексации
+        """
+        try:
+            bm25 = BM25()
+            bm25.fit(documents)
+            
+            bm25_dir = os.path.join(INDICES_DIR, index_name, BM25_DIR)
+            bm25.save(bm25_dir)
+            self._BM25_CACHE[(index_name, self._get_bm25_mtime(bm25_dir))] = bm25
+            
+            # Индекс мог быть пересоздан или загружен заново, пока шло обучение
+            if self._bm25_thread is threading.current_thread():
+                self.bm25 = bm25
+                print(f"✅ BM25 индекс '{index_name}' готов, гибридный поиск включен")
+        except Exception as e:
+            print(f"❌ Ошибка при создании BM25 индекса: {str(e)}")
+            if self._bm25_thread is threading.current_thread():
+                self._bm25_error = str(e)
+                self._bm25_thread = None
+    
+    @staticmethod
+    def _get_bm25_mtime(bm25_dir):
+        """
+        Возвращает время изменения сохраненного BM25 индекса
+        
+        Args:
+            bm25_dir (str): Каталог BM25 индекса
+            
+        Returns:
+            int: Время изменения файла параметров (записывается последним) или None
+        """
+        try:
+            return os.stat(os.path.join(bm25_dir, BM25_PARAMS_FILE)).st_mtime_ns
+        except OSError:
+            return None
+    
     def hybrid_search(self, query, k=3, use_cache=True, weight=None):
         """
         Выполняет гибридный поиск с использованием BM25 и векторного поиска
@@ -280,8 +604,9 @@ class HybridSearchManager:
         # Используем вес из параметра или из настроек
         hybrid_weight = weight if weight is not None else STATE.hybrid_weight
         
-        # Ищем кэшированные результаты
-        cache_key = f"{query}_{k}_{hybrid_weight}"
+        # Ищем кэшированные результаты. Вес округляется, чтобы значения,
+        # отличающиеся лишь погрешностью float, попадали в одну запись кэша
+        cache_key = (query, round(hybrid_weight, 3))
         cached_results = STATE.get_search_from_cache(cache_key, k) if use_cache else None
         if cached_results:
             print(f"🔄 Найденные документы по запросу: '{query}' (результаты взяты из кэша)")
@@ -292,20 +617,32 @@ class HybridSearchManager:
             print(f"🔍 Гибридный поиск документов по запросу: '{query}' (вес={hybrid_weight:.2f})")
             start_time = time.time()
             
-            # 1. Выполняем векторный поиск
-            vector_results = STATE.vector_db.similarity_search_with_score(query, k=k*2)
-            
-            # 2. Выполняем BM25 поиск
-            bm25_results = self.bm25.search(query, top_k=k*2)
-            
-            # 3. Объединяем результаты с учетом веса
-            combined_results = self._combine_results(vector_results, bm25_results, hybrid_weight, k)
+            bm25 = self.bm25
+            if bm25 is None:
+                # BM25 индекс еще строится или не создан: используем только векторный поиск
+                if self._bm25_error:
+                    print(f"⚠️ BM25 индекс не создан ({self._bm25_error}), используется только векторный поиск")
+                else:
+                    print("⚠️ BM25 индекс еще создается, используется только векторный поиск")
+                vector_results = self.vector_search.search_vector_ids(query, k=k)
+                combined_results = self._combine_results(vector_results, [], 1.0, k)
+            else:
+                # 1. Запускаем векторный и BM25 поиск одновременно: индексы независимы
+                vector_future = self._SEARCH_EXECUTOR.submit(self.vector_search.search_vector_ids, query, k=k*2)
+                bm25_future = self._SEARCH_EXECUTOR.submit(bm25.search, query, top_k=k*2)
+                
+                # 2. Дожидаемся результатов обоих поисков
+                vector_results = vector_future.result()
+                bm25_results = bm25_future.result()
+                
+                # 3. Объединяем результаты с учетом веса
+                combined_results = self._combine_results(vector_results, bm25_results, hybrid_weight, k)
             
             # Измеряем время выполнения
             execution_time = time.time() - start_time
             
-            # Сохраняем результаты в кэш
-            if combined_results and use_cache:
+            # Сохраняем результаты в кэш (результаты без BM25 не кэшируем)
+            if combined_results and use_cache and bm25 is not None:
                 STATE.add_search_to_cache(cache_key, k, combined_results)
             
             print(f"✅ Поиск выполнен за {execution_time:.2f} сек.")
@@ -318,10 +655,10 @@ class HybridSearchManager:
     
     def _combine_results(self, vector_results, bm25_results, weight, k):
         """
-        Объединяет результаты векторного и BM25 поиска
+        Объединяет результаты векторного и BM25 поиска методом Reciprocal Rank Fusion
         
         Args:
-            vector_results (list): Результаты векторного поиска [(документ, оценка), ...]
+            vector_results (list): Результаты векторного поиска [(индекс, оценка), ...]
             bm25_results (list): Результаты BM25 поиска [(индекс, оценка), ...]
             weight (float): Вес для смешивания (0 = только BM25, 1 = только векторный)
             k (int): Количество результатов
@@ -329,57 +666,35 @@ class HybridSearchManager:
         Returns:
             list: Список кортежей (документ, оценка)
         """
-        # Создаем словарь для хранения объединенных оценок
-        combined_scores = {}
-        
-        # Нормализуем оценки векторного поиска (обратная оценка, меньше = лучше)
-        if vector_results:
-            # Инвертируем оценки расстояния (ближе = лучше)
-            vector_scores = [(doc, 1.0 / (1.0 + score)) for doc, score in vector_results]
-            # Нормализуем оценки (0-1)
-            max_vector_score = max(score for _, score in vector_scores)
-            norm_vector_scores = [(doc, score / max_vector_score) for doc, score in vector_scores]
-            
-            # Добавляем нормализованные оценки в общий словарь
-            for doc, score in norm_vector_scores:
-                doc_id = id(doc)  # Используем id объекта документа как ключ
-                if doc_id not in combined_scores:
-                    combined_scores[doc_id] = {"doc": doc, "vector_score": 0, "bm25_score": 0}
-                combined_scores[doc_id]["vector_score"] = score
-        
-        # Нормализуем оценки BM25
-        if bm25_results:
-            # Нормализуем оценки (0-1)
-            max_bm25_score = max(score for _, score in bm25_results) if bm25_results else 1.0
-            if max_bm25_score > 0:  # Избегаем деления на ноль
-                norm_bm25_scores = [(idx, score / max_bm25_score) for idx, score in bm25_results]
-                
-                # Добавляем нормализованные оценки в общий словарь
-                for idx, score in norm_bm25_scores:
-                    doc = self.documents[idx]
-                    doc_id = id(doc)  # Используем id объекта документа как ключ
-                    if doc_id not in combined_scores:
-                        combined_scores[doc_id] = {"doc": doc, "vector_score": 0, "bm25_score": 0}
-                    combined_scores[doc_id]["bm25_score"] = score
-        
-        # Вычисляем окончательную оценку, используя вес для смешивания
-        for doc_id in combined_scores:
-            vector_score = combined_scores[doc_id]["vector_score"]
-            bm25_score = combined_scores[doc_id]["bm25_score"]
-            
-            # Взвешенная комбинация оценок
-            final_score = weight * vector_score + (1 - weight) * bm25_score
-            combined_scores[doc_id]["final_score"] = final_score
-        
-        # Сортируем по финальной оценке и выбираем top-k
-        sorted_results = sorted(
-            combined_scores.values(), 
-            key=lambda x: x["final_score"], 
-            reverse=True
-        )[:k]
+        # Оценка документа зависит только от его позиции в каждом списке:
+        # weight * RRF_K / (RRF_K + ранг). Множитель RRF_K приводит оценку к [0, 1]
+        # (1 - первое место в обоих списках), как у прежней нормализованной оценки.
+        # Оценки накапливаются в массиве, индексированном номером документа корпуса
+        combined_scores = np.zeros(len(self.documents))
+        
+        # Вклад ранга 0, 1, 2, ... одинаков для обоих списков
+        rank_weights = RRF_K / (RRF_K + np.arange(max(len(vector_results), len(bm25_results)), dtype=float))
+        
+        # Векторный поиск возвращает номера строк индекса, совпадающие с номерами
+        # документов корпуса, поэтому одинаковые чанки ранжируются независимо
+        vector_idx = np.fromiter((idx for idx, _ in vector_results), dtype=np.int64, count=len(vector_results))
+        combined_scores[vector_idx] += weight * rank_weights[:len(vector_idx)]
+        
+        # Документы без совпадающих терминов не участвуют в ранжировании
+        bm25_idx = np.fromiter((idx for idx, score in bm25_results if score > 0), dtype=np.int64)
+        combined_scores[bm25_idx] += (1 - weight) * rank_weights[:len(bm25_idx)]
+        
+        # Выбираем top-k среди найденных документов без полной сортировки
+        candidates = np.flatnonzero(combined_scores)
+        top_k = min(k, len(candidates))
+        if top_k <= 0:
+            return []
+        final_scores = combined_scores[candidates]
+        top_idx = np.argpartition(-final_scores, top_k - 1)[:top_k]
+        top_idx = top_idx[np.lexsort((top_idx, -final_scores[top_idx]))]
         
         # Форматируем результат как (документ, оценка)
-        return [(item["doc"], item["final_score"]) for item in sorted_results]
+        return [(self.documents[candidates[idx]], float(final_scores[idx])) for idx in top_idx]
     
     def adjust_weight(self, weight):
         """
@@ -22,6 +22,9 @@ from cybersec_consultant.error_handling import logger, ConfigurationError
 # Путь к директории с ключами
 DEFAULT_KEYS_DIR = os.path.join(os.path.expanduser("~"), ".cybersec_consultant", "keys")
 
+# Начало любого токена Fernet (байт версии 0x80 в URL-safe base64)
+FERNET_TOKEN_PREFIX = "gA"
+
 
 class APIKeyManager:
     """
@@ -41,6 +44,10 @@ class APIKeyManager:
         self.use_encryption = use_encryption
         self.crypto = KeyEncryption()
         self.api_keys = {}
+        # Время изменения файла, из которого загружен ключ (для проверки актуальности)
+        self._key_mtimes = {}
+        # Сервисы, для которых ключ не найден ни на диске, ни в окружении
+        self._negative_cache = set()
         
         # Создаем директорию, если она не существует
         os.makedirs(self.keys_dir, exist_ok=True)
@@ -60,6 +67,8 @@ class APIKeyManager:
             save: Сохранять ли ключ на диск
         """
         self.api_keys[service_name] = api_key
+        self._key_mtimes.pop(service_name, None)
+        self._negative_cache.discard(service_name)
         
         if save:
             self._save_api_key(service_name, api_key)
@@ -74,13 +83,28 @@ class APIKeyManager:
         Returns:
             API ключ или None, если ключ не найден
         """
+        key_file = os.path.join(self.keys_dir, f"{service_name}_api_key.json")
+        env_var_name = f"{service_name.upper()}_API_KEY"
+        
         # Пытаемся получить из памяти
         if service_name in self.api_keys:
-            return self.api_keys[service_name]
+            loaded_mtime = self._key_mtimes.get(service_name)
+            # Ключ из файла актуален, пока файл не изменился
+            if loaded_mtime is None or self._get_mtime(key_file) == loaded_mtime:
+                return self.api_keys[service_name]
+            del self.api_keys[service_name]
+            del self._key_mtimes[service_name]
+        elif service_name in self._negative_cache:
+            # Диск уже проверен: смотрим только переменную окружения
+            env_api_key = os.environ.get(env_var_name)
+            if env_api_key:
+                self._negative_cache.discard(service_name)
+                self.api_keys[service_name] = env_api_key
+            return env_api_key or None
         
         # Пытаемся загрузить с диска
-        key_file = os.path.join(self.keys_dir, f"{service_name}_api_key.json")
-        if os.path.exists(key_file):
+        mtime = self._get_mtime(key_file)
+        if mtime is not None:
             try:
                 with open(key_file, "r") as f:
                     data = json.load(f)
@@ -95,19 +119,37 @@ class APIKeyManager:
                         
                     # Сохраняем в память
                     self.api_keys[service_name] = api_key
+                    self._key_mtimes[service_name] = mtime
                     return api_key
             except Exception as e:
                 logger.error(f"Error loading API key for {service_name}: {str(e)}")
         
         # Пытаемся получить из переменных окружения
-        env_var_name = f"{service_name.upper()}_API_KEY"
         env_api_key = os.environ.get(env_var_name)
         if env_api_key:
             self.api_keys[service_name] = env_api_key
             return env_api_key
-            
+        
+        # Запоминаем, что ключа нет, чтобы не читать диск при каждом вызове
+        self._negative_cache.add(service_name)
         return None
     
+    @staticmethod
+    def _get_mtime(path: str) -> Optional[int]:
+        """
+        Получение времени изменения файла.
+        
+        Args:
+            path: Путь к файлу
+            
+        Returns:
+            Время изменения в наносекундах или None, если файла нет
+        """
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    
     def _save_api_key(self, service_name: str, api_key: str) -> None:
         """
         Сохранение API ключа на диск с опциональным шифрованием.
@@ -163,6 +205,7 @@ class APIKeyManager:
         # Удаляем из памяти
         if service_name in self.api_keys:
             del self.api_keys[service_name]
+        self._key_mtimes.pop(service_name, None)
         
         # Удаляем файл, если он существует
         key_file = os.path.join(self.keys_dir, f"{service_name}_api_key.json")
@@ -234,6 +277,7 @@ class KeyEncryption:
         self.key_file = os.path.join(DEFAULT_KEYS_DIR, ".encryption_key")
         self.salt_file = os.path.join(DEFAULT_KEYS_DIR, ".salt")
         self._encryption_key = None
+        self._fernet = None
     
     def _get_encryption_key(self) -> bytes:
         """
@@ -272,6 +316,17 @@ class KeyEncryption:
             logger.error(f"Error generating encryption key: {str(e)}")
             raise ConfigurationError(f"Failed to generate encryption key: {str(e)}")
     
+    def _get_fernet(self) -> Fernet:
+        """
+        Получение объекта Fernet, создаваемого один раз для ключа шифрования.
+        
+        Returns:
+            Объект Fernet
+        """
+        if self._fernet is None:
+            self._fernet = Fernet(self._get_encryption_key())
+        return self._fernet
+    
     def encrypt(self, data: str) -> str:
         """
         Шифрование данных.
@@ -280,13 +335,10 @@ class KeyEncryption:
             data: Данные для шифрования
             
         Returns:
-            Зашифрованные данные в виде строки base64
+            Токен Fernet (уже закодирован в URL-safe base64)
         """
         try:
-            key = self._get_encryption_key()
-            f = Fernet(key)
-            encrypted_data = f.encrypt(data.encode())
-            return base64.b64encode(encrypted_data).decode()
+            return self._get_fernet().encrypt(data.encode()).decode('ascii')
         except Exception as e:
             logger.error(f"Error encrypting data: {str(e)}")
             raise ConfigurationError(f"Failed to encrypt data: {str(e)}")
@@ -296,16 +348,18 @@ class KeyEncryption:
         Расшифровка данных.
         
         Args:
-            encrypted_data: Зашифрованные данные в виде строки base64
+            encrypted_data: Токен Fernet (или токен, дополнительно закодированный
+                в base64, как сохранялись ключи ранее)
             
         Returns:
             Расшифрованные данные
         """
         try:
-            key = self._get_encryption_key()
-            f = Fernet(key)
-            decrypted_data = f.decrypt(base64.b64decode(encrypted_data))
-            return decrypted_data.decode()
+            token = encrypted_data.encode('ascii')
+            # Ключи, сохраненные ранее, закодированы в base64 повторно
+            if not encrypted_data.startswith(FERNET_TOKEN_PREFIX):
+                token = base64.b64decode(token)
+            return self._get_fernet().decrypt(token).decode()
         except Exception as e:
             logger.error(f"Error decrypting data: {str(e)}")
             raise ConfigurationError(f"Failed to decrypt data: {str(e)}")
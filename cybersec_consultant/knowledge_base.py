@@ -5,31 +5,276 @@
 
 import os
 import re
+import io
+import codecs
+import csv
+import mmap
 import time
 import hashlib
 from datetime import datetime
 from tqdm.auto import tqdm
 import json
+import functools
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
-from cybersec_consultant.config import ConfigManager, DATA_DIR
+try:
+    from semantic_text_splitter import MarkdownSplitter
+    SEMANTIC_SPLITTER_AVAILABLE = True
+except ImportError:
+    SEMANTIC_SPLITTER_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    import charset_normalizer
+    CHARSET_NORMALIZER_AVAILABLE = True
+except ImportError:
+    CHARSET_NORMALIZER_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Библиотеки для чтения PDF и DOCX (PyMuPDF быстрее, PyPDF2 - запасной вариант)
+try:
+    import fitz
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    import PyPDF2
+    PYPDF2_AVAILABLE = True
+except ImportError:
+    PYPDF2_AVAILABLE = False
+
+try:
+    import docx
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+from cybersec_consultant.config import get_config_manager, DATA_DIR
 from cybersec_consultant.state_management import STATE
 
+# Файлы базы знаний начиная с этого размера читаются через mmap
+MMAP_MIN_SIZE = 1024 * 1024
+
+# Чанки короче chunk_size / TINY_CHUNK_DIVISOR объединяются с соседними,
+# пока объединенный чанк не длиннее chunk_size * MERGED_CHUNK_SLACK
+TINY_CHUNK_DIVISOR = 10
+MERGED_CHUNK_SLACK = 1.05
+
+# Версия формата разбиения на чанки: входит в ключ кэша чанков и
+# увеличивается при любом изменении разбиения или определения категорий
+CHUNKING_VERSION = 2
+
+# Токенизатор и модель, по которым считается размер чанков в токенах
+TOKEN_ENCODING = "cl100k_base"
+TOKEN_MODEL = "gpt-3.5-turbo"
+
+# Минимальная длина совпадения конца чанка с началом следующего, которое
+# считается перекрытием (более короткие совпадения могут быть случайными)
+MIN_OVERLAP_MATCH = 20
+
+# Заголовок секции markdown
+_HEADER_RE = re.compile(r'#+\s+(.+?)(?=\n|$)')
+
+# Категории чанков и ключевые слова в заголовках (в порядке приоритета:
+# заголовок относится к первой категории, слово которой в нем найдено)
+_CATEGORY_KEYWORDS = (
+    ("аутентификация", ("аутентификац", "авторизац")),
+    ("шифрование", ("шифрован",)),
+    ("сетевая_безопасность", ("сет", "экран", "ddos")),
+    ("угрозы", ("фишинг", "социальн", "угроз")),
+    ("защита", ("вредонос", "защит")),
+)
+
+# Одно регулярное выражение для всех ключевых слов: группа cN соответствует категории N
+_CATEGORY_RE = re.compile("|".join(
+    f"(?P<c{i}>{'|'.join(keywords)})" for i, (_, keywords) in enumerate(_CATEGORY_KEYWORDS)
+))
+
+# При наличии pyahocorasick ключевые слова ищутся автоматом Ахо-Корасик
+# (значение ключевого слова - номер его категории)
+if AHOCORASICK_AVAILABLE:
+    _CATEGORY_AUTOMATON = ahocorasick.Automaton()
+    for _category_idx, (_, _keywords) in enumerate(_CATEGORY_KEYWORDS):
+        for _keyword in _keywords:
+            _CATEGORY_AUTOMATON.add_word(_keyword, _category_idx)
+    _CATEGORY_AUTOMATON.make_automaton()
+
+
+def _header_category(header_lower):
+    """
+    Определяет категорию заголовка за один проход по его тексту
+
+    Args:
+        header_lower (str): Заголовок секции в нижнем регистре
+
+    Returns:
+        str: Категория или None, если ключевые слова не найдены
+    """
+    if AHOCORASICK_AVAILABLE:
+        matched = [category_idx for _, category_idx in _CATEGORY_AUTOMATON.iter(header_lower)]
+    else:
+        matched = [int(match.lastgroup[1:]) for match in _CATEGORY_RE.finditer(header_lower)]
+    return _CATEGORY_KEYWORDS[min(matched)][0] if matched else None
+
+def _decode_text(file_bytes):
+    """
+    Декодирует текст: UTF-8 (с BOM или без), иначе - определенная по содержимому кодировка
+
+    Args:
+        file_bytes (bytes): Содержимое файла
+
+    Returns:
+        str: Декодированный текст
+    """
+    # Файл с BOM точно в UTF-8: определение кодировки не нужно
+    if file_bytes.startswith(codecs.BOM_UTF8):
+        return file_bytes.decode("utf-8-sig")
+
+    try:
+        return file_bytes.decode("utf-8")
+    except UnicodeDecodeError:
+        # Документы не в UTF-8 (например, cp1251) распознаем по содержимому
+        if not CHARSET_NORMALIZER_AVAILABLE:
+            raise
+        best_match = charset_normalizer.from_bytes(file_bytes).best()
+        if best_match is None:
+            raise
+        return str(best_match)
+
+def _read_text_file(path):
+    """
+    Читает текстовый файл в UTF-8. Большие файлы декодируются напрямую из
+    отображения в память, без промежуточной копии содержимого в виде bytes
+
+    Args:
+        path (str): Путь к файлу
+
+    Returns:
+        str: Содержимое файла
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            text = f.read().decode("utf-8")
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                text = str(view, "utf-8")
+
+    # Переводы строк как при чтении в текстовом режиме
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+@functools.lru_cache(maxsize=1)
+def _get_token_encoding():
+    """Возвращает токенизатор tiktoken (создается один раз)"""
+    return tiktoken.get_encoding(TOKEN_ENCODING)
+
+def _token_length(text):
+    """
+    Считает длину текста в токенах
+
+    Args:
+        text (str): Текст
+
+    Returns:
+        int: Количество токенов
+    """
+    return len(_get_token_encoding().encode(text, disallowed_special=()))
+
+def _overlap_length(prev, chunk, max_overlap):
+    """
+    Находит длину перекрытия: самого длинного конца prev, с которого начинается chunk
+
+    Args:
+        prev (str): Предыдущий чанк
+        chunk (str): Следующий чанк
+        max_overlap (int): Максимальная длина перекрытия в символах (None - без ограничения)
+
+    Returns:
+        int: Длина перекрытия или 0
+    """
+    limit = min(len(prev), len(chunk))
+    if max_overlap is not None:
+        limit = min(limit, max_overlap)
+    for length in range(limit, MIN_OVERLAP_MATCH - 1, -1):
+        if prev.endswith(chunk[:length]):
+            return length
+    return 0
+
+def _merge_tiny_chunks(chunks, min_size, max_size, max_overlap, length_function=len):
+    """
+    Объединяет слишком короткие чанки с соседними за один проход
+
+    Args:
+        chunks (list): Тексты чанков
+        min_size (int): Чанки короче этой длины объединяются с соседними
+        max_size (int): Максимальная длина объединенного чанка
+        max_overlap (int): Перекрытие соседних чанков в символах (в объединенном чанке не повторяется)
+        length_function (callable): Функция длины чанка (символы или токены)
+
+    Returns:
+        list: Тексты чанков после объединения
+    """
+    merged = []
+    merged_lengths = []
+    for chunk in chunks:
+        chunk_length = length_function(chunk)
+        if merged and (chunk_length < min_size or merged_lengths[-1] < min_size):
+            prev = merged[-1]
+            overlap = _overlap_length(prev, chunk, max_overlap)
+            candidate = prev + chunk[overlap:] if overlap else prev + "\n" + chunk
+            candidate_length = length_function(candidate)
+            if candidate_length <= max_size:
+                merged[-1] = candidate
+                merged_lengths[-1] = candidate_length
+                continue
+        merged.append(chunk)
+        merged_lengths.append(chunk_length)
+    return merged
+
+def _classify_chunk(chunk):
+    """
+    Определяет категории чанка по заголовкам секций (функция уровня модуля,
+    чтобы ее можно было передавать в дочерние процессы)
+
+    Args:
+        chunk (str): Текст чанка
+
+    Returns:
+        list: Категории чанка
+    """
+    # Находим заголовки секций в чанке, приведенном к нижнему регистру один раз
+    headers = _HEADER_RE.findall(chunk.lower())
+    categories = []
+
+    # Определяем категории на основе заголовков
+    for header in headers:
+        category = _header_category(header)
+        if category:
+            categories.append(category)
+
+    # Если категории не найдены, используем "общее"
+    return categories or ["общее"]
+
 class DocumentProcessor:
     """Класс для обработки документов различных форматов"""
 
     def __init__(self):
         """Инициализация обработчика документов"""
-        self.supported_formats = {
-            '.txt': self._process_txt,
-            '.csv': self._process_csv,
-            '.pdf': self._process_pdf,
-            '.docx': self._process_docx,
-            '.doc': self._process_docx,  # .doc будет обрабатываться как .docx
-        }
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
 
     def _get_file_extension(self, filename):
         """Получает расширение файла в нижнем регистре"""
@@ -38,52 +283,77 @@ class DocumentProcessor:
 
     def _process_txt(self, file_bytes):
         """Обработка текстовых файлов"""
-        return file_bytes.decode("utf-8")
+        return _decode_text(file_bytes)
 
     def _process_csv(self, file_bytes):
         """Обработка CSV файлов"""
-        content = file_bytes.decode("utf-8")
-        # Преобразуем CSV в более читаемый текстовый формат
-        lines = content.split('\n')
-        if not lines:
-            return ""
+        # Разбираем CSV модулем csv: он корректно обрабатывает поля в кавычках
+        # с запятыми и переносами строк внутри. Байты декодируются по мере
+        # чтения строк, без промежуточной копии всего файла в виде str
+        reader = csv.reader(io.TextIOWrapper(io.BytesIO(file_bytes), encoding="utf-8-sig", newline=""))
 
         # Обрабатываем заголовок
-        headers = lines[0].split(',')
-        result = []
+        headers = next(reader, None)
+        if headers is None:
+            return ""
 
-        # Обрабатываем данные
-        for i, line in enumerate(lines[1:]):
-            if not line.strip():
-                continue
-            values = line.split(',')
-            row_text = f"Запись {i+1}:\n"
-            for j, value in enumerate(values):
-                if j < len(headers):
-                    row_text += f"- {headers[j]}: {value}\n"
-                else:
-                    row_text += f"- Значение {j+1}: {value}\n"
-            result.append(row_text)
+        # Преобразуем CSV в более читаемый текстовый формат
+        return "\n".join(
+            self._format_csv_row(i, headers, values)
+            for i, values in enumerate(reader)
+            if any(value.strip() for value in values)
+        )
 
-        return "\n".join(result)
+    def _format_csv_row(self, row_num, headers, values):
+        """Форматирует строку CSV как текстовую запись"""
+        row_parts = [f"Запись {row_num+1}:\n"]
+        row_parts.extend(f"- {header}: {value}\n" for header, value in zip(headers, values))
+        # Значения без заголовка (строка длиннее заголовка)
+        row_parts.extend(
+            f"- Значение {j+1}: {value}\n"
+            for j, value in enumerate(values[len(headers):], start=len(headers))
+        )
+        return "".join(row_parts)
 
     def _process_pdf(self, file_bytes):
-        """Обработка PDF файлов"""
+        """Обработка PDF файлов (PyMuPDF, при его отсутствии - PyPDF2)"""
+        if not PYMUPDF_AVAILABLE:
+            return self._process_pdf_pypdf2(file_bytes)
+
         try:
-            import io
-            import PyPDF2
+            text_parts = []
 
+            # Проходим по всем страницам и извлекаем текст
+            with fitz.open(stream=file_bytes, filetype="pdf") as pdf_doc:
+                for page_num, page in enumerate(pdf_doc):
+                    page_text = page.get_text("text")
+                    if page_text:
+                        text_parts.append(f"\n--- Страница {page_num + 1} ---\n{page_text}\n")
+
+            text = "".join(text_parts)
+            if not text.strip():
+                return "PDF документ не содержит извлекаемого текста или является сканированным документом."
+            return text
+        except Exception as e:
+            return f"Ошибка при обработке PDF файла: {str(e)}"
+
+    def _process_pdf_pypdf2(self, file_bytes):
+        """Обработка PDF файлов с помощью PyPDF2"""
+        if not PYPDF2_AVAILABLE:
+            return "Ошибка при обработке PDF файла: установите PyMuPDF или PyPDF2"
+
+        try:
             pdf_file = io.BytesIO(file_bytes)
             pdf_reader = PyPDF2.PdfReader(pdf_file)
-            text = ""
+            text_parts = []
 
             # Проходим по всем страницам и извлекаем текст
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
+            for page_num, page in enumerate(pdf_reader.pages):
                 page_text = page.extract_text()
                 if page_text:
-                    text += f"\n--- Страница {page_num + 1} ---\n{page_text}\n"
+                    text_parts.append(f"\n--- Страница {page_num + 1} ---\n{page_text}\n")
 
+            text = "".join(text_parts)
             if not text.strip():
                 return "PDF документ не содержит извлекаемого текста или является сканированным документом."
             return text
@@ -92,10 +362,10 @@ class DocumentProcessor:
 
     def _process_docx(self, file_bytes):
         """Обработка DOCX файлов"""
-        try:
-            import io
-            import docx
+        if not DOCX_AVAILABLE:
+            return "Ошибка при обработке DOCX файла: установите python-docx"
 
+        try:
             docx_file = io.BytesIO(file_bytes)
             doc = docx.Document(docx_file)
             text = []
@@ -108,6 +378,15 @@ class DocumentProcessor:
         except Exception as e:
             return f"Ошибка при обработке DOCX файла: {str(e)}"
 
+    # Обработчики по расширению файла: таблица строится один раз при определении класса
+    supported_formats = {
+        '.txt': _process_txt,
+        '.csv': _process_csv,
+        '.pdf': _process_pdf,
+        '.docx': _process_docx,
+        '.doc': _process_docx,  # .doc будет обрабатываться как .docx
+    }
+
     def process_file(self, file_path):
         """Обрабатывает файл и возвращает текстовое содержимое"""
         try:
@@ -125,7 +404,7 @@ class DocumentProcessor:
 
             # Обрабатываем файл в зависимости от формата
             print(f"Обработка файла формата {extension}...")
-            text = self.supported_formats[extension](file_bytes)
+            text = self.supported_formats[extension](self, file_bytes)
             print(f"Файл обработан. Извлечено {len(text)} символов текста.")
 
             return text
@@ -138,13 +417,19 @@ class KnowledgeBaseManager:
 
     def __init__(self):
         """Инициализация менеджера базы знаний"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         self.document_processor = DocumentProcessor()
 
         # Параметры из конфигурации или из централизованного состояния
         STATE.chunk_size = self.config_manager.get_setting("settings", "chunk_size", 1024)
         STATE.chunk_overlap = self.config_manager.get_setting("settings", "chunk_overlap", 200)
 
+        # Размер чанков в токенах (а не в символах), если доступен tiktoken
+        self.chunk_by_tokens = self.config_manager.get_setting("settings", "chunk_by_tokens", False)
+        if self.chunk_by_tokens and not TIKTOKEN_AVAILABLE:
+            print("⚠️ tiktoken не установлен, размер чанков считается в символах")
+            self.chunk_by_tokens = False
+
         # Создаем директорию для базы знаний, если она не существует
         self.kb_dir = os.path.join(DATA_DIR, "knowledge_base")
         os.makedirs(self.kb_dir, exist_ok=True)
@@ -192,8 +477,7 @@ class KnowledgeBaseManager:
             use_existing = input("Использовать существующую базу знаний? (y/n): ").lower().strip() == 'y'
 
             if use_existing:
-                with open(kb_file, 'r', encoding='utf-8') as f:
-                    kb_text = f.read()
+                kb_text = _read_text_file(kb_file)
                 print(f"✅ Загружено {len(kb_text)} символов из существующего файла.")
                 
                 # Сохраняем путь и текст в состояние
@@ -265,6 +549,20 @@ class KnowledgeBaseManager:
         print(f"✅ Создана демонстрационная база знаний ({len(demo_kb)} символов).")
         return demo_kb
 
+    def _classify_chunks(self, chunks):
+        """
+        Определяет категории всех чанков
+
+        Args:
+            chunks (list): Тексты чанков
+
+        Returns:
+            list: Список категорий для каждого чанка
+        """
+        # Проверяется только заголовок чанка (десятки микросекунд на чанк), поэтому
+        # пул процессов окупается лишь на десятках тысяч чанков и здесь не используется
+        return [_classify_chunk(chunk) for chunk in chunks]
+
     def split_text_into_chunks(self, text):
         """
         Разбивает текст на чанки с перекрытием
@@ -275,44 +573,50 @@ class KnowledgeBaseManager:
         Returns:
             list: Список документов (чанков)
         """
-        print(f"🔄 Разбиваем текст на чанки (размер={STATE.chunk_size}, перекрытие={STATE.chunk_overlap})...")
-
-        # Создаем разбиватель текста
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=STATE.chunk_size,
-            chunk_overlap=STATE.chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
+        unit = "токенов" if self.chunk_by_tokens else "символов"
+        print(f"🔄 Разбиваем текст на чанки (размер={STATE.chunk_size}, перекрытие={STATE.chunk_overlap} {unit})...")
+
+        length_function = _token_length if self.chunk_by_tokens else len
+
+        if SEMANTIC_SPLITTER_AVAILABLE:
+            # Разбиватель на Rust учитывает разметку markdown (заголовки, абзацы, строки),
+            # размер чанка измеряется в символах, как и у RecursiveCharacterTextSplitter,
+            # либо в токенах - тогда токены тоже считаются в Rust, без вызовов Python
+            if self.chunk_by_tokens:
+                text_splitter = MarkdownSplitter.from_tiktoken_model(
+                    TOKEN_MODEL, STATE.chunk_size, overlap=STATE.chunk_overlap
+                )
+            else:
+                text_splitter = MarkdownSplitter(STATE.chunk_size, overlap=STATE.chunk_overlap)
+            chunks = text_splitter.chunks(text)
+        else:
+            # Создаем разбиватель текста (токенизатор создается один раз и переиспользуется)
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=STATE.chunk_size,
+                chunk_overlap=STATE.chunk_overlap,
+                length_function=length_function,
+                separators=["\n\n", "\n", " ", ""]
+            )
+
+            # Разбиваем текст на чанки
+            chunks = text_splitter.split_text(text)
+
+        # Объединяем короткие обрывки (например, заголовки на границе чанков) с соседями
+        chunks = _merge_tiny_chunks(
+            chunks,
+            min_size=STATE.chunk_size // TINY_CHUNK_DIVISOR,
+            max_size=int(STATE.chunk_size * MERGED_CHUNK_SLACK),
+            # перекрытие ищется в символах, а в токенах задан только его размер
+            max_overlap=None if self.chunk_by_tokens else STATE.chunk_overlap,
+            length_function=length_function
         )
 
-        # Разбиваем текст на чанки
-        chunks = text_splitter.split_text(text)
+        # Определяем категории чанков
+        chunk_categories = self._classify_chunks(chunks)
 
         # Создаем документы с метаданными
         documents = []
-        for i, chunk in enumerate(chunks):
-            # Находим заголовки секций в чанке
-            headers = re.findall(r'#+\s+(.+?)(?=\n|$)', chunk)
-            categories = []
-
-            # Определяем категории на основе заголовков
-            for header in headers:
-                header_lower = header.lower()
-                if "аутентификац" in header_lower or "авторизац" in header_lower:
-                    categories.append("аутентификация")
-                elif "шифрован" in header_lower:
-                    categories.append("шифрование")
-                elif "сет" in header_lower or "экран" in header_lower or "ddos" in header_lower:
-                    categories.append("сетевая_безопасность")
-                elif "фишинг" in header_lower or "социальн" in header_lower or "угроз" in header_lower:
-                    categories.append("угрозы")
-                elif "вредонос" in header_lower or "защит" in header_lower:
-                    categories.append("защита")
-
-            # Если категории не найдены, используем "общее"
-            if not categories:
-                categories = ["общее"]
-
+        for i, (chunk, categories) in enumerate(zip(chunks, chunk_categories)):
             # Создаем документ с метаданными
             doc = Document(
                 page_content=chunk,
@@ -331,6 +635,76 @@ class KnowledgeBaseManager:
         print(f"✅ Создано {len(documents)} чанков из текста ({len(text)} символов)")
         return documents
 
+    def _get_chunks_cache_file(self, text):
+        """
+        Возвращает путь к файлу кэша чанков для текста и текущих параметров разбиения
+
+        Args:
+            text (str): Текст базы знаний
+
+        Returns:
+            str: Путь к файлу кэша
+        """
+        hasher = hashlib.blake2b(text.encode("utf-8"), digest_size=16)
+        splitter = "markdown" if SEMANTIC_SPLITTER_AVAILABLE else "recursive"
+        unit = "tokens" if self.chunk_by_tokens else "chars"
+        hasher.update(
+            f"{CHUNKING_VERSION}:{STATE.chunk_size}:{STATE.chunk_overlap}:{unit}:{splitter}".encode("utf-8")
+        )
+        return os.path.join(self.kb_dir, f"chunks_{hasher.hexdigest()}.jsonl")
+
+    def _load_cached_chunks(self, chunks_file):
+        """
+        Загружает чанки, сохраненные при прошлом разбиении того же текста
+
+        Args:
+            chunks_file (str): Путь к файлу кэша
+
+        Returns:
+            list: Список документов или None, если кэша нет
+        """
+        if not os.path.exists(chunks_file):
+            return None
+
+        try:
+            with open(chunks_file, 'r', encoding='utf-8') as f:
+                documents = [
+                    Document(page_content=record["text"], metadata=record["meta"])
+                    for record in map(json.loads, f)
+                ]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Не удалось прочитать кэш чанков: {str(e)}")
+            return None
+
+        # Сохраняем чанки в состояние
+        STATE.document_chunks = documents
+
+        print(f"✅ Загружено {len(documents)} чанков из кэша")
+        return documents
+
+    def _save_cached_chunks(self, chunks_file, documents):
+        """
+        Сохраняет чанки для повторного использования и удаляет кэш прежних версий текста
+
+        Args:
+            chunks_file (str): Путь к файлу кэша
+            documents (list): Список документов
+        """
+        try:
+            # Пишем во временный файл и переименовываем, чтобы не оставить неполный кэш
+            tmp_file = chunks_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for doc in documents:
+                    f.write(json.dumps({"text": doc.page_content, "meta": doc.metadata}, ensure_ascii=False) + "\n")
+            os.replace(tmp_file, chunks_file)
+
+            for filename in os.listdir(self.kb_dir):
+                path = os.path.join(self.kb_dir, filename)
+                if filename.startswith("chunks_") and filename.endswith(".jsonl") and path != chunks_file:
+                    os.remove(path)
+        except OSError as e:
+            print(f"⚠️ Не удалось сохранить кэш чанков: {str(e)}")
+
     def process_knowledge_base(self, file_path=None):
         """
         Выполняет полный процесс загрузки, обработки базы знаний
@@ -351,11 +725,15 @@ class KnowledgeBaseManager:
             print("❌ Не удалось загрузить базу знаний.")
             return None, None
 
-        # 2. Разбиваем текст на чанки
-        documents = self.split_text_into_chunks(kb_text)
-        if not documents:
-            print("❌ Не удалось разбить текст на чанки.")
-            return kb_text, None
+        # 2. Разбиваем текст на чанки (или берем результат прошлого разбиения того же текста)
+        chunks_file = self._get_chunks_cache_file(kb_text)
+        documents = self._load_cached_chunks(chunks_file)
+        if documents is None:
+            documents = self.split_text_into_chunks(kb_text)
+            if not documents:
+                print("❌ Не удалось разбить текст на чанки.")
+                return kb_text, None
+            self._save_cached_chunks(chunks_file, documents)
 
         print("\n" + "=" * 80)
         print("✅ БАЗА ЗНАНИЙ УСПЕШНО ЗАГРУЖЕНА И ПОДГОТОВЛЕНА")
@@ -16,7 +16,7 @@ import threading
 import concurrent.futures
 from tqdm.auto import tqdm
 
-from cybersec_consultant.config import ConfigManager, DATA_DIR
+from cybersec_consultant.config import get_config_manager, DATA_DIR
 from cybersec_consultant.state_management import STATE
 from cybersec_consultant.knowledge_base import KnowledgeBaseManager, DocumentProcessor
 from cybersec_consultant.error_handling import handle_api_errors, retry
@@ -32,7 +32,7 @@ class KnowledgeEnrichmentManager:
     
     def __init__(self):
         """Инициализация менеджера обогащения знаний"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         self.kb_manager = KnowledgeBaseManager()
         self.document_processor = DocumentProcessor()
         
@@ -18,7 +18,7 @@ except ImportError:
     OPENAI_AVAILABLE = False
     print("⚠️ Библиотека OpenAI не установлена. Установите ее с помощью pip install openai")
 
-from cybersec_consultant.config import ConfigManager, RESPONSES_DIR, CACHE_DIR, get_api_key
+from cybersec_consultant.config import get_config_manager, RESPONSES_DIR, CACHE_DIR, get_api_key, reset_api_key
 from cybersec_consultant.state_management import STATE
 
 class LLMInterface:
@@ -26,7 +26,7 @@ class LLMInterface:
 
     def __init__(self):
         """Инициализация интерфейса языковых моделей"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         self.client = None
         
         # Инициализация API ключа
@@ -75,6 +75,40 @@ class LLMInterface:
         except Exception as e:
             print(f"❌ Ошибка при инициализации клиента OpenAI: {str(e)}")
     
+    def ensure_api_key(self):
+        """
+        Запрашивает API ключ, если он был сброшен, и переинициализирует клиент
+
+        Вызывается только из интерактивного режима, так как запрос ключа
+        блокирует поток.
+
+        Returns:
+            bool: True, если ключ был запрошен заново
+        """
+        if STATE.api_key:
+            return False
+        STATE.api_key = get_api_key()
+        self._init_client()
+        return True
+
+    @staticmethod
+    def _is_auth_error(error):
+        """
+        Проверяет, вызвана ли ошибка неверным API ключом
+
+        Args:
+            error (Exception): Ошибка запроса к API
+
+        Returns:
+            bool: True, если API отклонил ключ
+        """
+        if not OPENAI_AVAILABLE:
+            return False
+        auth_error = getattr(openai, "AuthenticationError", None) or getattr(
+            getattr(openai, "error", None), "AuthenticationError", None
+        )
+        return auth_error is not None and isinstance(error, auth_error)
+    
     def _load_response_cache(self):
         """Загружает кэш ответов из файла"""
         cache_file = os.path.join(self.cache_dir, "response_cache.json")
@@ -230,6 +264,13 @@ class LLMInterface:
             error_message = f"❌ Ошибка при получении ответа от модели {model}: {str(e)}"
             print(error_message)
             
+            # Неверный ключ не должен оставаться запомненным; новый ключ
+            # запрашивается интерактивным режимом (ensure_api_key), а не здесь
+            if self._is_auth_error(e):
+                print("⚠️ API ключ отклонен и будет запрошен повторно")
+                reset_api_key()
+                STATE.api_key = None
+            
             return {
                 "answer": f"Ошибка при генерации ответа: {str(e)}",
                 "success": False,
@@ -7,7 +7,7 @@ import os
 import json
 from datetime import datetime
 
-from cybersec_consultant.config import ConfigManager, PROMPTS_DIR
+from cybersec_consultant.config import get_config_manager, PROMPTS_DIR
 from cybersec_consultant.state_management import STATE
 
 class PromptManager:
@@ -15,7 +15,7 @@ class PromptManager:
 
     def __init__(self):
         """Инициализация менеджера промптов"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         self.prompts_file = os.path.join(PROMPTS_DIR, "system_prompts.json")
         
         # Создаем директорию для промптов, если она не существует
@@ -9,7 +9,7 @@ import time
 import json
 import hashlib
 from datetime import datetime
-from typing import Dict, List, Any, Set, Optional
+from typing import Dict, List, Any, Set, Optional, Tuple, Union
 
 class ConsultantState:
     """
@@ -48,6 +48,8 @@ class ConsultantState:
         self.chunk_size = 1024  # Размер чанка для разбиения текста
         self.chunk_overlap = 200  # Перекрытие чанков
         self.vector_db = None  # Векторная база данных
+        self.vector_documents = []  # Документы векторного индекса в порядке добавления
+        self.vector_table = None  # Плотная матрица векторов float16 для небольших корпусов
         
         # Настройки профилей
         self.profile = "standard"  # Текущий выбранный профиль
@@ -163,12 +165,12 @@ class ConsultantState:
         # Сохраняем в кэш
         self.response_cache[cache_key] = response_data.copy()
     
-    def get_search_from_cache(self, query: str, k: int) -> Optional[List[Any]]:
+    def get_search_from_cache(self, query: Union[str, Tuple], k: int) -> Optional[List[Any]]:
         """
         Получает результаты поиска из кэша, если они существуют
 
         Args:
-            query (str): Поисковый запрос
+            query (str или tuple): Поисковый запрос или составной ключ запроса
             k (int): Количество результатов
 
         Returns:
@@ -177,8 +179,8 @@ class ConsultantState:
         if not self.use_cache:
             return None
             
-        # Создаем ключ кэша
-        cache_key = f"{query}_{k}"
+        # Создаем ключ кэша (кортеж хешируется без форматирования строки)
+        cache_key = (query, k)
         
         # Проверяем наличие в кэше
         if cache_key in self.search_cache:
@@ -186,17 +188,17 @@ class ConsultantState:
             
         return None
     
-    def add_search_to_cache(self, query: str, k: int, results: List[Any]):
+    def add_search_to_cache(self, query: Union[str, Tuple], k: int, results: List[Any]):
         """
         Добавляет результаты поиска в кэш
 
         Args:
-            query (str): Поисковый запрос
+            query (str или tuple): Поисковый запрос или составной ключ запроса
             k (int): Количество результатов
             results (list): Результаты поиска
         """
-        # Создаем ключ кэша
-        cache_key = f"{query}_{k}"
+        # Создаем ключ кэша (кортеж хешируется без форматирования строки)
+        cache_key = (query, k)
         
         # Сохраняем в кэш
         self.search_cache[cache_key] = results
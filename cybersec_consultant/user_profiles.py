@@ -9,7 +9,7 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 
-from cybersec_consultant.config import ConfigManager, DATA_DIR
+from cybersec_consultant.config import get_config_manager, DATA_DIR
 from cybersec_consultant.state_management import STATE
 
 # Настройка логирования
@@ -22,7 +22,7 @@ class UserProfileManager:
     
     def __init__(self):
         """Инициализация менеджера профилей пользователей"""
-        self.config_manager = ConfigManager()
+        self.config_manager = get_config_manager()
         
         # Директория для хранения профилей
         self.profiles_dir = os.path.join(DATA_DIR, "user_profiles")
@@ -7,17 +7,22 @@ import re
 import hashlib
 from collections import Counter
 
+# Шаблоны очистки текста, скомпилированные один раз
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s]')
+
 class TextProcessor:
     """Класс для обработки и анализа текста"""
 
     def __init__(self):
         """Инициализация обработчика текста"""
-        self.stopwords = {
+        self.stopwords = frozenset({
             'и', 'в', 'на', 'с', 'по', 'для', 'от', 'к', 'за', 'из', 'о', 'что', 'как',
             'не', 'или', 'а', 'но', 'ни', 'да', 'бы', 'же', 'ли', 'если', 'чтобы', 'это',
             'то', 'так', 'вот', 'только', 'уже', 'вы', 'он', 'она', 'оно', 'они', 'мы',
             'я', 'этот', 'тот', 'такой', 'который', 'где', 'когда', 'быть', 'весь'
-        }
+        })
     
     def clean_text(self, text):
         """
@@ -33,13 +38,13 @@ class TextProcessor:
         text = text.lower()
         
         # Удаляем HTML-теги
-        text = re.sub(r'<[^>]+>', '', text)
+        text = _HTML_TAG_RE.sub('', text)
         
         # Заменяем множественные пробелы и переносы строк одиночным пробелом
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # Удаляем специальные символы (оставляем буквы, цифры и пробелы)
-        text = re.sub(r'[^\w\s]', '', text)
+        text = _SPECIAL_CHARS_RE.sub('', text)
         
         return text.strip()
     
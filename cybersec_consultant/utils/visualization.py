@@ -32,8 +32,8 @@ class DataVisualizer:
         if not results_with_scores:
             return None
         
-        # Извлекаем оценки релевантности
-        relevance_scores = [max(0, min(100, 100 * (1 - score / 2))) for _, score in results_with_scores]
+        # Извлекаем оценки релевантности (косинусное сходство)
+        relevance_scores = [max(0, min(100, 100 * score)) for _, score in results_with_scores]
         
         # Извлекаем метаданные источников
         doc_ids = [f"Док {i+1}" for i in range(len(results_with_scores))]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Общие настройки тестов
+
+Пакет cybersec_consultant при импорте загружает LangChain, FAISS, OpenAI и
+matplotlib, хотя тестируемые функции (BM25, объединение результатов, разбор
+CSV и т.д.) их не используют. Если эти библиотеки не установлены, вместо них
+подставляются заглушки, чтобы тесты запускались без полного набора зависимостей.
+"""
+
+import importlib.util
+import sys
+from unittest import mock
+
+# Необязательные для тестов пакеты и используемые пакетом подмодули
+HEAVY_MODULES = {
+    "langchain": ["langchain.text_splitter", "langchain.schema"],
+    "langchain_openai": [],
+    "langchain_community": [
+        "langchain_community.vectorstores",
+        "langchain_community.vectorstores.utils",
+        "langchain_community.docstore",
+        "langchain_community.docstore.in_memory",
+    ],
+    "faiss": [],
+    "openai": [],
+    "matplotlib": ["matplotlib.pyplot"],
+    "cryptography": [
+        "cryptography.fernet",
+        "cryptography.hazmat",
+        "cryptography.hazmat.primitives",
+        "cryptography.hazmat.primitives.hashes",
+        "cryptography.hazmat.primitives.kdf",
+        "cryptography.hazmat.primitives.kdf.pbkdf2",
+    ],
+}
+
+for package, submodules in HEAVY_MODULES.items():
+    if importlib.util.find_spec(package) is None:
+        for name in [package] + submodules:
+            sys.modules.setdefault(name, mock.MagicMock())
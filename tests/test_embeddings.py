@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты поиска ближайших векторов с ранним отсечением
+"""
+
+import numpy as np
+import pytest
+
+embeddings = pytest.importorskip("cybersec_consultant.embeddings")
+_l2_early = embeddings._l2_early
+
+
+def brute_force(a, B, k):
+    """Точный поиск k ближайших строк полным перебором"""
+    dist = ((B.astype(np.float64) - a.astype(np.float64)) ** 2).sum(axis=1)
+    top = np.argsort(dist, kind="stable")[:k]
+    return top, dist[top]
+
+
+@pytest.mark.parametrize("n, d, k", [(500, 256, 5), (300, 100, 10), (50, 64, 50), (1000, 768, 1)])
+def test_l2_early_matches_brute_force(n, d, k):
+    rng = np.random.default_rng(n + d + k)
+    B = rng.standard_normal((n, d)).astype(np.float16)
+    a = rng.standard_normal(d).astype(np.float32)
+
+    rows, dist = _l2_early(a, B, k)
+    expected_rows, expected_dist = brute_force(a, B, k)
+
+    np.testing.assert_array_equal(rows, expected_rows)
+    np.testing.assert_allclose(dist, expected_dist, rtol=1e-4)
+
+
+def test_l2_early_k_larger_than_corpus():
+    rng = np.random.default_rng(0)
+    B = rng.standard_normal((7, 128)).astype(np.float16)
+    a = rng.standard_normal(128).astype(np.float32)
+
+    rows, _ = _l2_early(a, B, 20)
+
+    np.testing.assert_array_equal(rows, brute_force(a, B, 7)[0])
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты BM25 и объединения результатов гибридного поиска
+"""
+
+import itertools
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+hybrid_search = pytest.importorskip("cybersec_consultant.hybrid_search")
+BM25 = hybrid_search.BM25
+HybridSearchManager = hybrid_search.HybridSearchManager
+STATE = pytest.importorskip("cybersec_consultant.state_management").STATE
+LRUCache = pytest.importorskip("cybersec_consultant.cache_manager").LRUCache
+
+
+class Doc:
+    """Минимальный документ с содержимым"""
+
+    def __init__(self, page_content):
+        self.page_content = page_content
+
+
+CORPUS = [
+    "SQL injection attacks exploit unsanitized database queries",
+    "Cross-site scripting injects malicious scripts into web pages",
+    "Firewall rules filter network traffic between zones",
+    "Phishing emails trick users into revealing passwords",
+    "Ransomware encrypts files and demands payment",
+    "SQL injection and XSS are common web vulnerabilities",
+    "Network segmentation limits lateral movement of attackers",
+    "Strong passwords and MFA protect accounts from phishing",
+]
+
+QUERIES = ["sql injection", "phishing passwords", "network firewall traffic", "injection injection web"]
+
+
+def reference_scores(bm25, documents, query):
+    """
+    Оценки BM25 по исходной формуле (документ за документом)
+
+    Args:
+        bm25 (BM25): Обученная модель (используется только ее токенизатор и параметры)
+        documents (list): Документы корпуса
+        query (str): Запрос
+
+    Returns:
+        np.ndarray: Оценки документов
+    """
+    corpus = [bm25._tokenize(doc.page_content) for doc in documents]
+    n_docs = len(corpus)
+    avgdl = sum(len(tokens) for tokens in corpus) / n_docs
+    doc_freqs = Counter(token for tokens in corpus for token in set(tokens))
+    idf = {
+        term: math.log((n_docs - n + 0.5) / (n + 0.5) + 1)
+        for term, n in doc_freqs.items()
+    }
+
+    scores = np.zeros(n_docs)
+    for i, tokens in enumerate(corpus):
+        freq = Counter(tokens)
+        for token in bm25._tokenize(query):
+            if token not in idf:
+                continue
+            tf = freq[token]
+            denominator = tf + bm25.k1 * (1 - bm25.b + bm25.b * len(tokens) / avgdl)
+            scores[i] += idf[token] * tf * (bm25.k1 + 1) / denominator
+    return scores
+
+
+@pytest.fixture
+def fitted_bm25():
+    documents = [Doc(text) for text in CORPUS]
+    bm25 = BM25()
+    bm25.fit(documents)
+    return bm25, documents
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_bm25_scores_match_reference_formula(fitted_bm25, query):
+    bm25, documents = fitted_bm25
+    scores = bm25.get_scores(bm25._tokenize(query))
+    np.testing.assert_allclose(scores, reference_scores(bm25, documents, query), rtol=1e-5, atol=1e-6)
+
+
+def test_bm25_search_orders_by_score(fitted_bm25):
+    bm25, documents = fitted_bm25
+    expected = reference_scores(bm25, documents, "sql injection")
+    # Порядок документов с нулевой оценкой не определен
+    n_found = int((expected > 0).sum())
+
+    results = bm25.search("sql injection", top_k=n_found)
+
+    assert [idx for idx, _ in results] == list(np.argsort(-expected, kind="stable")[:n_found])
+
+
+def test_bm25_save_load_round_trip(fitted_bm25, tmp_path):
+    bm25, _ = fitted_bm25
+    bm25.save(str(tmp_path))
+
+    loaded = BM25.load(str(tmp_path))
+
+    assert loaded is not None
+    assert loaded.vocab == bm25.vocab
+    for query in QUERIES:
+        np.testing.assert_array_equal(
+            loaded.get_scores(loaded._tokenize(query)), bm25.get_scores(bm25._tokenize(query))
+        )
+        assert loaded.search(query, top_k=5) == bm25.search(query, top_k=5)
+
+
+def test_bm25_load_rejects_other_format_version(fitted_bm25, tmp_path, monkeypatch):
+    bm25, _ = fitted_bm25
+    bm25.save(str(tmp_path))
+    monkeypatch.setattr(BM25, "FORMAT_VERSION", BM25.FORMAT_VERSION + 1)
+
+    assert BM25.load(str(tmp_path)) is None
+
+
+class RepeatedTokens:
+    """Документ из одного повторенного токена без хранения всех токенов в памяти"""
+
+    def __init__(self, token, count):
+        self.token = token
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return itertools.repeat(self.token, self.count)
+
+
+def test_bm25_fit_counts_tokens_beyond_float32_precision(monkeypatch):
+    # 2^24 + 1 не представимо в float32: сумма длин в float32 теряет последний токен
+    bm25 = BM25()
+    monkeypatch.setattr(bm25, "_tokenize_corpus", lambda texts: [RepeatedTokens("a", 2 ** 24), RepeatedTokens("b", 1)])
+
+    bm25.fit([Doc("a"), Doc("b")])
+
+    assert bm25.term_ptr[-1] == 2
+    assert [idx for idx, _ in bm25.search("b", top_k=1)] == [1]
+
+
+def test_bm25_matches_only_its_corpus(fitted_bm25, tmp_path):
+    bm25, documents = fitted_bm25
+    bm25.save(str(tmp_path))
+
+    assert bm25.matches(documents)
+    assert BM25.load(str(tmp_path)).matches(documents)
+    assert not bm25.matches(documents[::-1])
+    assert not bm25.matches(documents + [Doc("new document")])
+    assert not bm25.matches(documents[:-1] + [Doc("changed document")])
+
+
+class FakeVectorSearch:
+    """Векторный поиск, который только публикует документы индекса"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def load_index(self, index_name):
+        STATE.vector_documents = self.documents
+        return object()
+
+
+def make_loading_manager(documents, tmp_path, monkeypatch):
+    """Менеджер, загружающий индексы из временного каталога"""
+    monkeypatch.setattr(hybrid_search, "INDICES_DIR", str(tmp_path))
+    monkeypatch.setattr(HybridSearchManager, "_BM25_CACHE", LRUCache(maxsize=3))
+    monkeypatch.setattr(STATE, "vector_documents", None, raising=False)
+    manager = HybridSearchManager.__new__(HybridSearchManager)
+    manager.vector_search = FakeVectorSearch(documents)
+    manager.bm25 = None
+    manager._bm25_thread = None
+    manager._bm25_error = None
+    manager.documents = []
+    return manager
+
+
+def test_load_indexes_refits_stale_bm25(fitted_bm25, tmp_path, monkeypatch):
+    old_bm25, documents = fitted_bm25
+    old_bm25.save(str(tmp_path / "index" / hybrid_search.BM25_DIR))
+    new_documents = documents + [Doc("Zero-day exploits target unpatched software")]
+    manager = make_loading_manager(new_documents, tmp_path, monkeypatch)
+
+    assert manager.load_indexes("index")
+    manager._bm25_thread.join()
+
+    assert manager.bm25.matches(new_documents)
+    assert BM25.load(str(tmp_path / "index" / hybrid_search.BM25_DIR)).matches(new_documents)
+
+
+def test_failed_background_fit_is_reported(tmp_path, monkeypatch):
+    documents = [Doc(text) for text in CORPUS]
+    manager = make_loading_manager(documents, tmp_path, monkeypatch)
+
+    def failing_fit(self, documents):
+        raise MemoryError("out of memory")
+
+    monkeypatch.setattr(BM25, "fit", failing_fit)
+
+    assert manager.load_indexes("index")
+    # После ошибки поток сбрасывает ссылку на себя, поэтому она может уже быть None
+    thread = manager._bm25_thread
+    if thread is not None:
+        thread.join()
+
+    assert manager.bm25 is None
+    assert manager._bm25_thread is None
+    assert manager._bm25_error == "out of memory"
+
+
+def make_manager(n_docs):
+    """Менеджер гибридного поиска без загрузки моделей и индексов"""
+    manager = HybridSearchManager.__new__(HybridSearchManager)
+    manager.documents = [Doc(f"document {i}") for i in range(n_docs)]
+    return manager
+
+
+VECTOR_RESULTS = [(0, 0.9), (1, 0.8), (2, 0.7)]
+BM25_RESULTS = [(3, 7.0), (2, 5.0), (1, 3.0)]
+
+
+def test_rrf_weight_one_keeps_vector_order():
+    manager = make_manager(4)
+
+    results = manager._combine_results(VECTOR_RESULTS, BM25_RESULTS, 1.0, 3)
+
+    assert [manager.documents.index(doc) for doc, _ in results] == [0, 1, 2]
+    assert results[0][1] == pytest.approx(1.0)
+
+
+def test_rrf_weight_zero_keeps_bm25_order():
+    manager = make_manager(4)
+
+    results = manager._combine_results(VECTOR_RESULTS, BM25_RESULTS, 0.0, 3)
+
+    assert [manager.documents.index(doc) for doc, _ in results] == [3, 2, 1]
+    assert results[0][1] == pytest.approx(1.0)
+
+
+def test_rrf_scores_are_normalized():
+    manager = make_manager(4)
+
+    results = manager._combine_results([(2, 0.9), (0, 0.5)], [(2, 4.0), (3, 1.0)], 0.5, 4)
+
+    # Первое место в обоих списках дает оценку 1
+    assert results[0][0] is manager.documents[2]
+    assert results[0][1] == pytest.approx(1.0)
+    assert all(0.0 < score <= 1.0 for _, score in results)
+
+
+def test_rrf_ranks_identical_chunks_separately():
+    manager = make_manager(2)
+    manager.documents = [Doc("same text"), Doc("same text")]
+
+    results = manager._combine_results([(0, 0.9), (1, 0.9)], [], 1.0, 2)
+
+    assert [doc for doc, _ in results] == manager.documents
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Тесты объединения коротких чанков и разбора CSV
+"""
+
+import pytest
+
+knowledge_base = pytest.importorskip("cybersec_consultant.knowledge_base")
+_merge_tiny_chunks = knowledge_base._merge_tiny_chunks
+DocumentProcessor = knowledge_base.DocumentProcessor
+
+OVERLAP = "shared overlap between chunks"
+
+
+def test_merge_drops_repeated_overlap():
+    prev = "x" * 100 + " " + OVERLAP
+    tiny = OVERLAP + " tail"
+
+    merged = _merge_tiny_chunks([prev, tiny], min_size=50, max_size=200, max_overlap=40)
+
+    assert merged == [prev + " tail"]
+
+
+def test_merge_without_overlap_joins_with_newline():
+    merged = _merge_tiny_chunks(["a" * 100, "short"], min_size=50, max_size=200, max_overlap=40)
+
+    assert merged == ["a" * 100 + "\nshort"]
+
+
+def test_merge_respects_max_size():
+    chunks = ["a" * 100, "short"]
+
+    assert _merge_tiny_chunks(chunks, min_size=50, max_size=100, max_overlap=40) == chunks
+
+
+def test_merge_keeps_large_chunks_apart():
+    chunks = ["a" * 100, "b" * 100, "c" * 100]
+
+    assert _merge_tiny_chunks(chunks, min_size=50, max_size=1000, max_overlap=40) == chunks
+
+
+def test_merge_tiny_first_chunk_into_next():
+    merged = _merge_tiny_chunks(["# Header", "b" * 100], min_size=50, max_size=200, max_overlap=40)
+
+    assert merged == ["# Header\n" + "b" * 100]
+
+
+def test_merge_uses_length_function():
+    # В "токенах" (здесь - словах) второй чанк короткий, хотя в символах длинный
+    chunks = ["one two three four five six", "supercalifragilistic"]
+    words = lambda text: len(text.split())
+
+    merged = _merge_tiny_chunks(chunks, min_size=3, max_size=10, max_overlap=None, length_function=words)
+
+    assert merged == ["one two three four five six\nsupercalifragilistic"]
+
+
+def test_csv_quoted_commas_and_newlines():
+    # Записи нумеруются по строкам файла, пустая строка пропускается без перенумерации
+    data = (
+        'name,description\r\n'
+        '"SQL, injection","line one\nline two"\r\n'
+        '\r\n'
+        'XSS,"says ""hi"""\r\n'
+    ).encode("utf-8-sig")
+
+    text = DocumentProcessor.__new__(DocumentProcessor)._process_csv(data)
+
+    assert text == (
+        "Запись 1:\n"
+        "- name: SQL, injection\n"
+        "- description: line one\nline two\n"
+        "\n"
+        "Запись 3:\n"
+        "- name: XSS\n"
+        '- description: says "hi"\n'
+    )
+
+
+def test_csv_extra_values_without_header():
+    text = DocumentProcessor.__new__(DocumentProcessor)._process_csv("a\n1,2\n".encode("utf-8"))
+
+    assert text == "Запись 1:\n- a: 1\n- Значение 2: 2\n"
+
+
+def test_csv_empty_file():
+    assert DocumentProcessor.__new__(DocumentProcessor)._process_csv(b"") == ""